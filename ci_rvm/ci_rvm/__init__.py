@@ -1 +1 @@
-from .ci_rvm import create_profile_plots, find_profile_CI_bound, find_profile_CI_bound_steps, find_CI_bound
+from .ci_rvm import create_profile_plots, find_profile_CI_bound, find_profile_CI_bound_steps, find_CI_bound, find_profile_CI_bounds
@@ -6,7 +6,10 @@ Created on 16.01.2018
 import warnings
 import traceback
 import sys
+import uuid
 from functools import partial
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import sharedctypes
 
 import numpy as np
 from matplotlib import pyplot as plt
@@ -212,6 +215,85 @@ def find_profile_CI_bound(index, direction, x0, fun, jac, hess, alpha=0.95,
                              **kwargs)
 
 
+# objectives of the profile workers, built at most once per worker and key
+_objective_cache = {}
+_objective_sources = {}
+
+def _init_profile_worker(key, get_funs, const_args, shared_arrays):
+    arrays = [np.frombuffer(buffer, dtype, int(np.prod(shape))).reshape(shape)
+              for buffer, dtype, shape in shared_arrays]
+    _objective_sources[key] = (get_funs, const_args, arrays)
+
+def _get_cached_objective(key):
+    try:
+        return _objective_cache[key]
+    except KeyError:
+        get_funs, const_args, arrays = _objective_sources.pop(key)
+        funs = _objective_cache[key] = get_funs(*const_args, *arrays)
+        return funs
+
+def _find_profile_CI_bound_task(key, index, direction, x0, kwargs):
+    fun, jac, hess = _get_cached_objective(key)
+    return find_profile_CI_bound(index, direction, x0, fun, jac, hess, 
+                                 **kwargs)
+
+def find_profile_CI_bounds(x0, get_funs, const_args=(), shared_arrays=(), 
+                           indices=None, nit0=None, max_workers=None, 
+                           key=None, **kwargs):
+    """
+    Computes the end points of the profile likelihood confidence intervals
+    of the parameters ``indices`` in parallel and yields them as they are 
+    completed.
+    
+    Each worker process builds the log-likelihood function and its 
+    derivatives only once by calling ``get_funs(*const_args, *shared_arrays)``
+    and reuses them for all its tasks. ``get_funs`` must return the tuple
+    ``(fun, jac, hess)`` and has to be picklable (e.g. a module-level 
+    function or a static method). The numpy arrays in ``shared_arrays`` are
+    copied once to shared memory and are not pickled for the workers.
+    
+    ``nit0`` may contain the iteration counts of a previous run as an array
+    of shape ``(len(x0), 2)``, in which column 0 corresponds to the lower 
+    and column 1 to the upper bound. The bounds that needed the most 
+    iterations are computed first; bounds with unknown (``nan``) iteration
+    counts are computed before all others.
+    
+    The remaining keyword arguments are passed to `find_profile_CI_bound`.
+    
+    Yields ``(index, direction, result)`` tuples, where ``result`` contains 
+    the numbers of function, gradient, and Hessian evaluations (``nfev``, 
+    ``njev``, ``nhev``) and the number of iterations (``nit``).
+    """
+    if indices is None:
+        indices = range(len(x0))
+    if key is None:
+        key = uuid.uuid4().hex
+    
+    tasks = [(index, direction) for index in indices for direction in (-1, 1)]
+    if nit0 is not None:
+        nit0 = np.asarray(nit0, dtype=float)
+        costs = [nit0[index, int(direction==1)] for index, direction in tasks]
+        costs = np.where(np.isnan(costs), np.inf, costs)
+        tasks = [tasks[i] for i in np.argsort(-costs, kind="stable")]
+    
+    shared = []
+    for arr in shared_arrays:
+        arr = np.ascontiguousarray(arr)
+        buffer = sharedctypes.RawArray('b', max(arr.nbytes, 1))
+        np.frombuffer(buffer, arr.dtype, arr.size)[:] = arr.ravel()
+        shared.append((buffer, arr.dtype, arr.shape))
+    
+    with ProcessPoolExecutor(max_workers, initializer=_init_profile_worker,
+                             initargs=(key, get_funs, const_args, shared)
+                             ) as pool:
+        futures = {pool.submit(_find_profile_CI_bound_task, key, index, 
+                               direction, x0, kwargs): (index, direction) 
+                   for index, direction in tasks}
+        for future in as_completed(futures):
+            index, direction = futures[future]
+            yield index, direction, future.result()
+
+
 def find_profile_CI_bound_steps(index, x0, fun, jac, hess, direction=1, alpha=0.95, 
                           stepn=1, fun0=None, hess0=None, nmax=200, 
                           epsilon=1e-4, disp=True, vm=False):
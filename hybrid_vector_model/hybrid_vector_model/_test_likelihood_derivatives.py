@@ -0,0 +1,83 @@
+'''
+Created on 18.10.2026
+
+@author: Samuel
+
+Compares the analytic derivatives of the negative log-likelihood of the
+flow model with the derivatives obtained via automatic differentiation.
+
+Usage: python _test_likelihood_derivatives.py <model file (.vmm)>
+'''
+import sys
+
+import numpy as np
+
+from vemomoto_core.tools import saveobject
+
+try:
+    from .hybrid_vector_model import HybridVectorModel
+except ImportError:
+    from hybrid_vector_model import HybridVectorModel
+
+def check_likelihood_derivatives(model, parameters, considered=None,
+                                 approximationNumber=3):
+    """Compares the analytic derivatives of the negative log-likelihood
+    with the derivatives obtained via automatic differentiation.
+    
+    Parameters
+    ----------
+    model : HybridVectorModel
+        Model with prepared route model data
+    parameters : double[]
+        Free (unconverted) parameters at which the derivatives are
+        compared
+    considered : bool[]
+        Which parameters are free?
+    approximationNumber : int
+        Order of the series approximation of the likelihood
+    
+    Returns
+    -------
+    jacDeviation : float
+        Maximal absolute deviation between the gradients relative to the
+        maximal absolute entry of the autograd gradient
+    hessDeviation : float
+        Maximal absolute deviation between the Hessians relative to the
+        maximal absolute entry of the autograd Hessian
+    
+    """
+    routeChoiceParameters = model.routeModel["routeChoiceModel"].parameters
+    
+    nLLData = HybridVectorModel._get_nLL_data(model.routeModel,
+                                              routeChoiceParameters,
+                                              model.complianceRate,
+                                              model.properDataRate)
+    funs = [HybridVectorModel._get_nLL_funs_from_data(
+                model.trafficFactorModel, routeChoiceParameters, considered,
+                approximationNumber, analyticDerivatives, *nLLData)
+            for analyticDerivatives in (False, True)]
+    
+    (_, _, jac, hess, _), (_, _, jacAnalytic, hessAnalytic, _) = funs
+    
+    jacAutograd = jac(parameters)
+    hessAutograd = hess(parameters)
+    jacDeviation = (np.max(np.abs(jacAnalytic(parameters)-jacAutograd))
+                    / np.max(np.abs(jacAutograd)))
+    hessDeviation = (np.max(np.abs(hessAnalytic(parameters)-hessAutograd))
+                     / np.max(np.abs(hessAutograd)))
+    
+    print("Relative deviation of the analytic derivatives:",
+          "gradient:", jacDeviation, "| Hessian:", hessDeviation)
+    
+    return jacDeviation, hessDeviation
+
+def test_likelihood_derivatives(model, rTol=1e-6):
+    """Checks the derivatives at the fitted parameters of the model."""
+    jacDeviation, hessDeviation = check_likelihood_derivatives(
+        model, model.routeModel["parameters"], model.routeModel["covariates"])
+    assert jacDeviation < rTol and hessDeviation < rTol
+
+if __name__ == '__main__':
+    
+    model = saveobject.load_object(sys.argv[1])
+    test_likelihood_derivatives(model)
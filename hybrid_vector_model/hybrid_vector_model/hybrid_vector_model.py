@@ -19,17 +19,17 @@ import sys
 import warnings
 from copy import copy
 from os.path import exists
-from itertools import product as iterproduct, repeat, count as itercount, \
-                        chain as iterchain
+from itertools import repeat, count as itercount, chain as iterchain
 from collections import defaultdict
+from contextlib import ExitStack
 import traceback
 
 import numpy as np
-import numpy.lib.recfunctions as rf
 from scipy import sparse
 import scipy.optimize as op
 from scipy.stats import nbinom, norm as normaldist, f as fdist, linregress, \
                         vonmises, chi2
+from scipy.special import digamma, polygamma
 import matplotlib
 if os.name == 'posix':
     # if executed on a Windows server. Comment out this line, if you are working
@@ -38,7 +38,7 @@ if os.name == 'posix':
 import matplotlib.pyplot as plt
 import pandas as pd
 import autograd.numpy as ag
-from autograd import grad, hessian
+from autograd import grad, hessian, hessian_vector_product
 from statsmodels.distributions.empirical_distribution import ECDF
 import cvxpy as cp
 
@@ -47,14 +47,17 @@ from vemomoto_core.npcollections.npext import add_fields, list_to_csr_matrix, sp
     sparsepower, sparsesum, convert_R_0_1, \
     convert_R_pos, FlexibleArrayDict
 from vemomoto_core.tools import saveobject
-from vemomoto_core.npcollections.npextc import FlexibleArray
+from vemomoto_core.npcollections.npextc import FlexibleArray, pointer_sum
+from vemomoto_core.npcollections.tablereader import read_table
+from vemomoto_core.npcollections.idtable import IDTable, CODE_DTYPE
 from vemomoto_core.tools.hrprint import HierarchichalPrinter
 from vemomoto_core.tools.tee import Tee
 from vemomoto_core.tools.doc_utils import DocMetaSuperclass, add_doc
-from vemomoto_core.concurrent.concurrent_futures_ext import ProcessPoolExecutor
+from vemomoto_core.concurrent.concurrent_futures_ext import ProcessPoolExecutor, \
+    PersistentProcessPoolExecutor
 from vemomoto_core.concurrent.nicepar import Counter
-from lopaths import FlowPointGraph, FlexibleGraph
-from ci_rvm import find_profile_CI_bound
+from lopaths import FlowPointGraph, FlexibleGraph, RouteQueryService
+from ci_rvm import find_profile_CI_bounds
 
 try:
     from .traveltime_model import TrafficDensityVonMises
@@ -87,6 +90,10 @@ digets.
 
 2 digets remain reserved for internal use.
 
+Internally, vertices, road sections, survey locations, and destinations are
+identified by integer codes. The IDs are kept in 
+:py:class:`vemomoto_core.npcollections.idtable.IDTable` objects for output.
+
 """
 
 def non_join(string1, string2):
@@ -123,6 +130,10 @@ class TransportNetwork(FlowPointGraph):
         DestinationID                                      :py:data:`IDTYPE`, `optional`  ID of the destination that can be accessed via this
                                                                                           road section
         ================================================== ============================== =========
+        
+        Instead of a csv file, a Parquet or Arrow (Feather) file with the 
+        same columns can be given (requires ``pyarrow``). The file type is 
+        determined by the file extension.
               
     fileNameVertices : str
         Name of a csv file stating which vertices are origins and destinations.
@@ -146,6 +157,8 @@ class TransportNetwork(FlowPointGraph):
                                                     located in populated areas)
                                                   - `other`: no specific role for the vertex
         ==================== ================= =========
+        
+        Parquet and Arrow (Feather) files are accepted as well.
                              
     destinationToDestination : bool
         ``True`` iff destination to destination traffic is modelled, i.e. if
@@ -187,27 +200,20 @@ class TransportNetwork(FlowPointGraph):
         
         self.preprocessingArgs = preprocessingArgs
         self.prst("Reading road network file", fileNameEdges)
-        edges = np.genfromtxt(fileNameEdges, delimiter=",",  
-                                   skip_header = True, 
-                                   dtype = {"names":["ID", "from_to_original", 
-                                                     "length", "inspection", 
-                                                     "destinationID"], 
-                                            'formats':[IDTYPE, 
-                                                       '2' + IDTYPE, 
-                                                       "double", 
-                                                       "3" + IDTYPE, 
-                                                       IDTYPE]},
-                              autostrip = True)
+        edges = read_table(fileNameEdges, 
+                           dtype = {"names":["ID", "from_to_original", 
+                                             "length", "inspection", 
+                                             "destinationID"], 
+                                    'formats':[IDTYPE, 
+                                               '2' + IDTYPE, 
+                                               "double", 
+                                               "3" + IDTYPE, 
+                                               IDTYPE]})
         self.prst("Reading vertex file", fileNameVertices)
-        vertexData = np.genfromtxt(fileNameVertices, delimiter=",",  
-                                   skip_header = True, 
-                                   dtype = {"names":["ID", "potentialViaVertex",
-                                                     "type"], 
-                                            'formats':[IDTYPE, 'bool', 'int']},
-                                   autostrip = True)
-        
-        if not vertexData.ndim:
-            vertexData = np.expand_dims(vertexData, 0)
+        vertexData = read_table(fileNameVertices, 
+                                dtype = {"names":["ID", "potentialViaVertex",
+                                                  "type"], 
+                                         'formats':[IDTYPE, 'bool', 'int']})
         
         if destinationToDestination:
             # since destination access is given directly in the road network file, 
@@ -221,55 +227,64 @@ class TransportNetwork(FlowPointGraph):
         
         self.prst("Processing the input")
         
-        # double the edges to create directed graph from undirected graph
-        from_to = np.vstack((edges["from_to_original"], 
-                             edges["from_to_original"][:,::-1]))
+        # external IDs are mapped to integer codes; the tables keep the IDs
+        self.vertexIDTable = IDTable(np.concatenate((
+                        edges["from_to_original"].ravel(), vertexData["ID"])))
+        self.edgeIDTable = IDTable(edges["ID"])
+        self.destinationIDTable = IDTable()
+        
+        # station codes coincide with the station indices, because the 
+        # stations are interned at once in sorted order
+        self.stationIDToStationIndex = IDTable()
+        inspectionCodes = self.stationIDToStationIndex.intern(
+                                            edges["inspection"], missing=b'')
+        self.stationIndexToStationID = self.stationIDToStationIndex.ids
         
-        edgeData = rf.repack_fields(edges[["ID", "length", "destinationID"]])
+        # double the edges to create directed graph from undirected graph
+        from_to = self.vertexIDTable.get_codes(edges["from_to_original"])
+        from_to = np.vstack((from_to, from_to[:,::-1]))
+        
+        edgeData = np.zeros(len(edges), dtype=[("ID", CODE_DTYPE), 
+                                               ("length", "double"), 
+                                               ("destinationID", CODE_DTYPE)])
+        edgeData["ID"] = self.edgeIDTable.get_codes(edges["ID"])
+        edgeData["length"] = edges["length"]
+        edgeData["destinationID"] = self.destinationIDTable.intern(
+                                        edges["destinationID"], missing=b'')
         edgeData = np.concatenate((edgeData, edgeData))
         
         edgeData = add_fields(edgeData, ["inspection"], [object], [None])
         
-        inspectionStationIDs = np.unique(edges["inspection"])
-        if inspectionStationIDs[0] == b'':
-            inspectionStationIDs = inspectionStationIDs[1:]
-        
-        self.stationIndexToStationID = inspectionStationIDs
-        
-        inspectionStationIndices = {iD:i for i, iD 
-                                    in enumerate(inspectionStationIDs)}
-        
-        self.stationIDToStationIndex = inspectionStationIndices 
         edgesLen = len(edges)
         
         inspectionData = edgeData["inspection"]
-        consideredIndices = np.nonzero(edges["inspection"][:,0])[0]
-        inspectionData[consideredIndices] = [{inspectionStationIndices[iD]}
-                                             for iD in edges["inspection"][
-                                                        consideredIndices, 0]]
-        consideredIndices = np.nonzero(edges["inspection"][:,1])[0]
+        consideredIndices = np.nonzero(inspectionCodes[:,0] >= 0)[0]
+        inspectionData[consideredIndices] = [
+                {code} for code in inspectionCodes[consideredIndices, 0].tolist()
+                ]
+        consideredIndices = np.nonzero(inspectionCodes[:,1] >= 0)[0]
         inspectionData[edgesLen:][consideredIndices] = [
-                {inspectionStationIndices[iD]} for iD in 
-                edges["inspection"][consideredIndices, 1]
+                {code} for code in inspectionCodes[consideredIndices, 1].tolist()
                 ]
-        consideredIndices = np.nonzero(edges["inspection"][:,2])[0]
-        for i, iD in zip(consideredIndices, 
-                         edges["inspection"][consideredIndices, 2]):
+        consideredIndices = np.nonzero(inspectionCodes[:,2] >= 0)[0]
+        for i, code in zip(consideredIndices, 
+                           inspectionCodes[consideredIndices, 2].tolist()):
             for j in i, i + edgesLen:
                 if inspectionData[j]: 
-                    inspectionData[j].add(inspectionStationIndices[iD])
+                    inspectionData[j].add(code)
                 else:
-                    inspectionData[j] = {inspectionStationIndices[iD]}
+                    inspectionData[j] = {code}
                 
         self.prst("Creating graph")
-        graph = FlexibleGraph(from_to, edgeData, vertexData["ID"], 
+        graph = FlexibleGraph(from_to, edgeData, 
+                              self.vertexIDTable.get_codes(vertexData["ID"]), 
                               vertexData[["potentialViaVertex", "type"]],
                               replacementMode="shortest", lengthLabel="length")
         
         graph.add_vertex_attributes(("destinationID", "significant"), 
-                                    (IDTYPE, bool),
-                                    (b'', graph.vertices.array["type"] > 0))
-        graph.set_default_vertex_data((0, True, 0, "", False))
+                                    (CODE_DTYPE, bool),
+                                    (-1, graph.vertices.array["type"] > 0))
+        graph.set_default_vertex_data((0, True, 0, -1, False))
         
         # adding virtual edges to represent destinations
         self.__add_virtual_destination_vertices(graph)
@@ -284,27 +299,25 @@ class TransportNetwork(FlowPointGraph):
         self.vertices.array[:self.vertices.size]["significant"] = True
         
         self.sinkIndexToVertexIndex = self.vertices.get_array_indices("type", 2)
-        self.sinkIndexToSinkID = self.vertices.array["ID"][
-                                                self.sinkIndexToVertexIndex]
+        self.sinkIndexToSinkID = self.vertexIDTable.get_ids(
+                        self.vertices.array["ID"][self.sinkIndexToVertexIndex])
         order = np.argsort(self.sinkIndexToSinkID)
         self.sinkIndexToSinkID = self.sinkIndexToSinkID[order]
         self.sinkIndexToVertexIndex = self.sinkIndexToVertexIndex[order]
         
-        self.sinkIDToSinkIndex = {iD:index for index, iD 
-                                  in enumerate(self.sinkIndexToSinkID)}
+        self.sinkIDToSinkIndex = IDTable(self.sinkIndexToSinkID)
         self.rawSinkIndexToVertexIndex = self.sinkIndexToVertexIndex
         
         self.sourceIndexToVertexIndex = self.vertices.get_array_indices("type", 1)
         
-        self.sourceIndexToSourceID = self.vertices.array["ID"][
-                                                self.sourceIndexToVertexIndex]
+        self.sourceIndexToSourceID = self.vertexIDTable.get_ids(
+                    self.vertices.array["ID"][self.sourceIndexToVertexIndex])
         order = np.argsort(self.sourceIndexToSourceID)
         self.sourceIndexToSourceID = self.sourceIndexToSourceID[order]
         self.sourceIndexToVertexIndex = self.sourceIndexToVertexIndex[order]
         self.rawSourceIndexToVertexIndex = self.sourceIndexToVertexIndex
         
-        self.sourceIDToSourceIndex = {iD:index for index, iD 
-                                      in enumerate(self.sourceIndexToSourceID)}
+        self.sourceIDToSourceIndex = IDTable(self.sourceIndexToSourceID)
         self.sourcesConsidered = np.ones(self.sourceIndexToSourceID.size, 
                                          dtype=bool)
         
@@ -312,6 +325,18 @@ class TransportNetwork(FlowPointGraph):
         self.postalCodeIndexToVertexIndex = self.vertices.get_array_indices("type", 3)
         
         self.prst("Transport network creation finished.")
+    
+    def _check_id_tables(self):
+        """Raises a ValueError if the network has been created before the
+        vertex, edge, station and destination IDs were interned as integer
+        codes (see :py:class:`vemomoto_core.npcollections.idtable.IDTable`).
+        Such networks store the IDs as byte strings and cannot be converted,
+        because the codes are also stored in the graph."""
+        if not isinstance(self.__dict__.get("vertexIDTable"), IDTable):
+            raise ValueError("The road network has been saved by an older "
+                             + "version that did not intern the IDs as "
+                             + "integer codes. Please create the road network "
+                             + "again from the network files.")
         
     def preprocessing(self, preprocessingArgs=None):
         """Preprocesses the graph to make path search queries more efficient.
@@ -356,7 +381,7 @@ class TransportNetwork(FlowPointGraph):
         
         edges = graph.edges
         edgeArr = edges.get_array()
-        consideredEdges = edgeArr[edgeArr["destinationID"] != np.array("", dtype=IDTYPE)]
+        consideredEdges = edgeArr[edgeArr["destinationID"] >= 0]
         
         if vertexType == 1:
             destinationLabel = self._DESTINATION_SOURCE_LABEL
@@ -364,7 +389,8 @@ class TransportNetwork(FlowPointGraph):
         elif vertexType == 2:
             destinationLabel = self._DESTINATION_SINK_LABEL
             destinationEdgeLabel = self._DESTINATION_SINK_EDGE_LABEL
-                                  
+        
+        # the destination codes are assigned in the order of the IDs
         consideredEdges = consideredEdges[np.argsort(consideredEdges["destinationID"])]
         if not consideredEdges.size:
             return
@@ -372,8 +398,19 @@ class TransportNetwork(FlowPointGraph):
         self.prst("Adding virtual edges to represent destinations")
         lastdestinationID = -1
         
+        destinationIDs, destinationIndices = np.unique(
+                            consideredEdges["destinationID"], return_inverse=True)
+        newVertexIDs = self.vertexIDTable.intern(np.char.add(
+                                destinationLabel, 
+                                self.destinationIDTable.get_ids(destinationIDs)
+                                ))[destinationIndices].tolist()
+        newEdgeIDs = self.edgeIDTable.intern(np.char.add(
+                                destinationEdgeLabel, 
+                                np.arange(consideredEdges.size).astype(bytes)
+                                )).tolist()
+        
         newVertexLines = (graph.vertices.size-graph.vertices.space
-                          + np.unique(consideredEdges["destinationID"]).size)
+                          + destinationIDs.size)
         if newVertexLines > 0:
             graph.vertices.expand(newVertexLines)
         
@@ -385,30 +422,39 @@ class TransportNetwork(FlowPointGraph):
         for i, row in enumerate(consideredEdges):
             if lastdestinationID != row["destinationID"]:
                 lastdestinationID = row["destinationID"]
-                newVertexID = destinationLabel + row["destinationID"]
+                newVertexID = newVertexIDs[i]
                 graph.add_vertex(newVertexID, (newVertexID, True, vertexType,
                                                lastdestinationID, True))
             try:
-                vertex = row["fromID"]
+                vertex = int(row["fromID"])
                 if vertexType == 1:
                     fromTo = (newVertexID, vertex)
                 else:
                     fromTo = (vertex, newVertexID)
-                graph.add_edge(*fromTo, (destinationEdgeLabel + bytes(str(i), 'utf8'),
-                                         row["length"], False, ''))
+                graph.add_edge(*fromTo, (newEdgeIDs[i], row["length"], -1, 
+                                         None))
             except KeyError:
                 edgeData = graph.get_edge_data(*fromTo, False)
                 if row["length"] < edgeData["length"]:
                     edgeData["length"] = row["length"]
                     
-    def find_shortest_distances(self):
+    def find_shortest_distances(self, cacheDirectory=None):
         """Determines the shortest distances between all origins and destinations
         and from all postal code centres to the destinations
         
+        Parameters
+        ----------
+        cacheDirectory : str
+            Directory in which computed distances are cached. If the road 
+            network has not changed, previously computed distances are 
+            loaded from the cache and only distances for new origins and
+            destinations are computed. If ``None``, no cache is used.
+        
         """
         
         dists = self.find_shortest_distance_array(self.sourceIndexToVertexIndex, 
-                                                  self.sinkIndexToVertexIndex)
+                                                  self.sinkIndexToVertexIndex,
+                                                  cacheDirectory=cacheDirectory)
         # treat disconnected sources and sinks well
         sourcesConsidered = np.min(dists, 1) < np.inf
         sinksConsidered = np.min(dists, 0) < np.inf
@@ -417,11 +463,10 @@ class TransportNetwork(FlowPointGraph):
             self.sinkIndexToVertexIndex = self.sinkIndexToVertexIndex[
                                                                 sinksConsidered]
         
-            self.sinkIndexToSinkID = self.vertices.array["ID"][
-                                                    self.sinkIndexToVertexIndex]
+            self.sinkIndexToSinkID = self.vertexIDTable.get_ids(
+                        self.vertices.array["ID"][self.sinkIndexToVertexIndex])
         
-            self.sinkIDToSinkIndex = {iD:index for index, iD 
-                                      in enumerate(self.sinkIndexToSinkID)}
+            self.sinkIDToSinkIndex = IDTable(self.sinkIndexToSinkID)
             self.update_sources_considered(considered=sourcesConsidered)
         
         if (dists == np.inf).any():
@@ -432,7 +477,8 @@ class TransportNetwork(FlowPointGraph):
             
         self.postalCodeDistances = self.find_shortest_distance_array(
                                             self.postalCodeIndexToVertexIndex, 
-                                            self.sinkIndexToVertexIndex)
+                                            self.sinkIndexToVertexIndex,
+                                            cacheDirectory=cacheDirectory)
         
         if (self.postalCodeDistances == np.inf).any():
             warnings.warn("Some postal code areas and sinks are disconnected.")
@@ -483,20 +529,44 @@ class TransportNetwork(FlowPointGraph):
     
         self.sourceIndexToVertexIndex = self.rawSourceIndexToVertexIndex[
                                                         self.sourcesConsidered]
-        self.sourceIndexToSourceID = self.vertices.array["ID"][
-                                            self.sourceIndexToVertexIndex]
+        self.sourceIndexToSourceID = self.vertexIDTable.get_ids(
+                    self.vertices.array["ID"][self.sourceIndexToVertexIndex])
     
-        self.sourceIDToSourceIndex = {iD:index for index, iD 
-                                      in enumerate(
-                                                self.sourceIndexToSourceID)}
+        self.sourceIDToSourceIndex = IDTable(self.sourceIndexToSourceID)
         if "shortestDistances" in self.__dict__:
             del self.__dict__["shortestDistances"]
+    
+    def create_route_query_service(self, cacheSize=8):
+        """Creates a service for fast queries of the shortest routes from 
+        single origins to single destinations.
+        
+        The network must have been preprocessed (see :py:meth:`preprocessing`).
+        The queries refer to vertex indices. The vertex index of the origin 
+        with ID ``originID`` is 
+        ``sourceIndexToVertexIndex[sourceIDToSourceIndex[originID]]``; the
+        vertex indices of the destinations are obtained accordingly from
+        :py:attr:`sinkIndexToVertexIndex` and :py:attr:`sinkIDToSinkIndex`.
+        
+        Parameters
+        ----------
+        cacheSize : int
+            Number of origins whose shortest path trees are cached.
+        
+        Returns
+        -------
+        :py:class:`lopaths.graph.RouteQueryService`
+            Service whose searches are pruned with respect to the 
+            destinations.
+        
+        """
+        return RouteQueryService(self, self.sinkIndexToVertexIndex, cacheSize)
         
     def find_potential_routes(self, 
             stretchConstant=1.5, 
             localOptimalityConstant=.2, 
             acceptionFactor=0.667,
-            rejectionFactor=1.333):
+            rejectionFactor=1.333,
+            outputDirectory=None):
         """Searches potential routes of boaters. 
         
         For detailed documentation on the arguments, refer to 
@@ -523,6 +593,12 @@ class TransportNetwork(FlowPointGraph):
             check. ``1`` performs exact checks, ``2`` may reject paths that 
             are admissible but not locally optimal twice as much as required.
             Choose the smallest feasible value. ``1`` is often possible.
+        outputDirectory : str
+            If given, the admissible routes are written to this directory 
+            in chunks while they are searched (see 
+            :py:class:`lopaths.graph.RouteStore`), and the results are 
+            built from the saved routes at the end. This bounds the memory 
+            needed for large route sets.
         
         """
         
@@ -536,7 +612,8 @@ class TransportNetwork(FlowPointGraph):
                                                 stretchConstant, 
                                                 localOptimalityConstant, 
                                                 acceptionFactor,
-                                                rejectionFactor)
+                                                rejectionFactor,
+                                                outputDirectory=outputDirectory)
     
     def _pair_to_pair_index(self, pair):
         """Converts a tuple (OriginIndex, DesitnationIndex) to an integer index
@@ -1235,6 +1312,19 @@ class HybridVectorModel(HierarchichalPrinter):
         self.destinationToDestination = destinationToDestination
         self.routeModel = None
     
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        roadNetwork = state.get("roadNetwork")
+        if roadNetwork is not None:
+            try:
+                roadNetwork._check_id_tables()
+            except ValueError as e:
+                # keep the remaining model, so that only the road network
+                # has to be created again
+                warnings.warn(str(e) + " The road network has been removed "
+                              + "from the model.")
+                del self.roadNetwork
+    
     def save(self, fileName=None):
         """Saves the model to the file ``fileName``.vmm
         
@@ -1251,8 +1341,26 @@ class HybridVectorModel(HierarchichalPrinter):
             self.prst("Saving the model as file", fileName+".vmm")
             if hasattr(self, "roadNetwork"):
                 self.roadNetwork.lock = None
+            self.shutdown_executor()
             saveobject.save_object(self, fileName+".vmm")
     
+    def _get_executor(self):
+        """Returns the worker pool that is kept between the computations of
+        the model."""
+        executor = self.__dict__.get("_executor")
+        if executor is None:
+            executor = self._executor = PersistentProcessPoolExecutor()
+        return executor
+    
+    def shutdown_executor(self):
+        """Shuts down the worker pools kept by the model and its road 
+        network. The pools are started again when they are needed."""
+        executor = self.__dict__.pop("_executor", None)
+        if executor is not None:
+            executor.shutdown()
+        if hasattr(self, "roadNetwork"):
+            self.roadNetwork.shutdown_executor()
+    
     @add_doc(TransportNetwork)
     def create_road_network(self, 
             fileNameEdges=None, 
@@ -1280,6 +1388,45 @@ class HybridVectorModel(HierarchichalPrinter):
                           "and will be removed.")
             self.routeModel = None
     
+    def save_road_network(self, directory):
+        """Saves the road network as a directory of flat arrays.
+        
+        Refer to :py:meth:`lopaths.graph.FlowPointGraph.save_arrays` for
+        details.
+        
+        Parameters
+        ----------
+        directory : str
+            Name of the directory.
+        
+        """
+        self.roadNetwork.save_arrays(directory)
+    
+    def load_road_network(self, directory, mmap_mode="r"):
+        """Loads a preprocessed road network saved with
+        :py:meth:`save_road_network`.
+        
+        Refer to :py:meth:`lopaths.graph.FlowPointGraph.load_arrays` for
+        details.
+        
+        Parameters
+        ----------
+        directory : str
+            Name of the directory.
+        mmap_mode : str
+            Memory-map mode for the arrays. ``None`` loads the arrays into
+            memory.
+        
+        """
+        roadNetwork = TransportNetwork.load_arrays(directory, mmap_mode,
+                                                   parentPrinter=self)
+        roadNetwork._check_id_tables()
+        self.roadNetwork = roadNetwork
+        
+        self.__check_origin_road_match()
+        self.__check_destination_road_match()
+        self.__check_postal_code_road_match()
+    
     def set_compliance_rate(self, complianceRate):
         """Sets the boaters' compliance rate (for stopping at inspection/survey 
         locations) 
@@ -1452,7 +1599,7 @@ class HybridVectorModel(HierarchichalPrinter):
         if ("roadNetwork" in self.__dict__ and 
                 "postalCodeAreaData" in self.__dict__):
             popData = self.postalCodeAreaData
-            if not (popData["vertexID"] 
+            if not (self.roadNetwork.vertexIDTable.get_codes(popData["vertexID"])
                     == self.roadNetwork.vertices.get_array()["ID"][
                         self.roadNetwork.postalCodeIndexToVertexIndex]).all():
                 raise ValueError("The vertexIDs of the postal code area centers"
@@ -1470,7 +1617,7 @@ class HybridVectorModel(HierarchichalPrinter):
         if ("roadNetwork" in self.__dict__ and 
             "rawOriginData" in self.__dict__):
             popData = self.rawOriginData
-            if not (popData["originID"] 
+            if not (self.roadNetwork.vertexIDTable.get_codes(popData["originID"])
                     == self.roadNetwork.vertices.get_array()["ID"][
                             self.roadNetwork.rawSourceIndexToVertexIndex]).all():
                 raise ValueError("The originIDs of the population data and "
@@ -1493,21 +1640,27 @@ class HybridVectorModel(HierarchichalPrinter):
                                  + " do not match. Maybe some destination data are"
                                  + " missing?")
             L = self.roadNetwork._DESTINATION_SINK_LABEL
-            for ID1, ID2 in zip(originData["destinationID"], 
-                                self.roadNetwork.vertices.get_array(
-                                    )["ID"][
-                                    self.roadNetwork.rawSinkIndexToVertexIndex]):
-                if not L + ID1 == ID2: # and False:
-                    raise ValueError("The destinationIDs of the destination data and the road"
-                                     + " network do not match.\n"
-                                     + "Maybe some destination data are missing?")
-    
-    def find_shortest_distances(self):
+            sinkCodes = self.roadNetwork.vertexIDTable.get_codes(
+                                np.char.add(L, originData["destinationID"]))
+            if not (sinkCodes 
+                    == self.roadNetwork.vertices.get_array()["ID"][
+                            self.roadNetwork.rawSinkIndexToVertexIndex]).all():
+                raise ValueError("The destinationIDs of the destination data and the road"
+                                 + " network do not match.\n"
+                                 + "Maybe some destination data are missing?")
+    
+    def find_shortest_distances(self, cacheDirectory=None):
         """Determines the shortest distances between all considered origins and 
         destinations, and destinations and postal code area centres
         
         See :py:meth:`TransportNetwork.find_shortest_distances`.
         
+        Parameters
+        ----------
+        cacheDirectory : str
+            Directory in which computed distances are cached. If ``None``,
+            no cache is used.
+        
         """
         roadNetwork = self.roadNetwork
         
@@ -1516,7 +1669,7 @@ class HybridVectorModel(HierarchichalPrinter):
             oldSinksConsidered = roadNetwork.sinksConsidered
             oldSourcesConsidered = roadNetwork.sourcesConsidered
         
-        roadNetwork.find_shortest_distances()
+        roadNetwork.find_shortest_distances(cacheDirectory)
         sourcesConsidered = roadNetwork.sourcesConsidered
         sinksConsidered = roadNetwork.sinksConsidered
         
@@ -1585,13 +1738,15 @@ class HybridVectorModel(HierarchichalPrinter):
             stretchConstant=1.5, 
             localOptimalityConstant=.2, 
             acceptionFactor=0.667,
-            rejectionFactor=1.333):
+            rejectionFactor=1.333,
+            outputDirectory=None):
         """# Find potential vector routes."""
         
         result = self.roadNetwork.find_potential_routes(stretchConstant, 
                                                      localOptimalityConstant, 
                                                      acceptionFactor,
-                                                     rejectionFactor)
+                                                     rejectionFactor,
+                                                     outputDirectory)
         
         routeLengths, inspectedRoutes, stationCombinations = result
         routeParameters = (stretchConstant, localOptimalityConstant, 
@@ -1770,25 +1925,31 @@ class HybridVectorModel(HierarchichalPrinter):
         toArr = surveyData["toID"]
         timeArr = surveyData["time"]
         relevantArr = surveyData["relevant"]
-        sourceIndices = self.roadNetwork.sourceIDToSourceIndex
-        sinkIndices = self.roadNetwork.sinkIDToSinkIndex
+        
+        l = self.roadNetwork._DESTINATION_SOURCE_LABEL if self.destinationToDestination else b''
+        L = self.roadNetwork._DESTINATION_SINK_LABEL
+        
+        # look up the indices of all stations, origins, and destinations at 
+        # once; unknown IDs are marked with -1
+        stationIndexArr = self.roadNetwork.stationIDToStationIndex.get_codes(
+                                                            stationArr).tolist()
+        fromIndexArr = self.roadNetwork.sourceIDToSourceIndex.get_codes(
+                                            np.char.add(l, fromArr)).tolist()
+        toIndexArr = self.roadNetwork.sinkIDToSinkIndex.get_codes(
+                                            np.char.add(L, toArr)).tolist()
         
         a = surveyData[["stationID", "dayID", "shiftStart", "shiftEnd"]]
         b = np.roll(a, -1)
         newShift = ~((a == b) | ((a != a) & (b != b))) 
         newShift[-1] = True
         shiftStartIndex = 0
-        l = self.roadNetwork._DESTINATION_SOURCE_LABEL if self.destinationToDestination else b''
-        L = self.roadNetwork._DESTINATION_SINK_LABEL
         
         rejectedCount = 0
         acceptedCount = 0
         for shiftEndIndex in np.nonzero(newShift)[0]+1:
             obsdict = defaultdict(lambda: 0)
-            try:
-                stationIndex = self.roadNetwork.stationIDToStationIndex[
-                                                    stationArr[shiftStartIndex]]
-            except KeyError:
+            stationIndex = stationIndexArr[shiftStartIndex]
+            if stationIndex < 0:
                 shiftStartIndex = shiftEndIndex
                 continue
             
@@ -1877,8 +2038,10 @@ class HybridVectorModel(HierarchichalPrinter):
                     if not relevantArr[i]:
                         raise KeyError()
                     
-                    fromIndex = sourceIndices[l+fromArr[i]]
-                    toIndex = sinkIndices[L+toArr[i]]
+                    fromIndex = fromIndexArr[i]
+                    toIndex = toIndexArr[i]
+                    if fromIndex < 0 or toIndex < 0:
+                        raise KeyError()
                     
                     # comment, if not infested jursidictions shall be included
                     #if not self.destinationData[fromIndex]["infested"]:
@@ -2231,7 +2394,8 @@ class HybridVectorModel(HierarchichalPrinter):
     
     @staticmethod
     def _negLogLikelihood(parameters, routeChoiceParams, considered, pairIndices, 
-                          stationPairIndices, observedNoisePairs,
+                          stationPairIndices, stationPairIndptr, 
+                          observedNoisePairs,
                           routeProbabilities, 
                           stationRouteProbabilities,
                           stationIndices,
@@ -2259,6 +2423,10 @@ class HybridVectorModel(HierarchichalPrinter):
         q (prop. to 1-mean/variance): c1         #* D^d4
         Edge choice probability: (1-c2) * (sum(D_r^c3)/normalization) + c2*c4
         Probability to be off-route and observable: c2*c4
+        
+        The station data (stationPairIndices, stationRouteProbabilities) are
+        given as flat arrays over all (station, pair) combinations; the 
+        entries of station i are stationPairIndptr[i]:stationPairIndptr[i+1].
         """
         
         params = HybridVectorModel._convert_parameters_static(
@@ -2296,31 +2464,19 @@ class HybridVectorModel(HierarchichalPrinter):
         # Liekelihood associated with observations > 0 on expected routes
         likelihoodOnWays = np.sum(nbinom.logpmf(counts, k, qqm), 0)
         
-        for i, stPairIndices, sRP in zip(itercount(),
-                                         stationPairIndices, 
-                                         stationRouteProbabilities):
-            """
-            
-            stationRouteProbabilities = 
-            
-            x1 = sparsepowersum(pathLengths, c3)
-            x2 = normConstants[stPairIndices]
-            stationRouteProbabilities = np.add(np.multiply(np.divide(x1, x2, x2), (1-c2), x2),
-                        c2 * c4, x2)
-            """
-            qr = sRP * c1
-            ks = kMatrix[stPairIndices]
-            x4 = np.log(1-c1)-np.log((1-c1) + p_shift_mean * qr)
-            x4 *= ks
-            stationKs[i, 0] = np.sum(x4, 0)
-            
-            tmpFact = -qr / ((1-c1) + qr*p_shift_mean)
-            tmp = tmpFact.copy()
-            stationKs[i, 1] = np.sum(tmp * ks, 0)
-            for j in range(2, approximationNumber+1):
-                tmp *= tmpFact
-                stationKs[i, j] = np.sum(tmp * ks, 0)
-            kSumNotObserved[i] = np.sum(ks, 0)
+        # sums over the pairs of each station
+        qr = stationRouteProbabilities * c1
+        ks = kMatrix[stationPairIndices]
+        x4 = np.log(1-c1)-np.log((1-c1) + p_shift_mean * qr)
+        x4 *= ks
+        stationKs[:, 0] = pointer_sum(x4, stationPairIndptr)
+        
+        tmpFact = -qr / ((1-c1) + qr*p_shift_mean)
+        tmp = tmpFact.copy()
+        for j in range(1, approximationNumber+1):
+            stationKs[:, j] = pointer_sum(tmp * ks, stationPairIndptr)
+            tmp *= tmpFact
+        kSumNotObserved[:] = pointer_sum(ks, stationPairIndptr)
         
         shiftP_shiftAppr = shiftDataP_shift - p_shift_mean
         p_shiftAppr = p_shift - p_shift_mean
@@ -2476,14 +2632,19 @@ class HybridVectorModel(HierarchichalPrinter):
         likelihoodNotObservedOnWaysNegTmp = -qr*p_shiftAppr / ((1-c1)
                                                                + qr*p_shift_mean)
         likelihoodNotObservedOnWaysNeg += likelihoodNotObservedOnWaysNegTmp
+        shiftP_shiftApprPower = shiftP_shiftAppr
+        likelihoodNotObservedOnWaysNegPower = likelihoodNotObservedOnWaysNegTmp
         for j in range(2, approximationNumber+1):
-            shiftP_shiftAppr *= shiftP_shiftAppr
+            shiftP_shiftApprPower = shiftP_shiftApprPower * shiftP_shiftAppr
             likelihoodNotObservedOnWays += ag.sum(
-                shiftP_shiftAppr*stationKs[stationIndices, j] 
+                shiftP_shiftApprPower*stationKs[stationIndices, j] 
                 / j, 0
                 )
-            likelihoodNotObservedOnWaysNegTmp *= likelihoodNotObservedOnWaysNegTmp
-            likelihoodNotObservedOnWaysNeg += likelihoodNotObservedOnWaysNegTmp / j
+            likelihoodNotObservedOnWaysNegPower = (
+                likelihoodNotObservedOnWaysNegPower
+                * likelihoodNotObservedOnWaysNegTmp)
+            likelihoodNotObservedOnWaysNeg += (
+                likelihoodNotObservedOnWaysNegPower / j)
         likelihoodNotObservedOnWaysNeg = ag.sum(k*likelihoodNotObservedOnWaysNeg, 0)
         likelihoodNotObservedOnWays -= likelihoodNotObservedOnWaysNeg
         
@@ -2540,13 +2701,198 @@ class HybridVectorModel(HierarchichalPrinter):
         return result
 
 
+    @staticmethod
+    def _negLogLikelihood_partials(c1, kMatrix, routeChoiceParams, 
+                                   pairIndices, stationPairIndices, 
+                                   stationOfEntry, observedNoisePairs,
+                                   routeProbabilities, 
+                                   stationRouteProbabilities,
+                                   stationIndices,
+                                   p_shift, shiftDataP_shift, 
+                                   observedNoiseP_shift, p_shift_mean, 
+                                   entryShiftNumbers, 
+                                   entryShiftDeviationPowers,
+                                   stationNumber, approximationNumber,
+                                   counts, observedNoiseCounts): 
+        """
+        Returns the partial derivatives of the negative log-likelihood 
+        (see `_negLogLikelihood`) with respect to the parameter ``c1`` and 
+        the flattened mean factors ``kMatrix``.
+        
+        The likelihood depends on the traffic factor parameters only via
+        ``kMatrix``, and its second derivative with respect to ``kMatrix``
+        is diagonal. Therefore, all partial derivatives can be computed with
+        vectorized operations.
+        
+        Parameters
+        ----------
+        c1 : float
+            Converted parameter ``q``
+        kMatrix : double[]
+            Flattened mean factors of all origin-destination pairs
+        stationOfEntry : int[]
+            Station index of each (station, pair) entry in the flat arrays
+            ``stationPairIndices`` and ``stationRouteProbabilities``
+        entryShiftNumbers : double[]
+            Number of shifts conducted at the station of each entry
+        entryShiftDeviationPowers : double[][]
+            ``entryShiftDeviationPowers[e, j-1]`` is the sum of 
+            ``(p_shift-p_shift_mean)**j`` over the shifts conducted at the 
+            station of entry ``e``
+        stationNumber : int
+            Number of stations
+        
+        Returns
+        -------
+        dK : double[]
+            First derivatives with respect to ``kMatrix``
+        dc : float
+            First derivative with respect to ``c1``
+        dKK : double[]
+            Diagonal of the second derivatives with respect to ``kMatrix``
+        dKc : double[]
+            Mixed second derivatives with respect to ``kMatrix`` and ``c1``
+        dcc : float
+            Second derivative with respect to ``c1``
+        
+        """
+        c2, _, c4 = routeChoiceParams
+        size = kMatrix.size
+        a = 1-c1
+        
+        def log_share(u):
+            # derivatives of log(1-c1) - log(1-c1*u) with respect to c1
+            v = 1 - c1*u
+            w = u / v
+            return np.log(a)-np.log(v), w-1/a, w*w-1/(a*a)
+        
+        def log_complement(u):
+            # derivatives of log(c1) - log(1-c1*u) with respect to c1
+            w = u / (1-c1*u)
+            return w+1/c1, w*w-1/(c1*c1)
+        
+        def power_series(t, dt, ddt, coefficients):
+            # derivatives of sum_j coefficients[j-1] * t**j / j w.r.t. c1
+            result = np.zeros_like(t)
+            d1 = np.zeros_like(t)
+            d2 = np.zeros_like(t)
+            tPower = np.ones_like(t)
+            tPowerPrev = np.zeros_like(t)
+            for j in range(1, approximationNumber+1):
+                coeff = coefficients[:, j-1]
+                d2 += coeff * ((j-1)*tPowerPrev*dt*dt + tPower*ddt)
+                d1 += coeff * tPower * dt
+                tPowerPrev = tPower
+                tPower = tPower * t
+                result += coeff * tPower / j
+            return result, d1, d2
+        
+        def series_terms(q, u):
+            # t = -c1*q/(1-c1*u) and its derivatives with respect to c1
+            v = 1 - c1*u
+            return -c1*q/v, -q/(v*v), -2*q*u/(v*v*v)
+        
+        dK = np.zeros(size)
+        dKK = np.zeros(size)
+        dKc = np.zeros(size)
+        
+        # observations > 0 on expected routes
+        k = kMatrix[pairIndices]
+        u = 1 - routeProbabilities*p_shift
+        l0, l1, l2 = log_share(u)
+        m1, m2 = log_complement(u)
+        dK += np.bincount(pairIndices, digamma(counts+k) - digamma(k) + l0, 
+                          size)
+        dKK += np.bincount(pairIndices, 
+                           polygamma(1, counts+k) - polygamma(1, k), size)
+        dKc += np.bincount(pairIndices, l1, size)
+        dc = np.sum(k*l1 + counts*m1)
+        dcc = np.sum(k*l2 + counts*m2)
+        
+        # observations on not expected routes. The terms k*log(qq3m) 
+        # cancel out with the corresponding terms of the rest ways
+        k2 = kMatrix[observedNoisePairs]
+        m1, m2 = log_complement(1 - (c2*c4)*observedNoiseP_shift)
+        dK += np.bincount(observedNoisePairs, 
+                          digamma(observedNoiseCounts+k2) - digamma(k2), size)
+        dKK += np.bincount(observedNoisePairs, 
+                           polygamma(1, observedNoiseCounts+k2) 
+                           - polygamma(1, k2), size)
+        dc += np.sum(observedNoiseCounts*m1)
+        dcc += np.sum(observedNoiseCounts*m2)
+        
+        # observations = 0 on not expected routes
+        l0, l1, l2 = log_share(1 - (c2*c4)*shiftDataP_shift)
+        w0, w1, w2 = (np.bincount(stationIndices, l, stationNumber
+                                  )[stationOfEntry] for l in (l0, l1, l2))
+        kSum = np.sum(kMatrix)
+        ks = kMatrix[stationPairIndices]
+        dK += np.sum(l0) - np.bincount(stationPairIndices, w0, size)
+        dKc += np.sum(l1) - np.bincount(stationPairIndices, w1, size)
+        dc += np.sum(l1)*kSum - np.sum(ks*w1)
+        dcc += np.sum(l2)*kSum - np.sum(ks*w2)
+        
+        # observations = 0 on expected routes
+        u = 1 - p_shift_mean*stationRouteProbabilities
+        l0, l1, l2 = log_share(u)
+        t0, t1, t2 = power_series(*series_terms(stationRouteProbabilities, u), 
+                                  entryShiftDeviationPowers)
+        dK += np.bincount(stationPairIndices, entryShiftNumbers*l0 + t0, size)
+        g1 = entryShiftNumbers*l1 + t1
+        dKc += np.bincount(stationPairIndices, g1, size)
+        dc += np.sum(ks*g1)
+        dcc += np.sum(ks*(entryShiftNumbers*l2 + t2))
+        
+        # correction for the observations that were actually made
+        u = 1 - p_shift_mean*routeProbabilities
+        l0, l1, l2 = log_share(u)
+        t, dt, ddt = series_terms(routeProbabilities, u)
+        shiftDeviations = p_shift - p_shift_mean
+        t0, t1, t2 = power_series(t*shiftDeviations, dt*shiftDeviations, 
+                                  ddt*shiftDeviations, 
+                                  np.ones((t.size, approximationNumber)))
+        dK -= np.bincount(pairIndices, l0 + t0, size)
+        dKc -= np.bincount(pairIndices, l1 + t1, size)
+        dc -= np.sum(k*(l1+t1))
+        dcc -= np.sum(k*(l2+t2))
+        
+        return -dK, -dc, -dKK, -dKc, -dcc
+    
     @staticmethod
     def _get_nLL_funs(extrapolateCountData, trafficFactorModel,
                       routeChoiceParams, complianceRate, properDataRate,
-                      considered, approximationNumber=3):
-        if considered is None:
-            considered = np.ones(20, dtype=bool)
+                      considered, approximationNumber=3, 
+                      analyticDerivatives=False):
+        """
+        Returns the negative log-likelihood function, its autograd version,
+        its gradient, its Hessian, and a Hessian-vector product function
+        (``None`` if the derivatives are computed with autograd).
+        
+        If ``analyticDerivatives`` is ``True``, the derivatives with respect
+        to ``c1`` and the mean factors are computed analytically (see 
+        `_negLogLikelihood_partials`). Only the traffic factor model is then
+        differentiated with autograd, which avoids tracing the complete
+        likelihood function.
+        """
+        nLLData = HybridVectorModel._get_nLL_data(extrapolateCountData, 
+                                                  routeChoiceParams, 
+                                                  complianceRate, 
+                                                  properDataRate)
+        return HybridVectorModel._get_nLL_funs_from_data(
+            trafficFactorModel, routeChoiceParams, considered, 
+            approximationNumber, analyticDerivatives, *nLLData)
+    
+    @staticmethod
+    def _get_nLL_data(extrapolateCountData, routeChoiceParams, complianceRate, 
+                      properDataRate):
+        """
+        Returns the arrays the likelihood functions are computed from (see 
+        `_get_nLL_funs_from_data`). 
         
+        The route probabilities are precomputed here, and the station data 
+        are flattened. Hence, all returned objects are plain numpy arrays 
+        that can be placed in shared memory.
+        """
         fullCountData = extrapolateCountData["fullCountData"]
         consideredPathLengths = extrapolateCountData["consideredPathLengths"] 
         observedNoiseData = extrapolateCountData["observedNoiseData"] 
@@ -2564,14 +2910,7 @@ class HybridVectorModel(HierarchichalPrinter):
         observedNoiseP_shift = observedNoiseData["p_shift"] * complianceRate * properDataRate
         observedNoiseCounts = observedNoiseData["count"]
         observedNoisePairs = observedNoiseData["pairIndex"]
-        p_shift_mean = np.mean(shiftDataP_shift)
         stationNumber = stationPairIndices.size
-        stationKs = np.zeros((stationNumber, approximationNumber+1))
-        kSumNotObserved = np.zeros(stationNumber)
-        
-        _negLogLikelihood = HybridVectorModel._negLogLikelihood
-        _negLogLikelihood_autograd = HybridVectorModel._negLogLikelihood_autograd
-        
         
         c2, c3, c4 = routeChoiceParams
         
@@ -2591,12 +2930,58 @@ class HybridVectorModel(HierarchichalPrinter):
                                    (1-c2), x2), c2 * c4, x2)
                 )
         
+        # flat (station, pair) layout for the vectorized likelihood
+        stationPairIndptr = np.zeros(stationNumber+1, dtype=np.int64)
+        np.cumsum([len(stPairIndices) for stPairIndices in stationPairIndices],
+                  out=stationPairIndptr[1:])
+        flatStationPairIndices = np.concatenate(
+            [np.zeros(0, dtype=int)] + list(stationPairIndices))
+        flatStationRouteProbabilities = np.concatenate(
+            [np.zeros(0)] + stationRouteProbabilities)
+        
+        return [pairIndices, flatStationPairIndices, stationPairIndptr, 
+                observedNoisePairs, routeProbabilities, 
+                flatStationRouteProbabilities, stationIndices, p_shift, 
+                shiftDataP_shift, observedNoiseP_shift, counts, 
+                observedNoiseCounts]
+    
+    @staticmethod
+    def _get_nLL_funs_from_data(trafficFactorModel, routeChoiceParams, 
+                                considered, approximationNumber, 
+                                analyticDerivatives, pairIndices, 
+                                flatStationPairIndices, stationPairIndptr, 
+                                observedNoisePairs, routeProbabilities, 
+                                flatStationRouteProbabilities, stationIndices, 
+                                p_shift, shiftDataP_shift, 
+                                observedNoiseP_shift, counts, 
+                                observedNoiseCounts):
+        """
+        Same as `_get_nLL_funs`, but takes the arrays returned by 
+        `_get_nLL_data` instead of the raw count data.
+        """
+        if considered is None:
+            considered = np.ones(20, dtype=bool)
+        
+        p_shift_mean = np.mean(shiftDataP_shift)
+        stationNumber = stationPairIndptr.size - 1
+        stationKs = np.zeros((stationNumber, approximationNumber+1))
+        kSumNotObserved = np.zeros(stationNumber)
+        
+        # per-station views for the autograd version
+        stationPairIndices = np.split(flatStationPairIndices, 
+                                      stationPairIndptr[1:-1])
+        stationRouteProbabilities = np.split(flatStationRouteProbabilities, 
+                                             stationPairIndptr[1:-1])
+        
+        _negLogLikelihood = HybridVectorModel._negLogLikelihood
+        _negLogLikelihood_autograd = HybridVectorModel._negLogLikelihood_autograd
+        _negLogLikelihood_partials = HybridVectorModel._negLogLikelihood_partials
         
         def negLogLikelihood(params): 
             return _negLogLikelihood(params, routeChoiceParams, considered, 
-                   pairIndices, stationPairIndices, 
+                   pairIndices, flatStationPairIndices, stationPairIndptr,
                    observedNoisePairs, routeProbabilities, 
-                   stationRouteProbabilities, stationIndices, p_shift, 
+                   flatStationRouteProbabilities, stationIndices, p_shift, 
                    shiftDataP_shift, observedNoiseP_shift, p_shift_mean, 
                    stationKs, kSumNotObserved, 
                    approximationNumber, counts, observedNoiseCounts, 
@@ -2612,19 +2997,84 @@ class HybridVectorModel(HierarchichalPrinter):
                    observedNoiseCounts, trafficFactorModel,
                    convertParameters=convertParameters)
         
-        jac = grad(negLogLikelihood_autograd)
-        hess = hessian(negLogLikelihood_autograd)
-
-        return negLogLikelihood, negLogLikelihood_autograd, jac, hess, None
+        if not analyticDerivatives:
+            jac = grad(negLogLikelihood_autograd)
+            hess = hessian(negLogLikelihood_autograd)
+            return negLogLikelihood, negLogLikelihood_autograd, jac, hess, None
+        
+        # shift data aggregated for each (station, pair) entry
+        stationOfEntry = np.repeat(np.arange(stationNumber), 
+                                   np.diff(stationPairIndptr))
+        shiftDeviations = shiftDataP_shift - p_shift_mean
+        entryShiftNumbers = np.bincount(stationIndices, 
+                                        minlength=stationNumber
+                                        )[stationOfEntry].astype(float)
+        entryShiftDeviationPowers = np.array([
+            np.bincount(stationIndices, np.power(shiftDeviations, j), 
+                        stationNumber) 
+            for j in range(1, approximationNumber+1)]).T[stationOfEntry]
+        
+        def get_c1_and_k(params, convertParameters=True):
+            if convertParameters:
+                params = HybridVectorModel._convert_parameters_static(
+                                    params, considered, trafficFactorModel)
+            kMatrix = HybridVectorModel._get_k_value_autograd_static(
+                        params, considered, trafficFactorModel)
+            return params[1], kMatrix.reshape((kMatrix.size,))
+        
+        def get_partials(params, convertParameters):
+            c1, kMatrix = get_c1_and_k(params, convertParameters)
+            return c1, kMatrix, _negLogLikelihood_partials(c1, kMatrix, 
+                   routeChoiceParams, pairIndices, flatStationPairIndices, 
+                   stationOfEntry, observedNoisePairs, routeProbabilities, 
+                   flatStationRouteProbabilities, stationIndices, p_shift, 
+                   shiftDataP_shift, observedNoiseP_shift, p_shift_mean, 
+                   entryShiftNumbers, entryShiftDeviationPowers, 
+                   stationNumber, approximationNumber, counts, 
+                   observedNoiseCounts)
+        
+        # The second order Taylor expansion of the likelihood with respect
+        # to c1 and the mean factors has the same first and second 
+        # derivatives as the likelihood at the expansion point. Hence, only 
+        # the traffic factor model needs to be differentiated with autograd.
+        def get_taylor_expansion(params, convertParameters, order):
+            c10, kMatrix0, (dK, dc, dKK, dKc, dcc) = get_partials(
+                                                params, convertParameters)
+            def taylorExpansion(params):
+                c1, kMatrix = get_c1_and_k(params, convertParameters)
+                result = ag.sum(dK*kMatrix) + dc*c1
+                if order < 2:
+                    return result
+                kDiff = kMatrix - kMatrix0
+                cDiff = c1 - c10
+                return (result + 0.5*ag.sum(dKK*kDiff*kDiff) 
+                        + 0.5*dcc*cDiff*cDiff + cDiff*ag.sum(dKc*kDiff))
+            return taylorExpansion
+        
+        def jac(params, convertParameters=True):
+            return grad(get_taylor_expansion(params, convertParameters, 1)
+                        )(params)
+        
+        def hess(params, convertParameters=True):
+            return hessian(get_taylor_expansion(params, convertParameters, 2)
+                           )(params)
+        
+        def hessp(params, vector, convertParameters=True):
+            return hessian_vector_product(
+                get_taylor_expansion(params, convertParameters, 2)
+                )(params, vector)
+        
+        return negLogLikelihood, negLogLikelihood_autograd, jac, hess, hessp
     
     def maximize_log_likelihood(self, considered=None, approximationNumber=3,
-                                flowParameters=None, x0=None):
+                                flowParameters=None, x0=None, 
+                                analyticDerivatives=False):
         routeChoiceParameters = self.routeModel["routeChoiceModel"].parameters
         
         return HybridVectorModel.maximize_log_likelihood_static(
                 self.routeModel, self.trafficFactorModel, routeChoiceParameters,
                 self.complianceRate, self.properDataRate, considered, 
-                approximationNumber, flowParameters, x0)
+                approximationNumber, flowParameters, x0, analyticDerivatives)
     
     @staticmethod
     def maximize_log_likelihood_static(extrapolateCountData,
@@ -2635,7 +3085,8 @@ class HybridVectorModel(HierarchichalPrinter):
                                        considered, 
                                        approximationNumber=3,
                                        flowParameters=None,
-                                       x0=None):
+                                       x0=None,
+                                       analyticDerivatives=False):
                  
         negLogLikelihood, negLogLikelihood_autograd, jac, hess, hessp = \
                 HybridVectorModel._get_nLL_funs(extrapolateCountData, 
@@ -2644,7 +3095,8 @@ class HybridVectorModel(HierarchichalPrinter):
                                                       complianceRate,
                                                       properDataRate,
                                                       considered, 
-                                                      approximationNumber)
+                                                      approximationNumber,
+                                                      analyticDerivatives)
         
         
         if flowParameters is None:
@@ -2947,16 +3399,20 @@ class HybridVectorModel(HierarchichalPrinter):
                                        properDataRate,
                                        considered, 
                                        approximationNumber=3,
+                                       analyticDerivatives=False,
                                        **optim_args):
         
+        # the objective is built once per worker from data in shared memory
+        nLLData = HybridVectorModel._get_nLL_data(extrapolateCountData, 
+                                                  routeChoiceParams, 
+                                                  complianceRate, 
+                                                  properDataRate)
+        const_args = [trafficFactorModel, routeChoiceParams, considered, 
+                      approximationNumber, analyticDerivatives]
+        
         negLogLikelihood, negLogLikelihood_autograd, jac, hess, hessp = \
-                HybridVectorModel._get_nLL_funs(extrapolateCountData, 
-                                                      trafficFactorModel, 
-                                                      routeChoiceParams,
-                                                      complianceRate,
-                                                      properDataRate,
-                                                      considered, 
-                                                      approximationNumber) 
+                HybridVectorModel._get_nLL_funs_from_data(*const_args, 
+                                                          *nLLData) 
         
         self.prst("Investigating the profile likelihood")
         
@@ -2975,27 +3431,28 @@ class HybridVectorModel(HierarchichalPrinter):
         
         labels = ["c0", "q"] + list(self.trafficFactorModel.LABELS[considered[2:]])
         
-        indices, directions = zip(*iterproduct(range(dim), (-1, 1)))
-        
-        inspectedRoutes = extrapolateCountData["inspectedRoutes"]
-        del extrapolateCountData["inspectedRoutes"]
-        
-        const_args = [extrapolateCountData, trafficFactorModel, 
-                      routeChoiceParams, self.complianceRate, self.properDataRate,
-                      considered]
+        # iteration counts of previous runs determine the task order
+        profileIterations = self.__dict__.setdefault("_profileIterations", {})
+        iterationKey = tuple(considered)
+        nit0 = profileIterations.get(iterationKey)
+        if nit0 is not None and nit0.shape != (dim, 2):
+            nit0 = None
+        nit = np.full((dim, 2), np.nan)
         
         self.prst("Creating confidence intervals")
-        #try: #, max_workers=13
-        with ProcessPoolExecutor(const_args=const_args) as pool:
-            mapObj = pool.map(HybridVectorModel._find_profile_CI_static, 
-                              indices, repeat(x0), directions, 
-                              repeat(approximationNumber), repeat(optim_args))
-            
-            
-            for index, direction, r in zip(indices, directions, mapObj):
-                result[index][(0 if direction==-1 else 1)
-                              ] = np.array(self._convert_parameters(r.x, 
+        self.increase_print_level()
+        for index, direction, r in find_profile_CI_bounds(
+                x0, HybridVectorModel._get_profile_nLL_funs_static, 
+                const_args, nLLData, nit0=nit0, **optim_args):
+            column = int(direction==1)
+            result[index][column] = np.array(self._convert_parameters(r.x, 
                                         considered))[considered][index]
+            nit[index][column] = r.nit
+            self.prst("{} bound for {}: {} (nit={}, nfev={}, njev={}, nhev={})".format(
+                ("Lower", "Upper")[column], labels[index], 
+                result[index][column], r.nit, r.nfev, r.njev, r.nhev))
+        self.decrease_print_level()
+        profileIterations[iterationKey] = nit
         
         self.prst("Printing confidence intervals and creating profile plots")
         self.increase_print_level()
@@ -3014,36 +3471,27 @@ class HybridVectorModel(HierarchichalPrinter):
                 labels[index], *strs))
             
         self.decrease_print_level()
-        
-        extrapolateCountData["inspectedRoutes"] = inspectedRoutes
         self.decrease_print_level()
     
     @staticmethod
-    def _find_profile_CI_static(extrapolateCountData, 
-                                trafficFactorModel, routeChoiceParams,
-                                complianceRate,
-                                properDataRate,
-                                considered, 
-                                index, x0, direction,
-                                approximationNumber=3, 
-                                profile_LL_args={}):
+    def _get_profile_nLL_funs_static(trafficFactorModel, routeChoiceParams,
+                                     considered, approximationNumber, 
+                                     analyticDerivatives, *nLLData):
                  
         
         negLogLikelihood, negLogLikelihood_autograd, jac, hess, hessp = \
-                HybridVectorModel._get_nLL_funs(extrapolateCountData, 
-                                                      trafficFactorModel, 
-                                                      routeChoiceParams,
-                                                      complianceRate,
-                                                      properDataRate,
-                                                      considered, 
-                                                      approximationNumber) 
+                HybridVectorModel._get_nLL_funs_from_data(trafficFactorModel, 
+                                                          routeChoiceParams,
+                                                          considered, 
+                                                          approximationNumber,
+                                                          analyticDerivatives,
+                                                          *nLLData) 
         
         negLogLikelihood_autograd_ = lambda x: -negLogLikelihood_autograd(x)   
         jac_ = lambda x: -jac(x)   
         hess_ = lambda x: -hess(x)   
         
-        return find_profile_CI_bound(index, direction, x0, negLogLikelihood_autograd_, jac_, hess_, 
-                                     **profile_LL_args)
+        return negLogLikelihood_autograd_, jac_, hess_
     
     
     def fit_route_model(self, refit=False, guess=None, 
@@ -3108,7 +3556,7 @@ class HybridVectorModel(HierarchichalPrinter):
         
     def fit_flow_model(self, permutations=None, refit=False, 
                        flowParameters=None, continueFlowOptimization=False, 
-                       get_CI=True):
+                       get_CI=True, analyticDerivatives=False):
         
         self.prst("Fitting flow models.")
         self.increase_print_level()
@@ -3166,45 +3614,53 @@ class HybridVectorModel(HierarchichalPrinter):
                 x0 = repeat(None)
             
             # inspectedRoutes cannot be shared.
-            # Therefore, I copy it temporarily
-            inspectedRoutes = extrapolateCountData["inspectedRoutes"]
-            del extrapolateCountData["inspectedRoutes"]
-            
-            
-            const_args = [extrapolateCountData, self.trafficFactorModel,
-                          routeChoiceParams, self.complianceRate, self.properDataRate]
-            with ProcessPoolExecutor(const_args=const_args) as pool:
-                mapObj = pool.map(
-                        HybridVectorModel.maximize_log_likelihood_static,
-                        permutations,
-                        repeat(3),
-                        repeat(None),
-                        x0,
-                        chunksize=1)
-                
-                
-                for permutation, result in zip(permutations, mapObj):
-                    x, xOrig, nLL = result.x, result.xOriginal, result.fun
-                    AIC = 2 * (np.sum(permutation) + nLL)
-                    AICs.append(AIC)
-                    LLs.append(nLL)
-                    parameters.append(x)
-                    results.append(result)
-                    self.prst(permutation, "| AIC:", AIC, 
-                              x, xOrig)
-            extrapolateCountData["inspectedRoutes"] = inspectedRoutes
+            # Therefore, I remove it temporarily
+            inspectedRoutes = extrapolateCountData.pop("inspectedRoutes")
+            
+            pool = self._get_executor()
+            try:
+                with pool.registered("extrapolateCountData", 
+                                     extrapolateCountData) as dataHandle, \
+                        pool.registered(
+                            "trafficFactorModel", 
+                            self.trafficFactorModel) as factorHandle:
+                    const_args = [dataHandle, factorHandle, routeChoiceParams, 
+                                  self.complianceRate, self.properDataRate]
+                    mapObj = pool.map(
+                            HybridVectorModel.maximize_log_likelihood_static,
+                            permutations,
+                            repeat(3),
+                            repeat(None),
+                            x0,
+                            repeat(analyticDerivatives),
+                            const_args=const_args,
+                            chunksize=1)
+                    
+                    for permutation, result in zip(permutations, mapObj):
+                        x, xOrig, nLL = result.x, result.xOriginal, result.fun
+                        AIC = 2 * (np.sum(permutation) + nLL)
+                        AICs.append(AIC)
+                        LLs.append(nLL)
+                        parameters.append(x)
+                        results.append(result)
+                        self.prst(permutation, "| AIC:", AIC, 
+                                  x, xOrig)
+            finally:
+                extrapolateCountData["inspectedRoutes"] = inspectedRoutes
             fittedModel = True
         else:
             if continueFlowOptimization:
                 result = self.maximize_log_likelihood(
                                   flowParameters["covariates"], 
-                                  x0=flowParameters["paramters"])
+                                  x0=flowParameters["paramters"],
+                                  analyticDerivatives=analyticDerivatives)
                 parameters = [result.x]
                 fittedModel = True
             else:
                 result = self.maximize_log_likelihood(
                                   flowParameters["covariates"], 
-                                  flowParameters=flowParameters["paramters"])
+                                  flowParameters=flowParameters["paramters"],
+                                  analyticDerivatives=analyticDerivatives)
                 parameters = [flowParameters["paramters"]]
             nLL = result.fun
             LLs.append(nLL)
@@ -3236,6 +3692,8 @@ class HybridVectorModel(HierarchichalPrinter):
                                             self.complianceRate,
                                             self.properDataRate,
                                             covariates, 
+                                            analyticDerivatives=
+                                            analyticDerivatives,
                                             disp=True, vm=False)
                  
             
@@ -3330,16 +3788,27 @@ class HybridVectorModel(HierarchichalPrinter):
         
         self.increase_print_level()
         counter = Counter(len(stationIndices), 0.01)
-        const_args = [routeLengthsPowers, routeLengthsNorm, kMatrix, infested,
-                      q, constantTime, getStationResults, getPairResults] + \
-                     blinds
-        with ProcessPoolExecutor(const_args=const_args) as pool:
+        
+        # the arrays are sent to the workers once; all other arguments are 
+        # sent with each task
+        pool = self._get_executor()
+        arrayNames = ["routeLengthsPowers", "routeLengthsNorm", "kMatrix", 
+                      "infested", "q", "blindMeans", "blindVariances"]
+        with ExitStack() as registrations:
+            arrayHandles = [registrations.enter_context(
+                                pool.registered(name, arr)) 
+                            for name, arr in zip(arrayNames, (
+                                routeLengthsPowers, routeLengthsNorm, 
+                                kMatrix, infested, q, *blinds[:2]))]
+            const_args = arrayHandles[:5] + [constantTime, getStationResults, 
+                                             getPairResults] + \
+                         arrayHandles[5:] + blinds[2:]
             l = [(inspectedRoutes[ind] if ind in inspectedRoutes else {})
                   for ind in stationIndices]
             mapObj = pool.map(
                     HybridVectorModel._get_station_mean_variance_partial,
                     l, qqBase, factorBase, additionBase,
-                    chunksize=1)
+                    const_args=const_args, chunksize=1)
             
             for i, stationIndex, result in zip(itercount(), stationIndices, 
                                                mapObj):
@@ -5159,10 +5628,8 @@ class HybridVectorModel(HierarchichalPrinter):
         for data, name in zip(pairData, dtype["names"][2:]):
             result[name] = data.ravel()
             
-        fromID = self.roadNetwork.vertices.array["ID"][
-                                      self.roadNetwork.sourceIndexToVertexIndex]
-        toID = self.roadNetwork.vertices.array["ID"][
-                                      self.roadNetwork.sinkIndexToVertexIndex]
+        fromID = self.roadNetwork.sourceIndexToSourceID
+        toID = self.roadNetwork.sinkIndexToSinkID
         result["fromID"] = np.repeat(fromID, len(toID))
         result["toID"] = np.tile(toID, len(fromID))
         
@@ -5,7 +5,6 @@ Created on 21.06.2018
 '''
 from collections import defaultdict
 from copy import copy
-from itertools import product as iterproduct, repeat
 
 import numpy as np
 from scipy import optimize as op
@@ -16,8 +15,7 @@ from vemomoto_core.npcollections.npext import list_to_csr_matrix, \
     sparseprod, sparsepower, sparsesum, sparsesum_chosen_rows, \
     sparsesum_chosen_rows_fact, sparsesum_row_prod
 from vemomoto_core.npcollections.npextc import FlexibleArray
-from ci_rvm import find_profile_CI_bound
-from vemomoto_core.concurrent.concurrent_futures_ext import ProcessPoolExecutor
+from ci_rvm import find_profile_CI_bounds
 from vemomoto_core.tools.hrprint import HierarchichalPrinter
 
 class RouteChoiceModel(HierarchichalPrinter):
@@ -439,10 +437,9 @@ class RouteChoiceModel(HierarchichalPrinter):
         self.__fitted = True
     
     @staticmethod
-    def _find_profile_CI_static(observations, pairRoutes, pairDayData, 
-                                pairStationData, dayStationData, dayTimeFactors, 
-                                index, x0, direction,
-                                profile_LL_args={}):
+    def _get_profile_nLL_funtions_static(observations, pairRoutes, pairDayData, 
+                                         pairStationData, dayStationData, 
+                                         dayTimeFactors):
                  
         
         nLL, jac, hess = RouteChoiceModel._get_nLL_funtions_static(
@@ -453,8 +450,7 @@ class RouteChoiceModel(HierarchichalPrinter):
         jac_ = lambda x: -jac(x)   
         hess_ = lambda x: -hess(x)   
         
-        return find_profile_CI_bound(index, direction, x0, nLL_, jac_, hess_, 
-                                     **profile_LL_args)
+        return nLL_, jac_, hess_
     
     def get_confidence_intervals(self, fileName=None, show=True, **optim_args):
         
@@ -477,23 +473,27 @@ class RouteChoiceModel(HierarchichalPrinter):
         
         labels = np.array(self.VARIABLE_LABELS)
         
-        indices, directions = zip(*iterproduct(range(dim), (-1, 1)))
-        
         const_args = [self.observationData, self.pairRoutes, self. pairDayData,
                       self.pairStationData, self.dayStationData,
                       self.dayTimeFactors]
         
+        # iteration counts of previous runs determine the task order
+        nit0 = self.__dict__.get("_profileIterations")
+        nit = np.full((dim, 2), np.nan)
+        
         self.prst("Creating confidence intervals")
-        #try: #, max_workers=13
-        with ProcessPoolExecutor(const_args=const_args) as pool:
-            mapObj = pool.map(RouteChoiceModel._find_profile_CI_static, 
-                              indices, repeat(x0), directions, 
-                              repeat(optim_args))
-            
-            
-            for index, direction, r in zip(indices, directions, mapObj):
-                result[index][(0 if direction==-1 else 1)
-                              ] = self._convert_parameters(r.x)[index]
+        self.increase_print_level()
+        for index, direction, r in find_profile_CI_bounds(
+                x0, RouteChoiceModel._get_profile_nLL_funtions_static, 
+                const_args, nit0=nit0, **optim_args):
+            column = int(direction==1)
+            result[index][column] = self._convert_parameters(r.x)[index]
+            nit[index][column] = r.nit
+            self.prst("{} bound for {}: {} (nit={}, nfev={}, njev={}, nhev={})".format(
+                ("Lower", "Upper")[column], labels[index], 
+                result[index][column], r.nit, r.nfev, r.njev, r.nhev))
+        self.decrease_print_level()
+        self._profileIterations = nit
         
         self.prst("Printing confidence intervals:")
         self.increase_print_level()
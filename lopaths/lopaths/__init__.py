@@ -1 +1,2 @@
-from .graph import FastGraph, FlexibleGraph, FlowPointGraph
\ No newline at end of file
+from .graph import FastGraph, FlexibleGraph, FlowPointGraph, RouteStore, \
+    RouteQueryService
\ No newline at end of file
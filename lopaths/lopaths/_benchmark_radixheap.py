@@ -0,0 +1,59 @@
+'''
+Created on 18.10.2026
+
+@author: Samuel
+
+Compares the run time of FlowPointGraph.find_shortest_distance_array with
+the radix heap and the quick heap as priority queue on a random network.
+
+Usage: python _benchmark_radixheap.py [vertex number] [seed] [repetitions]
+'''
+import sys
+import time
+
+import numpy as np
+
+try:
+    from ._test_update_edges import create_network, create_graph
+except ImportError:
+    from _test_update_edges import create_network, create_graph
+
+def benchmark_radix_heap(vertexNumber=3000, seed=0, repetitions=3,
+                         methods=("one-to-many", "many-to-one")):
+    """Times the distance computation between all significant vertices for
+    both priority queues and checks that the distances agree. Returns a
+    dictionary mapping (method, radixHeap) to the minimal run time."""
+    
+    network = create_network(vertexNumber, seed=seed)
+    graph = create_graph(*network)
+    vertexIndices = np.nonzero(
+        graph.vertices.array["significant"][:graph.vertices.size])[0]
+    
+    print("Network with", graph.vertices.size, "vertices,",
+          graph.edges.size, "edges and", len(vertexIndices),
+          "significant vertices")
+    
+    times = {}
+    for method in methods:
+        distances = {}
+        for radixHeap in False, True:
+            runTimes = []
+            for _ in range(repetitions):
+                startTime = time.perf_counter()
+                distances[radixHeap] = graph.find_shortest_distance_array(
+                    vertexIndices, vertexIndices, method, radixHeap=radixHeap)
+                runTimes.append(time.perf_counter()-startTime)
+            times[method, radixHeap] = min(runTimes)
+        
+        assert np.array_equal(distances[False], distances[True])
+        print(method + ": quick heap {:.3f}s, radix heap {:.3f}s, "
+              "speedup {:.2f}".format(times[method, False],
+                                      times[method, True],
+                                      times[method, False]/times[method, True]))
+    
+    return times
+
+if __name__ == '__main__':
+    
+    arguments = [int(arg) for arg in sys.argv[1:]]
+    benchmark_radix_heap(*arguments)
@@ -17,6 +17,7 @@ import matplotlib.pyplot as plt
 import matplotlib as mpl
 
 from npext import add_fields
+from tablereader import read_table
 from graph_new import FlowPointGraph, FlexibleGraph
 #from propaguledispersal_corrected import IDTYPE
 IDTYPE = "|S11" 
@@ -263,17 +264,15 @@ class GraphTester(FlowPointGraph):
         
         self.prst("Reading file", fileNameEdges)
         
-        edges = np.genfromtxt(fileNameEdges, delimiter=",",  
-                              skip_header = True, 
-                              dtype = {"names":["ID", "from_to_original", 
-                                                "length", "inspection", 
-                                                "lakeID"], 
-                                       'formats':[IDTYPE, 
-                                                  '2' + IDTYPE, 
-                                                  "double", 
-                                                  "3" + IDTYPE, 
-                                                  IDTYPE]},
-                              autostrip = True)
+        edges = read_table(fileNameEdges, 
+                           dtype = {"names":["ID", "from_to_original", 
+                                             "length", "inspection", 
+                                             "lakeID"], 
+                                    'formats':[IDTYPE, 
+                                               '2' + IDTYPE, 
+                                               "double", 
+                                               "3" + IDTYPE, 
+                                               IDTYPE]})
         
         from_to = np.vstack((edges["from_to_original"], 
                              edges["from_to_original"][:,::-1]))
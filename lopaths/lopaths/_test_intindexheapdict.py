@@ -0,0 +1,139 @@
+'''
+Created on 18.10.2026
+
+@author: Samuel
+
+Compares intindexheapdict with a dictionary in random sequences of
+operations, including resets of the heap between searches.
+'''
+import sys
+
+import numpy as np
+
+from vemomoto_core.npcollections.intquickheapdict import intindexheapdict
+
+def check_equal(heap, reference):
+    assert len(heap) == len(reference)
+    assert dict(heap.items()) == reference
+    if reference:
+        key, priority = heap.peekitem()
+        assert priority == min(reference.values())
+        assert reference[key] == priority
+
+def test_random_operations(operationNumber=20000, keyNumber=100, seed=None):
+    """Applies random insertions, priority changes, deletions, pops and
+    resets to an intindexheapdict and a dictionary and checks that both
+    agree. Popped and deleted keys are inserted again frequently."""
+    
+    rng = np.random.RandomState(seed)
+    heap = intindexheapdict(keyNumber)
+    reference = {}
+    
+    for _ in range(operationNumber):
+        operation = rng.randint(20)
+        key = rng.randint(keyNumber)
+        priority = np.round(rng.rand(), 2)
+        
+        if operation < 8:
+            heap[key] = priority
+            reference[key] = priority
+        elif operation < 11:
+            if key in reference:
+                del heap[key]
+                del reference[key]
+            else:
+                try:
+                    del heap[key]
+                except KeyError:
+                    pass
+                else:
+                    raise AssertionError("Deleted missing key " + str(key))
+        elif operation < 16 and reference:
+            key, priority = heap.popitem()
+            assert priority == min(reference.values())
+            assert reference.pop(key) == priority
+        elif operation == 16:
+            # stale entries of the previous epoch must not be visible
+            heap.reset()
+            reference.clear()
+        else:
+            assert heap.get(key, -1.) == reference.get(key, -1.)
+            assert (key in heap) == (key in reference)
+            if key in reference:
+                assert heap[key] == reference[key]
+        
+        check_equal(heap, reference)
+    
+    print("Random operations with seed", seed, "passed.")
+
+def test_reset():
+    heap = intindexheapdict(5, ((1, 2.), (3, 1.), (4, 0.5)))
+    assert heap.popitem() == (4, 0.5)
+    
+    heap.reset()
+    assert not len(heap)
+    for key in range(5):
+        assert key not in heap
+        assert heap.get(key, -1.) == -1.
+    
+    # keys that were in the heap before the reset are inserted as new
+    heap[3] = 3.
+    heap[1] = 4.
+    heap[4] = 5.
+    assert len(heap) == 3
+    assert heap.popitem() == (3, 3.)
+    
+    # re-insert after pop
+    heap[3] = 0.1
+    assert heap.popitem() == (3, 0.1)
+    assert heap.popitem() == (1, 4.)
+    assert heap.popitem() == (4, 5.)
+    try:
+        heap.popitem()
+    except IndexError:
+        pass
+    else:
+        raise AssertionError("Popped from an empty heap")
+    print("Reset passed.")
+
+def test_out_of_range_keys():
+    heap = intindexheapdict(3, ((0, 1.),))
+    
+    for key in -1, 3, 100:
+        try:
+            heap[key] = 1.
+        except KeyError:
+            pass
+        else:
+            raise AssertionError("Inserted key " + str(key))
+        
+        try:
+            heap[key]
+        except KeyError:
+            pass
+        else:
+            raise AssertionError("Found key " + str(key))
+        
+        try:
+            del heap[key]
+        except KeyError:
+            pass
+        else:
+            raise AssertionError("Deleted key " + str(key))
+        
+        assert key not in heap
+        assert heap.get(key, -1.) == -1.
+    
+    # the unchecked setter is only available from Cython
+    assert not hasattr(heap, "setitem")
+    assert len(heap) == 1 and heap[0] == 1.
+    print("Out of range keys passed.")
+
+if __name__ == '__main__':
+    
+    seedNumber = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    
+    test_reset()
+    test_out_of_range_keys()
+    for seed in range(seedNumber):
+        test_random_operations(seed=seed)
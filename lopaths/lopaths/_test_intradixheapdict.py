@@ -0,0 +1,125 @@
+'''
+Created on 18.10.2026
+
+@author: Samuel
+
+Compares intradixheapdict with a dictionary in random sequences of
+operations as they occur in Dijkstra searches.
+'''
+import sys
+
+import numpy as np
+
+from vemomoto_core.npcollections.intradixheapdict import intradixheapdict
+
+def check_equal(heap, reference):
+    assert len(heap) == len(reference)
+    assert dict(heap.items()) == reference
+    if reference:
+        key, priority = heap.peekitem()
+        assert priority == min(reference.values())
+        assert reference[key] == priority
+
+def test_random_operations(operationNumber=20000, keyNumber=300,
+                           initSize=10, seed=None):
+    """Applies random insertions, priority changes, deletions and pops to
+    an intradixheapdict and a dictionary and checks that both agree.
+    Priorities are rounded partially, so that ties occur."""
+    
+    rng = np.random.RandomState(seed)
+    heap = intradixheapdict(initSize=initSize)
+    reference = {}
+    last = 0.
+    
+    for _ in range(operationNumber):
+        operation = rng.randint(5)
+        key = rng.randint(keyNumber)
+        priority = last + rng.exponential(rng.choice((0.01, 1, 100)))
+        if rng.rand() < 0.3:
+            priority = last + np.round(priority-last, 1)
+        
+        if operation <= 1:
+            # insertion or priority change (also increases)
+            heap[key] = priority
+            reference[key] = priority
+        elif operation == 2:
+            if key in reference:
+                del heap[key]
+                del reference[key]
+            else:
+                try:
+                    del heap[key]
+                except KeyError:
+                    pass
+                else:
+                    raise AssertionError("Deleted missing key " + str(key))
+        elif operation == 3 and reference:
+            key, priority = heap.popitem()
+            assert priority == min(reference.values())
+            assert reference.pop(key) == priority
+            last = priority
+        else:
+            assert heap.get(key, -1.) == reference.get(key, -1.)
+            assert (key in heap) == (key in reference)
+            if key in reference:
+                assert heap[key] == reference[key]
+        
+        check_equal(heap, reference)
+    
+    while reference:
+        key, priority = heap.popitem()
+        assert priority == min(reference.values())
+        assert reference.pop(key) == priority
+    
+    assert not len(heap)
+    print("Random operations with seed", seed, "passed.")
+
+def test_invalid_operations():
+    heap = intradixheapdict(((3, 1.), (5, 0.)), 4)
+    
+    for key, priority in ((-1, 1.), (2, np.nan)):
+        try:
+            heap[key] = priority
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("Inserted " + str((key, priority)))
+    
+    assert heap.popitem() == (5, 0.)
+    try:
+        heap[7] = -0.5
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("Inserted a priority below the last popped one")
+    
+    for key in -1, 4, 100:
+        assert heap.get(key, -1.) == -1.
+        try:
+            heap[key]
+        except KeyError:
+            pass
+        else:
+            raise AssertionError("Found missing key " + str(key))
+    
+    # -0. must be treated as 0.
+    heap = intradixheapdict()
+    heap[1] = 1.
+    heap[2] = -0.
+    assert heap.popitem() == (2, 0.)
+    assert heap.popitem() == (1, 1.)
+    try:
+        heap.popitem()
+    except IndexError:
+        pass
+    else:
+        raise AssertionError("Popped from an empty heap")
+    print("Invalid operations passed.")
+
+if __name__ == '__main__':
+    
+    seedNumber = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    
+    test_invalid_operations()
+    for seed in range(seedNumber):
+        test_random_operations(seed=seed)
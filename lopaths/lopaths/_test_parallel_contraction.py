@@ -0,0 +1,72 @@
+'''
+Created on 18.10.2026
+
+@author: Samuel
+
+Compares the preprocessing with parallel contraction of independent vertex
+sets with the serial preprocessing.
+'''
+import sys
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+
+try:
+    from .graph import FlowPointGraph, FlexibleGraph
+    from ._test_update_edges import create_network, find_distances, IDTYPE
+except ImportError:
+    from graph import FlowPointGraph, FlexibleGraph
+    from _test_update_edges import create_network, find_distances, IDTYPE
+
+def create_graph(vertexIDs, pairs, edgeIDs, lengths, vertexData,
+                 parallelContraction):
+    edgeData = np.zeros(len(pairs), dtype=[("ID", IDTYPE), ("length", float),
+                                           ("inspection", object)])
+    edgeData["ID"] = edgeIDs
+    edgeData["length"] = lengths
+    
+    graph = FlexibleGraph(vertexIDs[pairs], edgeData, vertexIDs.copy(),
+                          vertexData.copy(), replacementMode="shortest",
+                          lengthLabel="length")
+    graph = FlowPointGraph(graph, "length", "significant")
+    graph.set_silent_status(True)
+    graph.preprocessing(0.1, 3, 4, expansionBounds=(2,2,3),
+                        maxEdgeLength=np.inf, 
+                        parallelContraction=parallelContraction)
+    return graph
+
+def test_parallel_contraction(vertexNumber=400, seed=None):
+    """Checks that the distances between all significant vertices agree 
+    for the serial and the parallel preprocessing and with the distances
+    in the original network."""
+    
+    vertexIDs, pairs, edgeIDs, lengths, vertexData = create_network(
+                                        vertexNumber=vertexNumber, seed=seed)
+    significantIDs = vertexIDs[vertexData["significant"]]
+    
+    distances = [find_distances(create_graph(vertexIDs, pairs, edgeIDs, 
+                                             lengths, vertexData, parallel), 
+                                significantIDs, "pairwise")
+                 for parallel in (False, True)]
+    
+    significantIndices = np.nonzero(vertexData["significant"])[0]
+    significantIndices = significantIndices[np.argsort(significantIDs)]
+    matrix = csr_matrix((lengths, (pairs[:,0], pairs[:,1])), 
+                        shape=(vertexNumber, vertexNumber))
+    expected = dijkstra(matrix, indices=significantIndices)[:, 
+                                                        significantIndices]
+    
+    for name, dists in zip(("serial", "parallel"), distances):
+        mismatches = np.sum(~np.isclose(dists, expected))
+        print(name, "contraction with seed", seed, "mismatches", mismatches, 
+              "out of", dists.size)
+        assert not mismatches
+    assert np.allclose(*distances)
+
+if __name__ == '__main__':
+    
+    seedNumber = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    
+    for seed in range(seedNumber):
+        test_parallel_contraction(seed=seed)
@@ -0,0 +1,171 @@
+'''
+Created on 18.10.2026
+
+@author: Samuel
+
+Compares FlowPointGraph.update_edges with a fresh preprocessing of the
+network with the changed edge lengths.
+'''
+import sys
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+
+try:
+    from .graph import FlowPointGraph, FlexibleGraph
+except ImportError:
+    from graph import FlowPointGraph, FlexibleGraph
+
+IDTYPE = "|S11"
+
+def create_network(vertexNumber=300, neighborNumber=3, seed=None):
+    """Creates a random planar-like network connecting each vertex with its
+    nearest neighbors in both directions. Returns the vertex IDs, the
+    edge end points, the edge IDs, the edge lengths and the vertex data."""
+    
+    rng = np.random.RandomState(seed)
+    points = rng.rand(vertexNumber, 2)
+    distances = np.sqrt(((points[:,None]-points[None])**2).sum(2))
+    
+    pairs = set()
+    for i, row in enumerate(distances):
+        for j in np.argsort(row)[1:neighborNumber+1]:
+            pairs.add((i, j))
+            pairs.add((j, i))
+    pairs = np.array(sorted(pairs))
+    
+    vertexIDs = np.array([str(i).encode() for i in range(vertexNumber)],
+                         dtype=IDTYPE)
+    edgeIDs = np.array([str(i).encode() for i in range(len(pairs))],
+                       dtype=IDTYPE)
+    lengths = distances[pairs[:,0], pairs[:,1]] * (1+0.1*rng.rand(len(pairs)))
+    
+    vertexData = np.zeros(vertexNumber, dtype=[("significant", bool)])
+    vertexData["significant"][rng.choice(vertexNumber, vertexNumber//6,
+                                         replace=False)] = True
+    
+    return vertexIDs, pairs, edgeIDs, lengths, vertexData
+
+def create_graph(vertexIDs, pairs, edgeIDs, lengths, vertexData,
+                 initialBound=0.2, maxEdgeLength=np.inf):
+    edgeData = np.zeros(len(pairs), dtype=[("ID", IDTYPE), ("length", float),
+                                           ("inspection", object)])
+    edgeData["ID"] = edgeIDs
+    edgeData["length"] = lengths
+    
+    graph = FlexibleGraph(vertexIDs[pairs], edgeData, vertexIDs.copy(),
+                          vertexData.copy(), replacementMode="shortest",
+                          lengthLabel="length")
+    graph = FlowPointGraph(graph, "length", "significant")
+    graph.set_silent_status(True)
+    graph.preprocessing(initialBound, 3, 4, expansionBounds=(2,2,3),
+                        maxEdgeLength=maxEdgeLength)
+    return graph
+
+def find_distances(graph, vertexIDs, method="auto"):
+    graphIDs = graph.vertices.array["ID"][:graph.vertices.size]
+    vertexIndices = np.nonzero(np.isin(graphIDs, vertexIDs))[0]
+    vertexIndices = vertexIndices[np.argsort(graphIDs[vertexIndices])]
+    return graph.find_shortest_distance_array(vertexIndices, vertexIndices,
+                                              method)
+
+def find_reaches(vertexNumber, pairs, lengths):
+    """Computes the reaches of all vertices in the original network by 
+    searching the shortest path trees of all vertices."""
+    matrix = csr_matrix((lengths, (pairs[:,0], pairs[:,1])), 
+                        shape=(vertexNumber, vertexNumber))
+    distances, predecessors = dijkstra(matrix, return_predecessors=True)
+    reaches = np.zeros(vertexNumber)
+    for rootDistances, parents in zip(distances, predecessors):
+        # maximal distance of the vertices in the subtree of each vertex
+        heights = rootDistances.copy()
+        for vertexIndex in np.argsort(rootDistances)[::-1]:
+            parent = parents[vertexIndex]
+            if parent >= 0:
+                heights[parent] = max(heights[parent], heights[vertexIndex])
+        reachable = rootDistances < np.inf
+        reaches[reachable] = np.maximum(reaches[reachable], np.minimum(
+                rootDistances, heights-rootDistances)[reachable])
+    return reaches
+
+def test_update_edges(factors, changeNumber=30, repetitions=3, seed=None):
+    """Changes the lengths of randomly chosen edges repeatedly by the given
+    factors and checks the distances between the significant vertices
+    against a graph that is preprocessed from scratch."""
+    
+    vertexIDs, pairs, edgeIDs, lengths, vertexData = create_network(
+                                                                seed=seed)
+    rng = np.random.RandomState(seed)
+    graph = create_graph(vertexIDs, pairs, edgeIDs, lengths, vertexData)
+    significantIDs = vertexIDs[vertexData["significant"]]
+    
+    for _ in range(repetitions):
+        changed = rng.choice(len(pairs), changeNumber, replace=False)
+        lengths = lengths.copy()
+        lengths[changed] *= rng.choice(factors, changeNumber)
+        graph.update_edges(edgeIDs[changed], lengths[changed])
+        
+        newGraph = create_graph(vertexIDs, pairs, edgeIDs, lengths,
+                                vertexData)
+        distances = find_distances(graph, significantIDs)
+        expected = find_distances(newGraph, significantIDs)
+        
+        mismatches = np.sum(~np.isclose(distances, expected))
+        print("factors", factors, "mismatches", mismatches, "out of",
+              distances.size)
+        assert not mismatches
+
+def test_distant_reach_change(seed=None, maxEdgeLength=0.1, minDistance=0.25):
+    """Shortens an unused edge between the most distant vertices of the 
+    network, which changes the reach of vertices far away from the edge,
+    and checks the pairwise distances between the significant vertices 
+    against a graph that is preprocessed from scratch."""
+    
+    vertexIDs, pairs, edgeIDs, lengths, vertexData = create_network(
+                                                                seed=seed)
+    vertexNumber = vertexIDs.size
+    matrix = csr_matrix((lengths, (pairs[:,0], pairs[:,1])), 
+                        shape=(vertexNumber, vertexNumber))
+    distances = dijkstra(matrix)
+    distances[np.isinf(distances)] = 0
+    fromIndex, toIndex = np.unravel_index(np.argmax(distances), 
+                                          distances.shape)
+    
+    pairs = np.vstack((pairs, [(fromIndex, toIndex)]))
+    edgeIDs = np.append(edgeIDs, np.array(b"new", dtype=IDTYPE))
+    lengths = np.append(lengths, 10*distances[fromIndex, toIndex])
+    newLengths = lengths.copy()
+    newLengths[-1] = 0.01
+    
+    # make sure that the reach of a distant vertex changes
+    oldReaches = find_reaches(vertexNumber, pairs, lengths)
+    newReaches = find_reaches(vertexNumber, pairs, newLengths)
+    undirectedDistances = dijkstra(matrix, directed=False, 
+                                   indices=[fromIndex, toIndex]).min(0)
+    assert np.any((newReaches > oldReaches) 
+                  & (undirectedDistances > minDistance))
+    
+    graph = create_graph(vertexIDs, pairs, edgeIDs, lengths, vertexData,
+                         maxEdgeLength=maxEdgeLength)
+    graph.update_edges(edgeIDs[-1:], newLengths[-1:])
+    newGraph = create_graph(vertexIDs, pairs, edgeIDs, newLengths, 
+                            vertexData, maxEdgeLength=maxEdgeLength)
+    
+    significantIDs = vertexIDs[vertexData["significant"]]
+    distances = find_distances(graph, significantIDs, "pairwise")
+    expected = find_distances(newGraph, significantIDs, "pairwise")
+    mismatches = np.sum(~np.isclose(distances, expected))
+    print("distant reach change", "mismatches", mismatches, "out of",
+          distances.size)
+    assert not mismatches
+
+if __name__ == '__main__':
+    
+    seedNumber = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    
+    for seed in range(seedNumber):
+        test_distant_reach_change(seed=seed)
+        test_update_edges([0.5], seed=seed)
+        test_update_edges([3, 10], seed=seed)
+        test_update_edges([0.3, 3, 10], seed=seed)
@@ -4,11 +4,14 @@ Created on 05.07.2016
 @author: Samuel
 '''
 from functools import partial
+from contextlib import nullcontext, ExitStack
 from itertools import product as iterproduct, repeat, starmap, count as itercount
 from itertools import chain as iterchain
 import warnings
-from collections import deque, defaultdict
+from collections import deque, defaultdict, OrderedDict
 import os
+import hashlib
+import tempfile
 import copy as cp
 from copy import deepcopy
 from multiprocessing import Pool, Queue, Manager, Array
@@ -24,33 +27,44 @@ from concurrent.futures import ProcessPoolExecutor
 
 import numpy as np
 import numpy.lib.recfunctions as rfn
+from scipy.sparse import csr_matrix
 import sharedmem
 
 from vemomoto_core.npcollections.FixedOrderedIntDict import FixedOrderedIntDict
 from vemomoto_core.npcollections.intquickheapdict import intquickheapdict
+from vemomoto_core.npcollections.intradixheapdict import intradixheapdict
 from vemomoto_core.npcollections.npextc import FlexibleArray, FlexibleArrayDict, \
     unique_tol, find_next_nonzero2d
 from vemomoto_core.npcollections.npext import fields_view, add_alias, add_names, \
-    FlexibleArrayDict as FlexibleArrayDictO, csr_matrix_nd, merge_arrays
+    FlexibleArrayDict as FlexibleArrayDictO, csr_matrix_nd, merge_arrays, \
+    concatenate_ranges
 
 from vemomoto_core.tools.simprofile import profile
 from vemomoto_core.tools.hrprint import HierarchichalPrinter
 from vemomoto_core.tools.iterext import Repeater, DictIterator
 from vemomoto_core.tools.tee import Tee
+from vemomoto_core.tools import saveobject
 from vemomoto_core.tools.doc_utils import DocMetaSuperclass
-from vemomoto_core.concurrent.nicepar import getCounter, Counter, Lockable, \
-    Locked, ParallelCounter, CircularParallelCounter
+from vemomoto_core.concurrent.nicepar import Counter, Lockable, \
+    ParallelCounter, CircularParallelCounter
 from vemomoto_core.concurrent.concurrent_futures_ext import \
-    ProcessPoolExecutor as ProcessPoolExecutor_ext 
+    ProcessPoolExecutor as ProcessPoolExecutor_ext, \
+    PersistentProcessPoolExecutor, to_shared_array
 
 try:
     from .sig_fig_rounding import RoundToSigFigs_fp as round_rel
 except ModuleNotFoundError:
     from sig_fig_rounding import RoundToSigFigs_fp as round_rel
 try:
-    from .graph_utils import find_shortest_distance, in_sets
+    from .graph_utils import find_shortest_distance, in_sets, \
+        find_set_distances, find_shortest_distances_one_to_many, \
+        find_shortest_distances_batch, grow_bounded_tree, LabelTreeStore, \
+        OriginTree
 except ModuleNotFoundError:
-    from graph_utils import find_shortest_distance, in_sets
+    from graph_utils import find_shortest_distance, in_sets, \
+        find_set_distances, find_shortest_distances_one_to_many, \
+        find_shortest_distances_batch, grow_bounded_tree, LabelTreeStore, \
+        OriginTree
 
 #profiling
 try:
@@ -106,72 +120,65 @@ class FlexibleGraph(HierarchichalPrinter):
         
         vertexIDs = add_names(vertices, "ID")
         
-        vertexData = rfn.merge_arrays((vertexIDs, vertexData), 
-                                      flatten=True)
+        vertexData = merge_arrays((vertexIDs, vertexData))
         vertexData.sort(order="ID")
         includedVertices = np.zeros(len(vertices), dtype=bool)
         
         vertexData = np.rec.array(vertexData, copy=False)
         
-        edgeCount = 0
-        
         if useShortest or useLongest:
             if not lengthLabel in edgeData.dtype.names:
                 raise ValueError("lengthLabel must match one of the field "
                                  + "names of edgeData.")
             lengthArr = edgeData[lengthLabel]
         
-        graph = self.graph = {}
-        overwroteSome = False
-        loopsOccurred = False
-        
-        for row, pair in enumerate(edges):
-            if pair[0] == pair[1]:
-                loopsOccurred = True
-                continue
-            for i, direction in enumerate((1, -1)):
-                thisVertex, otherVertex = pair[::direction]
-                try:
-                    vertexDataList = graph[thisVertex]
-                except KeyError:
-                    vertexIndex = np.searchsorted(vertexData.ID, 
-                                                  thisVertex)
-                    try:
-                        if not vertexData.ID[vertexIndex] == thisVertex:
-                            vertexIndex = None
-                    except IndexError:
-                        vertexIndex = None
-                        
-                    graph[thisVertex] = vertexDataList = [vertexIndex, {}, {}]
-                    if not vertexIndex is None:
-                        includedVertices[vertexIndex] = True
-                
-                if otherVertex in vertexDataList[i+1]:
-                    overwroteSome = True
-                    if ((useShortest 
-                         and lengthArr[vertexDataList[i+1][otherVertex]] 
-                                > lengthArr[row])
-                        or (useLongest
-                            and lengthArr[vertexDataList[i+1][otherVertex]] 
-                                < lengthArr[row]) 
-                        or overrideExisting):
-                        
-                        vertexDataList[i+1][otherVertex] = row
-                        if i: 
-                            break
-                    else:
-                        break
-                        """
-                        warnings.warn("An edge from " + str(otherVertex) 
-                                      + " to " + str(thisVertex) 
-                                      + " did already exist. I " + 
-                                      "overwrote it.")
-                        """
-            
-                vertexDataList[i+1][otherVertex] = row
-                
-            else:
-                edgeCount += 1
+        # The graph is built from the edge array in bulk. The dictionary
+        # representation self.graph is created only when it is needed
+        # (see _build_graph_dict).
+        fromIDs = edges[:, 0]
+        toIDs = edges[:, 1]
+        loops = fromIDs == toIDs
+        loopsOccurred = loops.any()
+        rows = np.nonzero(~loops)[0]
+        
+        # vertices that occur in edges; 
+        # the codes are their positions in edgeVertexIDs
+        edgeVertexIDs, firstOccurrences, codes = np.unique(
+            np.stack((fromIDs[rows], toIDs[rows]), 1).ravel(), 
+            return_index=True, return_inverse=True)
+        fromCodes = codes[::2]
+        toCodes = codes[1::2]
+        
+        # choose the edge to be used for each vertex pair
+        if useShortest:
+            sortKeys = (rows, lengthArr[rows], toCodes, fromCodes)
+        elif useLongest:
+            sortKeys = (rows, -lengthArr[rows], toCodes, fromCodes)
+        elif overrideExisting:
+            sortKeys = (-rows, toCodes, fromCodes)
+        else:
+            sortKeys = (rows, toCodes, fromCodes)
+        order = np.lexsort(sortKeys)
+        pairChanges = np.ones(order.size, dtype=bool)
+        pairChanges[1:] = np.logical_or(
+            fromCodes[order[1:]] != fromCodes[order[:-1]],
+            toCodes[order[1:]] != toCodes[order[:-1]])
+        pairStarts = np.nonzero(pairChanges)[0]
+        edgeRows = rows[order[pairStarts]]
+        fromCodes = fromCodes[order[pairStarts]]
+        toCodes = toCodes[order[pairStarts]]
+        firstRows = (np.minimum.reduceat(rows[order], pairStarts) 
+                     if pairStarts.size else pairStarts)
+        
+        overwroteSome = edgeRows.size < rows.size
+        edgeCount = edgeRows.size
+        
+        edgeVertexIndices = np.searchsorted(vertexData.ID, edgeVertexIDs)
+        found = edgeVertexIndices < vertexData.size
+        found[found] = (vertexData.ID[edgeVertexIndices[found]] 
+                        == edgeVertexIDs[found])
+        edgeVertexIndices[~found] = -1
+        includedVertices[edgeVertexIndices[found]] = True
         
         if overwroteSome:
             warnings.warn("Some edges occured multiple times. I " 
@@ -182,9 +189,33 @@ class FlexibleGraph(HierarchichalPrinter):
         if loopsOccurred:
             warnings.warn("Some edges were loops. I ignored them.") 
         
-        
-        for vertexIndex in np.nonzero(~includedVertices)[0]:
-            graph[vertexData.ID[vertexIndex]] = [vertexIndex, {}, {}]
+        # all vertices sorted by ID
+        isolatedVertices = np.nonzero(~includedVertices)[0]
+        allVertexIDs = np.concatenate((edgeVertexIDs, 
+                                       vertexData.ID[isolatedVertices]))
+        vertexOrder = np.argsort(allVertexIDs, kind="stable")
+        vertexPositions = np.empty_like(vertexOrder)
+        vertexPositions[vertexOrder] = np.arange(vertexOrder.size)
+        fromIndices = vertexPositions[fromCodes]
+        toIndices = vertexPositions[toCodes]
+        
+        # edges sorted by their origin; edges with the same origin are
+        # in the order of their first occurrence
+        order = np.lexsort((firstRows, fromIndices))
+        
+        self._bulkGraph = {
+            "vertexIDs":allVertexIDs[vertexOrder],
+            "vertexIndices":np.concatenate((edgeVertexIndices, 
+                                            isolatedVertices))[vertexOrder],
+            "insertionOrder":vertexPositions[np.concatenate((
+                np.argsort(firstOccurrences), 
+                np.arange(edgeVertexIDs.size, allVertexIDs.size)))],
+            "fromIndices":fromIndices[order],
+            "toIndices":toIndices[order],
+            "edgeRows":edgeRows[order],
+            "firstRows":firstRows[order],
+            }
+        self._graph = None
         
         add_names(edges, ("fromID", "toID"))
         from_to = edges.ravel()
@@ -213,6 +244,52 @@ class FlexibleGraph(HierarchichalPrinter):
         self.edges = edges
         self.__edgeCount = edgeCount
     
+    @property
+    def graph(self):
+        """Dictionary representation of the graph. It maps the vertex IDs 
+        to lists [vertexIndex, successors, predecessors], where the 
+        neighbor dictionaries map the IDs of the neighbors to the indices
+        of the connecting edges. 
+        
+        The dictionary is created when it is accessed for the first time. 
+        Until then, the graph is represented by the arrays created in the 
+        constructor, from which :py:class:`FastGraph` can be built without
+        Python loops over the edges.
+        """
+        if self._graph is None:
+            self._graph = self._build_graph_dict()
+            self._bulkGraph = None
+        return self._graph
+    
+    @graph.setter
+    def graph(self, graph):
+        self._graph = graph
+        self._bulkGraph = None
+    
+    def _build_graph_dict(self):
+        bulkGraph = self._bulkGraph
+        vertexIDs = bulkGraph["vertexIDs"].tolist()
+        vertexIndices = bulkGraph["vertexIndices"].tolist()
+        graph = {}
+        for i in bulkGraph["insertionOrder"].tolist():
+            vertexIndex = vertexIndices[i]
+            graph[vertexIDs[i]] = [None if vertexIndex < 0 else vertexIndex, 
+                                   {}, {}]
+        
+        # the neighbors are inserted in the order of the first occurrence
+        # of the respective edges
+        order = np.argsort(bulkGraph["firstRows"])
+        for fromIndex, toIndex, row in zip(
+                bulkGraph["fromIndices"][order].tolist(), 
+                bulkGraph["toIndices"][order].tolist(),
+                bulkGraph["edgeRows"][order].tolist()):
+            fromID = vertexIDs[fromIndex]
+            toID = vertexIDs[toIndex]
+            graph[fromID][1][toID] = row
+            graph[toID][2][fromID] = row
+        
+        return graph
+    
     def add_vertex(self, vertexID, vertexData=None):
         graph = self.graph
         vertices = self.vertices
@@ -362,6 +439,8 @@ class FlexibleGraph(HierarchichalPrinter):
         return self.__edgeCount
     
     def get_vertex_count(self):
+        if self._graph is None:
+            return self._bulkGraph["vertexIDs"].size
         return len(self.graph)
         
     def get_successors(self, vertexID):
@@ -419,9 +498,7 @@ class FlexibleGraph(HierarchichalPrinter):
                                        standardSignificant=False):
         
         self.prst("Removing insignificant dead ends from the graph")
-        graph = self.graph
         vertices = self.vertices
-        allVertexNumber = len(graph)
         
         if significanceLabel is None:
             significanceLabel = self.significanceLabel
@@ -432,51 +509,165 @@ class FlexibleGraph(HierarchichalPrinter):
         if type(significanceLabel) == str:
             significanceArr = vertices.array[significanceLabel]
         elif hasattr(significanceLabel, "__iter__"):
-            significanceArr = list(significanceLabel)
+            significanceArr = np.array(list(significanceLabel))
         elif significanceLabel is not None:
             significanceArr = vertices.array[significanceLabel]
         else:
-            significanceArr = Repeater(False)
+            significanceArr = np.zeros(vertices.array.shape[0], dtype=bool)
         
         if not self.defaultVertexIndex is None:
             try:
                 standardSignificant = significanceArr[self.defaultVertexIndex]
             except IndexError:
                 pass
-            
-        queue = deque()
-        
-        counter = Counter(1, 1000)
         
-        for vertexID in list(graph.keys()):
-            queue.appendleft(vertexID)
-            while len(queue):
-                vertexID = queue.pop()
-                try:
-                    vertexIndex, successors, predecessors = graph[vertexID]
-                except KeyError:
-                    continue    
-                if vertexIndex is None:
-                    significant = standardSignificant
-                else:
-                    try:
-                        significant = significanceArr[vertexIndex]
-                    except (TypeError, IndexError):
-                        significant = standardSignificant
-                if not significant:
-                    if not len(successors):
-                        queue.extendleft(predecessors.keys())
-                        self.remove_vertex(vertexID, counter)
-                    elif (not len(predecessors) 
-                          or (len(successors) == 1 
-                              and predecessors.keys() == successors.keys())):
-                        queue.extendleft(successors.keys())
-                        self.remove_vertex(vertexID, counter)
-        
-        
-        self.prst("Removed {} out of {} vertices (".format(counter.index,
+        vertexIndices, fromIndices, toIndices, edgeRows = \
+                                                self._get_graph_arrays()
+        allVertexNumber = vertexIndices.size
+        
+        significant = np.full(allVertexNumber, standardSignificant, 
+                              dtype=bool)
+        indexed = vertexIndices >= 0
+        indexed[indexed] = vertexIndices[indexed] < significanceArr.shape[0]
+        significant[indexed] = significanceArr[vertexIndices[indexed]]
+        
+        removedVertices, removedEdges = self._find_dead_ends(
+            allVertexNumber, fromIndices, toIndices, significant)
+        
+        # compact the graph once
+        removedVertexIndices = vertexIndices[removedVertices]
+        vertices.delete_many(removedVertexIndices[removedVertexIndices >= 0])
+        removedEdgeRows = edgeRows[removedEdges]
+        self.edges.delete_many(removedEdgeRows[removedEdgeRows >= 0])
+        self.__edgeCount -= np.sum(removedEdges)
+        
+        if self._graph is None:
+            bulkGraph = self._bulkGraph
+            keptVertices = ~removedVertices
+            keptEdges = ~removedEdges
+            newPositions = np.cumsum(keptVertices) - 1
+            insertionOrder = bulkGraph["insertionOrder"]
+            insertionOrder = newPositions[insertionOrder[
+                                            keptVertices[insertionOrder]]]
+            for name in "vertexIDs", "vertexIndices":
+                bulkGraph[name] = bulkGraph[name][keptVertices]
+            for name in "fromIndices", "toIndices":
+                bulkGraph[name] = newPositions[bulkGraph[name][keptEdges]]
+            for name in "edgeRows", "firstRows":
+                bulkGraph[name] = bulkGraph[name][keptEdges]
+            bulkGraph["insertionOrder"] = insertionOrder
+        else:
+            graph = self.graph
+            vertexIDs = list(graph.keys())
+            removedIDs = [vertexIDs[i] for i in np.nonzero(removedVertices)[0]]
+            removedData = [graph.pop(vertexID) for vertexID in removedIDs]
+            for vertexID, (_, successors, predecessors) in zip(removedIDs, 
+                                                                removedData):
+                for i, neighbors in enumerate((predecessors, successors)):
+                    for neighbor in neighbors:
+                        try:
+                            del graph[neighbor][i+1][vertexID]
+                        except KeyError:
+                            pass
+        
+        removedNumber = np.sum(removedVertices)
+        self.prst("Removed {} out of {} vertices (".format(removedNumber,
                                                        allVertexNumber), end="")
-        self.prst(counter.index / allVertexNumber, ")", percent=True)
+        self.prst(removedNumber / allVertexNumber, ")", percent=True)
+    
+    def _get_graph_arrays(self):
+        """Returns the graph as arrays (vertexIndices, fromIndices, 
+        toIndices, edgeRows). The vertices are numbered in the order of
+        the keys of self.graph or, if the dictionary has not been created
+        yet, by their IDs. Missing vertex and edge data are marked by -1.
+        """
+        if self._graph is None:
+            bulkGraph = self._bulkGraph
+            return (bulkGraph["vertexIndices"], bulkGraph["fromIndices"], 
+                    bulkGraph["toIndices"], bulkGraph["edgeRows"])
+        
+        graph = self.graph
+        positions = {vertexID:i for i, vertexID in enumerate(graph)}
+        vertexIndices = np.array([(-1 if data[0] is None else data[0]) 
+                                  for data in graph.values()], dtype=int)
+        degrees = [len(data[1]) for data in graph.values()]
+        fromIndices = np.repeat(np.arange(len(degrees)), degrees)
+        toIndices = np.fromiter((positions[vertexID] for data in graph.values()
+                                 for vertexID in data[1]), 
+                                dtype=int, count=fromIndices.size)
+        edgeRows = np.fromiter(((-1 if row is None else row) 
+                                for data in graph.values() 
+                                for row in data[1].values()), 
+                               dtype=int, count=fromIndices.size)
+        return vertexIndices, fromIndices, toIndices, edgeRows
+    
+    @staticmethod
+    def _find_dead_ends(vertexNumber, fromIndices, toIndices, significant):
+        """Determines the vertices that are removed by 
+        remove_insignificant_dead_ends. 
+        
+        Insignificant vertices without successors or without predecessors
+        and insignificant vertices whose only neighbor is both successor and
+        predecessor are removed until no such vertex is left. The vertices
+        are peeled off in rounds; in each round, only the neighbors of the
+        vertices removed in the previous round are checked.
+        
+        Returns boolean arrays marking the removed vertices and edges.
+        """
+        
+        outOrder = np.argsort(fromIndices, kind="stable")
+        inOrder = np.argsort(toIndices, kind="stable")
+        outDegrees = np.bincount(fromIndices, minlength=vertexNumber)
+        inDegrees = np.bincount(toIndices, minlength=vertexNumber)
+        outOffsets = np.zeros(vertexNumber+1, dtype=int)
+        inOffsets = np.zeros(vertexNumber+1, dtype=int)
+        np.cumsum(outDegrees, out=outOffsets[1:])
+        np.cumsum(inDegrees, out=inOffsets[1:])
+        
+        # if a vertex has one successor and one predecessor, they are 
+        # identical if the sums of the neighbors' indices are equal
+        successorSums = np.zeros(vertexNumber, dtype=int)
+        predecessorSums = np.zeros(vertexNumber, dtype=int)
+        np.add.at(successorSums, fromIndices, toIndices)
+        np.add.at(predecessorSums, toIndices, fromIndices)
+        
+        removedVertices = np.zeros(vertexNumber, dtype=bool)
+        removedEdges = np.zeros(fromIndices.size, dtype=bool)
+        
+        def is_dead_end(candidates):
+            outDeg = outDegrees[candidates]
+            inDeg = inDegrees[candidates]
+            return ~(significant[candidates] | removedVertices[candidates]) & (
+                (outDeg == 0) | (inDeg == 0) 
+                | ((outDeg == 1) & (inDeg == 1) 
+                   & (successorSums[candidates] == predecessorSums[candidates]))
+                )
+        
+        frontier = np.nonzero(is_dead_end(np.arange(vertexNumber)))[0]
+        
+        while frontier.size:
+            removedVertices[frontier] = True
+            
+            edges = np.concatenate((
+                outOrder[concatenate_ranges(outOffsets[frontier], 
+                                            outOffsets[frontier+1])],
+                inOrder[concatenate_ranges(inOffsets[frontier], 
+                                           inOffsets[frontier+1])]))
+            edges = np.unique(edges[~removedEdges[edges]])
+            removedEdges[edges] = True
+            
+            edgeFromIndices = fromIndices[edges]
+            edgeToIndices = toIndices[edges]
+            np.subtract.at(outDegrees, edgeFromIndices, 1)
+            np.subtract.at(inDegrees, edgeToIndices, 1)
+            np.subtract.at(successorSums, edgeFromIndices, edgeToIndices)
+            np.subtract.at(predecessorSums, edgeToIndices, edgeFromIndices)
+            
+            candidates = np.unique(np.concatenate((edgeFromIndices, 
+                                                   edgeToIndices)))
+            frontier = candidates[is_dead_end(candidates)]
+        
+        return removedVertices, removedEdges
     
         
 class FastGraph(metaclass=DocMetaSuperclass):
@@ -486,6 +677,32 @@ class FastGraph(metaclass=DocMetaSuperclass):
         
     def __init__(self, flexibleGraph):
         
+        self.significanceLabel = flexibleGraph.significanceLabel
+        
+        bulkGraph = getattr(flexibleGraph, "_bulkGraph", None)
+        if bulkGraph is None:
+            vertexData, edges, neighbors = self._build_tables_from_dict(
+                                                                flexibleGraph)
+        else:
+            vertexData, edges, neighbors = self._build_tables_from_arrays(
+                                                    flexibleGraph, bulkGraph)
+        
+        mergeArr = np.empty(vertexData.shape[0], 
+                            dtype=vertexData.dtype.descr+neighbors.dtype.descr)
+         
+        view = fields_view(mergeArr, vertexData.dtype.names)
+        view[:] = vertexData
+        view = fields_view(mergeArr, neighbors.dtype.names)
+        view[:] = neighbors
+        
+        self.vertices = FlexibleArray(mergeArr, copy=False)
+        
+        self.edges = FlexibleArray(edges, copy=False)
+        
+        self._adjacencyCSR = None
+    
+    def _build_tables_from_dict(self, flexibleGraph):
+        
         #can leave vertexIDs as iterator???
         rawVertexData = list(sorted(flexibleGraph.graph.items()))
         #vertexIDs = np.fromiter(vertexIDs, 
@@ -494,8 +711,6 @@ class FastGraph(metaclass=DocMetaSuperclass):
         #                                           "formats":[vertexIDs.dtype]},
         #                         copy=False)
         
-        self.significanceLabel = flexibleGraph.significanceLabel
-        
         translateVertices = {vertexID[0]:index 
                              for index, vertexID in enumerate(rawVertexData)}
         
@@ -582,20 +797,128 @@ class FastGraph(metaclass=DocMetaSuperclass):
                 
         for vertexID, predecessorData in toBeAddedPredecessors:
             neighbors[translateVertices[vertexID]]["predecessors"
-                               ][predecessorData[0]] = predecessorData[1]       
-        
+                               ][predecessorData[0]] = predecessorData[1]
         
-        mergeArr = np.empty(vertexData.shape[0], 
-                            dtype=vertexData.dtype.descr+neighbors.dtype.descr)
-         
-        view = fields_view(mergeArr, vertexData.dtype.names)
-        view[:] = vertexData
-        view = fields_view(mergeArr, neighbors.dtype.names)
-        view[:] = neighbors
+        return vertexData, edges, neighbors
+    
+    def _build_tables_from_arrays(self, flexibleGraph, bulkGraph):
         
-        self.vertices = FlexibleArray(mergeArr, copy=False)
+        oldVertexData = flexibleGraph.vertices.array
+        oldEdgeData = flexibleGraph.edges.array
         
-        self.edges = FlexibleArray(edges, copy=False)
+        vertexIDs = bulkGraph["vertexIDs"]
+        vertexIndices = bulkGraph["vertexIndices"]
+        fromIndices = bulkGraph["fromIndices"]
+        toIndices = bulkGraph["toIndices"]
+        vertexNumber = vertexIDs.size
+        edgeNumber = fromIndices.size
+        
+        vertexData = np.zeros(vertexNumber, dtype=oldVertexData.dtype)
+        missing = vertexIndices < 0
+        if missing.any():
+            if flexibleGraph.defaultVertexIndex is None:
+                raise ValueError("Some vertices have missing information "
+                                 + "and no default data are given")
+            vertexData[missing] = oldVertexData[
+                                            flexibleGraph.defaultVertexIndex]
+            vertexData["ID"][missing] = vertexIDs[missing]
+        vertexData[~missing] = oldVertexData[vertexIndices[~missing]]
+        
+        edges = np.zeros(edgeNumber, 
+                         dtype=oldEdgeData.dtype.descr 
+                                + [("fromIndex", "int"), ("toIndex", "int")])
+        edgesViewOld = edges[list(oldEdgeData.dtype.names)]
+        edgesViewOld[:] = oldEdgeData[bulkGraph["edgeRows"]]
+        edges["fromIndex"] = fromIndices
+        edges["toIndex"] = toIndices
+        
+        # the edges are sorted by their origin; hence, the successors
+        # of each vertex form a contiguous block of edges
+        successorOffsets = np.zeros(vertexNumber+1, dtype=int)
+        np.cumsum(np.bincount(fromIndices, minlength=vertexNumber), 
+                  out=successorOffsets[1:])
+        successorOffsets = successorOffsets.tolist()
+        toIndexList = toIndices.tolist()
+        
+        # the predecessors are ordered by the index of their origin
+        order = np.lexsort((fromIndices, toIndices))
+        predecessorOffsets = np.zeros(vertexNumber+1, dtype=int)
+        np.cumsum(np.bincount(toIndices, minlength=vertexNumber), 
+                  out=predecessorOffsets[1:])
+        predecessorOffsets = predecessorOffsets.tolist()
+        fromIndexList = fromIndices[order].tolist()
+        predecessorEdgeList = order.tolist()
+        
+        neighbors = np.zeros(vertexNumber, dtype={"names":["predecessors",
+                                                           "successors"],
+                                                  "formats":[object, object]})
+        successorArr = neighbors["successors"]
+        predecessorArr = neighbors["predecessors"]
+        for i in range(vertexNumber):
+            start, end = successorOffsets[i], successorOffsets[i+1]
+            successorArr[i] = dict(zip(toIndexList[start:end], 
+                                       range(start, end)))
+            start, end = predecessorOffsets[i], predecessorOffsets[i+1]
+            predecessorArr[i] = dict(zip(fromIndexList[start:end], 
+                                         predecessorEdgeList[start:end]))
+        
+        return vertexData, edges, neighbors
+    
+    def get_adjacency_csr(self):
+        """Returns the adjacency structure of the graph in compressed sparse
+        row format as tuple (neighborOffsets, neighborIndices, neighborEdges).
+        
+        Each array has two rows. Row 0 refers to the successors, row 1 to the
+        predecessors of the vertices. The neighbors of vertex v in direction
+        d are neighborIndices[d, neighborOffsets[d, v]:neighborOffsets[d, v+1]]
+        and the respective edges are the entries of neighborEdges at the same
+        positions. The neighbors are in the order of the neighbor 
+        dictionaries.
+        
+        The arrays are rebuilt on demand after the graph has been changed.
+        They lie in shared memory, so that process pools can share them with
+        their workers without copying them.
+        
+        All searches on the graph use these arrays. The neighbor
+        dictionaries are only needed to change the graph (e.g.
+        preprocessing, update_edges, add_edge). Graphs loaded with
+        :py:meth:`FlowPointGraph.load_arrays` do not contain them unless
+        they are restored explicitly.
+        """
+        if getattr(self, "_adjacencyCSR", None) is None:
+            self._adjacencyCSR = self._build_adjacency_csr()
+        return self._adjacencyCSR
+    
+    def _build_adjacency_csr(self):
+        vertexArr = self.vertices.array
+        vertexNumber = vertexArr.size
+        consideredIndices = np.nonzero(
+            self.vertices.considered[:vertexNumber])[0]
+        
+        neighborOffsets = np.zeros((2, vertexNumber+1), dtype=int)
+        neighborIndices = []
+        neighborEdges = []
+        for row, name in enumerate(("successors", "predecessors")):
+            neighborArr = vertexArr[name]
+            degrees = np.zeros(vertexNumber, dtype=int)
+            degrees[consideredIndices] = [len(neighborArr[i]) for i in 
+                                          consideredIndices]
+            np.cumsum(degrees, out=neighborOffsets[row, 1:])
+            items = np.fromiter(iterchain.from_iterable(
+                                    iterchain.from_iterable(
+                                        neighborArr[i].items() 
+                                        for i in consideredIndices)),
+                                dtype=int, count=2*neighborOffsets[row, -1])
+            neighborIndices.append(items[::2])
+            neighborEdges.append(items[1::2])
+        
+        if not neighborIndices[0].size == neighborIndices[1].size:
+            raise ValueError("The successor and predecessor dictionaries "
+                             + "do not match.")
+        
+        return (to_shared_array(neighborOffsets), 
+                to_shared_array(np.vstack(neighborIndices)), 
+                to_shared_array(np.vstack(neighborEdges)))
         
     
     # this method is not needed.
@@ -624,6 +947,7 @@ class FastGraph(metaclass=DocMetaSuperclass):
                 
         
     def add_vertex(self, vertexData):
+        self._adjacencyCSR = None
         return self.vertices.add(vertexData)
     
     def remove_vertex(self, vertexIndex):
@@ -635,6 +959,7 @@ class FastGraph(metaclass=DocMetaSuperclass):
             for neighbor in vertexData[predSuccEssors[i-1]].keys():
                 del edges[vertices[neighbor][j].pop(vertexIndex)]
         del vertices[vertexIndex]
+        self._adjacencyCSR = None
             
     def add_edge(self, fromIndex, toIndex, edgeData):
         vertices = self.vertices
@@ -645,12 +970,14 @@ class FastGraph(metaclass=DocMetaSuperclass):
             raise IndexError("The specified edge exists already")
         edgeID = self.edges.add(edgeData)
         vertices[fromIndex].successors[toIndex] = edgeID
-        vertices[toIndex].successors[fromIndex] = edgeID
+        vertices[toIndex].predecessors[fromIndex] = edgeID
+        self._adjacencyCSR = None
     
     def remove_edge(self, fromIndex, toIndex):
         vertices = self.vertices
         del self.edges[vertices[fromIndex].successors.pop(toIndex)]
         del vertices[toIndex].predecessors[fromIndex]
+        self._adjacencyCSR = None
     
     def add_edge_attributes(self, names, dtypes, fillVal=None):
         self.edges.add_fields(names, dtypes, fillVal)
@@ -659,6 +986,230 @@ class FastGraph(metaclass=DocMetaSuperclass):
         self.vertices.add_fields(names, dtypes, fillVal)
         
     
+class RouteStore(object):
+    """Append-only columnar store for the admissible routes found by 
+    :py:meth:`FlowPointGraph.find_alternative_paths`.
+    
+    Each route is saved as one row with the flat index of its source-sink 
+    pair (``sourceIndex*sinkNumber + sinkIndex``), its via vertex, its 
+    length, and the ID of the set of inspection stations on the route. The 
+    columns are kept in separate binary files in ``directory``. Rows are 
+    buffered and written whenever ``chunkSize`` rows have been collected, 
+    so that the memory needed while searching routes does not depend on 
+    the number of routes. 
+    
+    The store is closed with :py:meth:`close`. Afterwards, the results can
+    be obtained from the directory with :py:meth:`get_results`.
+    
+    """
+    
+    COLUMNS = (("pair", np.int64), ("via", np.int64), ("length", np.double),
+               ("stationSet", np.int64))
+    
+    def __init__(self, directory, shape, chunkSize=100000):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.shape = tuple(shape)
+        self.chunkSize = chunkSize
+        self.stationSetIDs = {}
+        self._buffers = {name:[] for name, _ in self.COLUMNS}
+        self._bufferedRows = 0
+        self._files = {name:open(self._get_path(directory, name), "wb")
+                       for name, _ in self.COLUMNS}
+    
+    @staticmethod
+    def _get_path(directory, name):
+        return os.path.join(directory, name + ".bin")
+    
+    def get_station_set_id(self, stations):
+        """Returns the ID of a set of inspection stations."""
+        return self.stationSetIDs.setdefault(frozenset(stations), 
+                                             len(self.stationSetIDs))
+    
+    def append(self, pairIndices, viaIndex, lengths, stationSetIDs):
+        """Adds routes via the vertex viaIndex."""
+        rowNumber = len(pairIndices)
+        for name, data in (("pair", pairIndices), 
+                           ("via", np.full(rowNumber, viaIndex)),
+                           ("length", lengths), 
+                           ("stationSet", stationSetIDs)):
+            self._buffers[name].append(data)
+        self._bufferedRows += rowNumber
+        if self._bufferedRows >= self.chunkSize:
+            self.flush()
+    
+    def flush(self):
+        """Writes the buffered rows to the disk."""
+        for name, dtype in self.COLUMNS:
+            if self._buffers[name]:
+                np.concatenate(self._buffers[name]).astype(dtype).tofile(
+                    self._files[name])
+            self._buffers[name] = []
+        self._bufferedRows = 0
+    
+    def close(self):
+        """Writes the remaining rows and the station sets to the disk."""
+        self.flush()
+        for f in self._files.values():
+            f.close()
+        stationSets = [None] * len(self.stationSetIDs)
+        for stations, stationSetID in self.stationSetIDs.items():
+            stationSets[stationSetID] = stations
+        saveobject.save_object({"shape":self.shape, 
+                                "stationSets":stationSets}, 
+                               os.path.join(self.directory, "meta.pkl"))
+    
+    @classmethod
+    def get_results(cls, directory):
+        """Builds the results of :py:meth:`FlowPointGraph.find_alternative_paths`
+        from the routes saved in ``directory``.
+        
+        The path index of a route is its rank among the routes of the same 
+        source-sink pair in the order they were added to the store.
+        
+        """
+        meta = saveobject.load_object(os.path.join(directory, "meta.pkl"))
+        shape = meta["shape"]
+        stationSets = meta["stationSets"]
+        columns = {name:np.fromfile(cls._get_path(directory, name), dtype)
+                   for name, dtype in cls.COLUMNS}
+        pairs = columns["pair"]
+        
+        pairNumber = int(np.prod(shape))
+        counts = np.bincount(pairs, minlength=pairNumber)
+        offsets = np.zeros(pairNumber+1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        order = np.argsort(pairs, kind="stable")
+        pathIndices = np.empty_like(pairs)
+        pathIndices[order] = np.arange(pairs.size) - offsets[pairs[order]]
+        
+        pathLengths = csr_matrix_nd.from_csr_matrix(
+            csr_matrix((columns["length"][order], pathIndices[order], 
+                        offsets), 
+                       shape=(pairNumber, counts.max() if pairs.size else 0)),
+            shape)
+        
+        inspectedRoutes = defaultdict(lambda: defaultdict(list))
+        stationCombinations = defaultdict(list)
+        sources, sinks = np.divmod(pairs, shape[1])
+        for sourceIndex, sinkIndex, pathIndex, stationSetID in zip(
+                sources.tolist(), sinks.tolist(), pathIndices.tolist(), 
+                columns["stationSet"].tolist()):
+            stations = stationSets[stationSetID]
+            for inspectionIndex in stations:
+                inspectedRoutes[inspectionIndex][
+                    (sourceIndex, sinkIndex)].append(pathIndex)
+            stationCombinations[stations].append((sourceIndex, sinkIndex, 
+                                                  pathIndex))
+        
+        inspectedRoutes = dict(inspectedRoutes)
+        for key, value in inspectedRoutes.items():
+            inspectedRoutes[key] = dict(value)
+        
+        return pathLengths, inspectedRoutes, dict(stationCombinations)
+
+
+class RouteQueryService(object):
+    """Answers single-pair shortest route queries on a preprocessed 
+    :py:class:`FlowPointGraph` with low latency.
+    
+    The shortest path trees of the most recently queried origins are kept 
+    in a least recently used cache. The tree of an origin is grown only as 
+    far as necessary for the queried destinations, so that repeated 
+    queries from the same origin do not repeat the search. When a tree is 
+    evicted from the cache, its label arrays are reused for the new 
+    origin. Each cached tree requires about 56 bytes per vertex.
+    
+    If ``targetIndices`` is given, the searches are reach pruned with 
+    respect to these vertices, and only routes to these vertices can be 
+    queried.
+    
+    The cache is cleared automatically if edges or vertices are added to 
+    or removed from the graph. After other changes, e.g. of edge lengths,
+    :py:meth:`clear` must be called.
+    
+    """
+    
+    def __init__(self, graph, targetIndices=None, cacheSize=8):
+        if cacheSize < 1:
+            raise ValueError("The cacheSize must be at least 1.")
+        self.graph = graph
+        self.cacheSize = cacheSize
+        if targetIndices is not None:
+            targetIndices = np.asarray(targetIndices, dtype=int)
+        self.targetIndices = targetIndices
+        self._trees = OrderedDict()
+        self._adjacencyCSR = None
+    
+    def clear(self):
+        """Removes all cached trees."""
+        self._trees.clear()
+        self._adjacencyCSR = None
+    
+    def _update_graph_arrays(self):
+        adjacencyCSR = self.graph.get_adjacency_csr()
+        if adjacencyCSR is self._adjacencyCSR:
+            return
+        self._trees.clear()
+        self._adjacencyCSR = adjacencyCSR
+        
+        vertexNumber = adjacencyCSR[0].shape[1]-1
+        edgeArr = self.graph.edges.array
+        lengthArr = edgeArr["length"]
+        if "originalEdge1" in edgeArr.dtype.names:
+            originalEdges = edgeArr["originalEdge1"], edgeArr["originalEdge2"]
+        else:
+            originalEdges = (np.full(edgeArr.size, -1),) * 2
+        
+        if self.targetIndices is None:
+            reachArr = np.zeros(0)
+            targetDistances = None
+        else:
+            self._isTarget = np.zeros(vertexNumber, dtype=bool)
+            self._isTarget[self.targetIndices] = True
+            reachArr = self.graph.vertices.array["reachBound"]
+            targetDistances = find_set_distances(lengthArr, *adjacencyCSR, 
+                                                 self.targetIndices, False)
+        self._treeArgs = (reachArr, lengthArr, *adjacencyCSR, 
+                          edgeArr["fromIndex"], *originalEdges, 
+                          targetDistances)
+    
+    def _get_tree(self, fromIndex, toIndex):
+        self._update_graph_arrays()
+        if self.targetIndices is not None and not self._isTarget[toIndex]:
+            raise ValueError("The vertex " + str(toIndex) + " is not a "
+                             + "target of the route query service.")
+        
+        tree = self._trees.get(fromIndex, None)
+        if tree is not None:
+            self._trees.move_to_end(fromIndex)
+            return tree
+        
+        if len(self._trees) >= self.cacheSize:
+            _, tree = self._trees.popitem(last=False)
+        else:
+            tree = OriginTree(*self._treeArgs)
+        tree.set_origin(fromIndex)
+        self._trees[fromIndex] = tree
+        return tree
+    
+    def find_distance(self, fromIndex, toIndex):
+        """Returns the length of the shortest route from the vertex with 
+        index ``fromIndex`` to the vertex with index ``toIndex`` (``inf``, 
+        if the vertices are disconnected)."""
+        return self._get_tree(fromIndex, toIndex).get_distance(toIndex)
+    
+    def find_route(self, fromIndex, toIndex):
+        """Returns the length of the shortest route from the vertex with 
+        index ``fromIndex`` to the vertex with index ``toIndex`` and the 
+        indices of the (original) edges on the route in their order."""
+        tree = self._get_tree(fromIndex, toIndex)
+        return tree.get_distance(toIndex), tree.get_path(toIndex)
+    
+    def __len__(self):
+        return len(self._trees)
+        
+    
 class FlowPointGraph(FastGraph, HierarchichalPrinter, Lockable):
     
     def __init__(self, flexibleGraph, lengthLabel, 
@@ -701,11 +1252,178 @@ class FlowPointGraph(FastGraph, HierarchichalPrinter, Lockable):
                                  + "'length', if 'length' is not the length "
                                  + "label.")
             add_alias(self.edges.array, lengthLabel, "length")
+    
+    # version of the directory format written by save_arrays
+    ARRAY_FORMAT_VERSION = 1
+    
+    # attributes that are not saved by save_arrays
+    _ARRAY_EXCLUDED_ATTRIBUTES = {"vertices", "edges", "lock", "_adjacencyCSR",
+                                  "_executor", "_executorAdjacency", 
+                                  "_executorHandles"}
+    
+    def save_arrays(self, directory):
+        """Saves the graph as a directory of flat ``.npy`` files.
+        
+        The vertex and edge data (including the reach bounds and the 
+        shortcut information ``originalEdge1`` and ``originalEdge2``), the 
+        adjacency structure (see :py:meth:`get_adjacency_csr`), and all 
+        array attributes of the graph are saved in separate files that can 
+        be memory-mapped by :py:meth:`load_arrays`. Object fields (except 
+        for the neighbor dictionaries, which are represented by the 
+        adjacency arrays) and all remaining attributes are saved in the 
+        file ``meta.pkl``.
+        
+        Parameters
+        ----------
+        directory : str
+            Name of the directory. It is created if it does not exist.
+        
+        """
+        self.prst("Saving the graph arrays to directory", directory)
+        os.makedirs(directory, exist_ok=True)
+        
+        def save(name, array):
+            np.save(os.path.join(directory, name + ".npy"), array)
+        
+        meta = {"version":self.ARRAY_FORMAT_VERSION, "flexibleArrays":{},
+                "objectFields":{}, "arrayAttributes":[], "attributes":{}}
+        
+        for name, flexibleArray in (("vertices", self.vertices), 
+                                    ("edges", self.edges)):
+            (array, considered, size, space, changeIndex, deleted, _, 
+             isRecArray, extentionFactor, aliases, _) = \
+                flexibleArray.__reduce__()[1]
+            objectFields = [field for field in array.dtype.names 
+                            if array.dtype[field].hasobject]
+            plainFields = [field for field in array.dtype.names 
+                           if field not in objectFields]
+            save(name, rfn.repack_fields(array[plainFields]))
+            save(name + "_considered", considered)
+            meta["flexibleArrays"][name] = (size, space, changeIndex, deleted, 
+                                            isRecArray, extentionFactor, 
+                                            aliases)
+            meta["objectFields"][name] = {
+                field:array[field] for field in objectFields 
+                if field not in ("successors", "predecessors")
+                }
+        
+        for name, array in zip(("adjacency_offsets", "adjacency_neighbors",
+                                "adjacency_edges"), self.get_adjacency_csr()):
+            save(name, array)
+        
+        for key, value in self.__dict__.items():
+            if (key in self._ARRAY_EXCLUDED_ATTRIBUTES 
+                    or key.startswith("_HierarchichalPrinter__")):
+                continue
+            if isinstance(value, np.ndarray) and not value.dtype.hasobject:
+                save("attribute_" + key, value)
+                meta["arrayAttributes"].append(key)
+            else:
+                meta["attributes"][key] = value
         
+        saveobject.save_object(meta, os.path.join(directory, "meta.pkl"))
     
+    @classmethod
+    def load_arrays(cls, directory, mmap_mode="r", restoreNeighborDicts=False,
+                    **printerArgs):
+        """Loads a graph that has been saved with :py:meth:`save_arrays`.
+        
+        Parameters
+        ----------
+        directory : str
+            Name of the directory the graph has been saved to.
+        mmap_mode : str
+            Memory-map mode passed to ``np.load``. With the default ``'r'``
+            the arrays are opened read-only and the memory pages are shared
+            between all processes working with the graph. Use ``None`` to 
+            load the arrays into memory. Arrays with object fields (e.g. the
+            edge inspection data) are always loaded into memory.
+        restoreNeighborDicts : bool
+            If ``True``, the neighbor dictionaries ``successors`` and 
+            ``predecessors`` are recreated from the adjacency arrays. This 
+            is only necessary if the graph is to be changed or preprocessed
+            again and requires the vertex array to be held in memory.
+        printerArgs
+            Arguments passed to 
+            :py:class:`vemomoto_core.tools.hrprint.HierarchichalPrinter`
+        
+        """
+        meta = saveobject.load_object(os.path.join(directory, "meta.pkl"))
+        
+        if not meta["version"] == cls.ARRAY_FORMAT_VERSION:
+            raise ValueError("The graph in directory " + str(directory) 
+                             + " has been saved in format version " 
+                             + str(meta["version"]) + ", but version "
+                             + str(cls.ARRAY_FORMAT_VERSION) 
+                             + " is required.")
+        
+        def load(name):
+            return np.load(os.path.join(directory, name + ".npy"), 
+                           mmap_mode=mmap_mode)
+        
+        self = cls.__new__(cls)
+        HierarchichalPrinter.__init__(self, **printerArgs)
+        Lockable.__init__(self)
+        
+        self.prst("Loading the graph arrays from directory", directory)
+        
+        self._adjacencyCSR = tuple(load(name) for name in (
+            "adjacency_offsets", "adjacency_neighbors", "adjacency_edges"))
+        
+        for name in "vertices", "edges":
+            array = load(name).view(np.ndarray)
+            considered = np.load(os.path.join(directory, 
+                                              name + "_considered.npy"))
+            objectFields = meta["objectFields"][name]
+            
+            if name == "vertices" and restoreNeighborDicts:
+                objectFields = dict(objectFields)
+                neighborOffsets, neighborIndices, neighborEdges = \
+                    self._adjacencyCSR
+                for row, field in enumerate(("successors", "predecessors")):
+                    neighborDicts = np.zeros(array.size, dtype=object)
+                    offsets = neighborOffsets[row]
+                    for i in range(array.size):
+                        keys = np.array(neighborIndices[row, 
+                                                    offsets[i]:offsets[i+1]])
+                        values = np.array(neighborEdges[row, 
+                                                    offsets[i]:offsets[i+1]])
+                        neighborDicts[i] = FixedOrderedIntDict(
+                            keys, values, dict(zip(keys.tolist(), 
+                                                   values.tolist())),
+                            copy=False, check=False)
+                    objectFields[field] = neighborDicts
+            
+            if objectFields:
+                objectArray = np.empty(array.size, 
+                                       dtype=[(field, object) for field 
+                                              in objectFields])
+                for field, values in objectFields.items():
+                    objectArray[field] = values
+                array = merge_arrays((array, objectArray))
+            
+            (size, space, changeIndex, deleted, isRecArray, extentionFactor, 
+             aliases) = meta["flexibleArrays"][name]
+            if isRecArray:
+                array = np.rec.array(array, copy=False)
+            zeroitem = tuple(np.zeros(array.shape[1:], 
+                                      dtype=array.dtype).tolist())
+            setattr(self, name, FlexibleArray.new(array, considered, size, 
+                                                  space, changeIndex, deleted,
+                                                  True, isRecArray, 
+                                                  extentionFactor, aliases, 
+                                                  zeroitem))
+        
+        for key in meta["arrayAttributes"]:
+            setattr(self, key, load("attribute_" + key))
+        self.__dict__.update(meta["attributes"])
+        
+        return self
+        
     def preprocessing(self, initialBound, boundFactor=3, pruneFactor=4, 
                       additionalBoundFactor=1.1, expansionBounds=None, 
-                      degreeBound=5, maxEdgeLength=None):
+                      degreeBound=5, maxEdgeLength=None, 
+                      parallelContraction=False, radixHeap=False):
         
         if expansionBounds is None:
             expansionBounds = Repeater(1)
@@ -723,6 +1441,8 @@ class FlowPointGraph(FastGraph, HierarchichalPrinter, Lockable):
         self.prst("expansionBounds:", expansionBounds)
         self.prst("degreeBound:", degreeBound)
         self.prst("maxEdgeLength:", maxEdgeLength)
+        self.prst("parallelContraction:", parallelContraction)
+        self.prst("radixHeap:", radixHeap)
         self.increase_print_level()
         if pruneFactor < 2:
             raise ValueError("The pruneFactor must be at least 2.")
@@ -750,8 +1470,12 @@ class FlowPointGraph(FastGraph, HierarchichalPrinter, Lockable):
         #vertices.array.tmp_successors = vertices.array.successors
         
         if not os.name == 'posix':
-            warnings.warn("Parallelization with shared memory is ony possible "
-                          + "on Unix-based systems. Thus, the code will not be "
+            warnings.warn("Parallelization with shared memory is only "
+                          + "possible on Unix-based systems. Thus, the "
+                          + "determination of the vertex weights, the "
+                          + "parallel vertex contraction, and the sorting of "
+                          + "the neighbor dictionaries will be executed "
+                          + "serially. The reach bound computation is still "
                           + "executed in parallel.")
         
         vertexArr = vertices.array[:vertices.size]
@@ -808,9 +1532,15 @@ class FlowPointGraph(FastGraph, HierarchichalPrinter, Lockable):
             consideredVertexIndices = np.nonzero(vertexArr["unbounded"])[0]
             
             
-            self.__bypass_vertices(consideredVertexIndices, 
-                                   bound, expansionBounds.__next__(), 
-                                   degreeBound, maxEdgeLength)
+            if parallelContraction:
+                self.__bypass_vertices_parallel(consideredVertexIndices, 
+                                                bound, 
+                                                expansionBounds.__next__(), 
+                                                degreeBound, maxEdgeLength)
+            else:
+                self.__bypass_vertices(consideredVertexIndices, 
+                                       bound, expansionBounds.__next__(), 
+                                       degreeBound, maxEdgeLength)
             
             deletedVerticesNumber = (totalVertexNumber 
                                      - np.sum(vertexArr["unbounded"]))
@@ -842,31 +1572,44 @@ class FlowPointGraph(FastGraph, HierarchichalPrinter, Lockable):
             
             consideredVertexIndices = np.nonzero(vertexArr["unbounded"])[0]
             
-            counter = getCounter(len(consideredVertexIndices), 0.01)
-            
             pruneConstant = bound*pruneFactor
             
-            wrappedFunc = partial(self.__get_reach_bounds_starting_from,
-                                  bound=bound, 
-                                  additionalBoundFactor=additionalBoundFactor,
-                                  pruneConstant=pruneConstant,
-                                  counter=counter)
-            
             lengths = edgeArr["length"][edgeArr["considered"]]
             
             edgeArr["reachBound"][edgeArr["considered"]] = np.select(
                                     (lengths < bound,), (lengths,), (np.inf,)
                                                                )
             
-            if os.name == 'posix': #and bound < 26
-                
-                edges.array = np.rec.array(sharedmem.copy(edges.array), 
-                                           copy=False)
-                with sharedmem.MapReduce(np=CPU_COUNT) as pool:
-                    pool.map(wrappedFunc, consideredVertexIndices)
-                    
-            else:
-                any(map(wrappedFunc, consideredVertexIndices))
+            # the workers see the reach bounds at the beginning of the 
+            # round and return their improvements, which are merged here.
+            # All arguments change from round to round. A new pool inherits
+            # them from the forked process, whereas a persistent pool would
+            # have to pickle the neighbor dictionaries in every round.
+            reachBoundArr = edges.array["reachBound"]
+            const_args = (vertices.array["tmp_successors"], 
+                          edges.array["length"], vertices.array["inPenalty"],
+                          vertices.array["outPenalty"], reachBoundArr, 
+                          bound, additionalBoundFactor, pruneConstant,
+                          intradixheapdict if radixHeap else intquickheapdict)
+            
+            counter = Counter(len(consideredVertexIndices), 0.01)
+            updatedEdges = []
+            newReachBounds = []
+            with ProcessPoolExecutor_ext(None, const_args) as pool:
+                mapObj = pool.map(FlowPointGraph._find_reach_bound_updates, 
+                                  consideredVertexIndices,
+                                  tasklength=len(consideredVertexIndices),
+                                  adaptive=True)
+                for edgeIndices, reachBounds in mapObj:
+                    percentage = counter.next()
+                    if percentage: 
+                        self.prst(percentage, percent=True)
+                    updatedEdges.append(edgeIndices)
+                    newReachBounds.append(reachBounds)
+            
+            if updatedEdges:
+                np.maximum.at(reachBoundArr, np.concatenate(updatedEdges), 
+                              np.concatenate(newReachBounds))
             
             edgeArr = edges.array[:edges.size]
             edgeConsideredArr = edges.considered[:edges.size]
@@ -948,36 +1691,27 @@ class FlowPointGraph(FastGraph, HierarchichalPrinter, Lockable):
         # \DEBUG
         
         self.__sort_neighbors()
+        self._adjacencyCSR = None
         self.edges.cut()
         
         self.decrease_print_level()
         
         
-    def __get_reach_bounds_starting_from(self, rootIndex, bound, 
-                                         additionalBoundFactor,
-                                         pruneConstant=np.inf,
-                                         counter=None):
-        
-        #DEBUG ONLY
-        #root = self.vertices.array.ID[rootIndex]
-        #if root == b'606021':
-        #    print('bla11')
-        #if root == b'9':
-        #    print('bla9')
-        #print(pruneConstant)
-        #print(counter)
-        #/DEBUG
-        if counter:
-            percentage = counter.next()
-            if percentage: self.prst(percentage, percent=True)
+    @staticmethod
+    def _find_reach_bound_updates(successorArr, costArr, inPenaltyArr, 
+                                  outPenaltyArr, reachBoundArr, bound, 
+                                  additionalBoundFactor, pruneConstant, 
+                                  queueClass, rootIndex):
+        """Grows the partial shortest path tree rooted at rootIndex and 
+        returns the edges whose reach bounds are increased by the tree 
+        together with the new bounds as tuple (edgeIndices, reachBounds).
+        The arrays are not changed, so that trees can be processed in 
+        parallel and their results merged with np.maximum.at.
+        queueClass is the priority queue used for the search 
+        (intquickheapdict or intradixheapdict)."""
         
         rTol = 1+1e-7
         increasedBound = bound * additionalBoundFactor
-        successorArr = self.vertices.array["tmp_successors"]
-        costArr = self.edges.array["length"]
-        inPenaltyArr = self.vertices.array["inPenalty"]
-        outPenaltyArr = self.vertices.array["outPenalty"]
-        reachBoundArr = self.edges.array["reachBound"]
         
         tree = FlexibleArrayDict(4000, 
                                  dtype={"names":["vertexIndex", "depth", 
@@ -993,7 +1727,7 @@ class FlowPointGraph(FastGraph, HierarchichalPrinter, Lockable):
         tree.setitem_by_keywords(rootIndex, vertexIndex=rootIndex, parent=0, 
                                  successors=set(), relevant=True)
         
-        queue = intquickheapdict()
+        queue = queueClass()
         rootPenalty = inPenaltyArr[rootIndex]
         queue[rootIndex] = rootPenalty
         
@@ -1009,7 +1743,7 @@ class FlowPointGraph(FastGraph, HierarchichalPrinter, Lockable):
                 queue[vertex] = cost
                 break
             
-            vertexIndexInTree = tree.indexDict[vertex]
+            vertexIndexInTree = tree.find_internal_indices((vertex,)).item()
             vertexData = tree[vertex]
             vertexData["depth"] = cost
             
@@ -1075,9 +1809,7 @@ class FlowPointGraph(FastGraph, HierarchichalPrinter, Lockable):
                     
                     # calculate extension
                     # check whether improvable
-                    with Locked(self):
-                        edgeReachBound = reachBoundArr[edge]
-                    if newCost > edgeReachBound*rTol and innerVertex:
+                    if newCost > reachBoundArr[edge]*rTol and innerVertex:
                         newVertexData["extension"] = edgeCost
                         newVertexData["improvableInnerVertex"] = True
                     else:
@@ -1100,8 +1832,11 @@ class FlowPointGraph(FastGraph, HierarchichalPrinter, Lockable):
         treeArr = tree.array
                     
         # process leafs that have not been extended
-        for leaf, depth in queue.items():
-            leafIndexInTree = tree.indexDict[leaf]
+        leafItems = list(queue.items())
+        leafIndicesInTree = tree.find_internal_indices(
+                                            [leaf for leaf, _ in leafItems])
+        for leafIndexInTree, (_, depth) in zip(leafIndicesInTree.tolist(), 
+                                               leafItems):
             leafData = treeArr[leafIndexInTree]
             leafData["depth"] = depth
             treeArr[leafData["parent"]]["successors"].add(leafIndexInTree)
@@ -1143,15 +1878,20 @@ class FlowPointGraph(FastGraph, HierarchichalPrinter, Lockable):
         
         depthArray = tree.array["depth"]
         heightArray = tree.array["parentMinHeight"]
-                
+        
+        updatedEdges = []
+        newReachBounds = []
         for successorIndexInTree, edge in boundableEdges:
             newReachBound = min(depthArray[successorIndexInTree],
                                 heightArray[successorIndexInTree])
             if newReachBound*rTol >= bound:
                 newReachBound = np.inf
-            with Locked(self):
-                if newReachBound > reachBoundArr[edge]:
-                    reachBoundArr[edge] = newReachBound
+            if newReachBound > reachBoundArr[edge]:
+                updatedEdges.append(edge)
+                newReachBounds.append(newReachBound)
+        
+        return (np.array(updatedEdges, dtype=int), 
+                np.array(newReachBounds, dtype=float))
     
     def __bypass_vertices(self, vertexIndices, reachBound, 
                           expansionBound, degreeBound, maxEdgeLength=None):
@@ -1198,6 +1938,122 @@ class FlowPointGraph(FastGraph, HierarchichalPrinter, Lockable):
                                                len(vertexIndices)))
         self.decrease_print_level()
         
+    def __bypass_vertices_parallel(self, vertexIndices, reachBound, 
+                                   expansionBound, degreeBound, 
+                                   maxEdgeLength=None):
+        """Bypasses vertices in rounds of independent vertex sets.
+        
+        In each round, the weights and shortcuts of all vertices whose 
+        neighbourhood has changed are computed in parallel. Then a set of 
+        low-weight vertices whose closed neighbourhoods are pairwise disjoint
+        is chosen greedily. Bypassing one of these vertices does not affect 
+        the shortcuts of the others, so that the shortcuts computed by the 
+        workers can be merged one after another.
+        """
+        
+        self.prst("Bypassing vertices in parallel")       
+        self.increase_print_level()
+        
+        vertexArr = self.vertices.array
+        tmp_successorArr = vertexArr["tmp_successors"]
+        tmp_predecessorArr = vertexArr["tmp_predecessors"]
+        unboundedArr = vertexArr["unbounded"]
+        
+        wrappedFunc = partial(self.__determine_vertex_weight_and_shortcuts, 
+                              reachBound=reachBound,
+                              expansionBound=expansionBound, 
+                              degreeBound=degreeBound,
+                              maxEdgeLength=maxEdgeLength)
+        bypassFunc = partial(self.__bypass_vertex, 
+                             reachBound=reachBound,
+                             expansionBound=expansionBound, 
+                             degreeBound=degreeBound, 
+                             vertexWeights=None,
+                             maxEdgeLength=maxEdgeLength)
+        
+        vertexWeights = {}
+        vertexShortcuts = {}
+        changedVertices = vertexIndices
+        bypassedNumber = 0
+        roundNumber = 0
+        
+        # the worker processes are forked in each call of map and hence see
+        # the vertices bypassed in the previous rounds
+        if os.name == 'posix':
+            poolContext = sharedmem.MapReduce(np=CPU_COUNT)
+        else:
+            poolContext = nullcontext()
+        
+        with poolContext as pool:
+            while len(changedVertices):
+                if pool is not None:
+                    # starting the worker processes is only worth it if there 
+                    # are sufficiently many vertices to process
+                    results = pool.map(wrappedFunc, changedVertices, 
+                                       minlength=20*CPU_COUNT)
+                else:
+                    results = tuple(map(wrappedFunc, changedVertices))
+                
+                for vertexIndex, (weight, shortcuts) in zip(changedVertices, 
+                                                            results):
+                    if np.isnan(weight):
+                        unboundedArr[vertexIndex] = False
+                        vertexWeights.pop(vertexIndex, None)
+                        vertexShortcuts.pop(vertexIndex, None)
+                    else:
+                        vertexWeights[vertexIndex] = weight
+                        vertexShortcuts[vertexIndex] = shortcuts
+                
+                candidates = [vertexIndex for vertexIndex, weight 
+                              in vertexWeights.items() if weight < np.inf]
+                
+                if not candidates:
+                    break
+                
+                candidates.sort(key=vertexWeights.__getitem__)
+                
+                # choose vertices with disjoint closed neighbourhoods
+                blocked = set()
+                independentSet = []
+                for vertexIndex in candidates:
+                    neighborhood = set(iterchain(
+                                    tmp_successorArr[vertexIndex].keys(),
+                                    tmp_predecessorArr[vertexIndex].keys()))
+                    neighborhood.add(vertexIndex)
+                    if blocked.isdisjoint(neighborhood):
+                        independentSet.append(vertexIndex)
+                        blocked.update(neighborhood)
+                
+                for vertexIndex in independentSet:
+                    del vertexWeights[vertexIndex]
+                    bypassFunc(vertexIndex, 
+                               shortcuts=vertexShortcuts.pop(vertexIndex))
+                
+                blocked.difference_update(independentSet)
+                changedVertices = np.array(sorted(blocked), dtype=int)
+                
+                bypassedNumber += len(independentSet)
+                roundNumber += 1
+                
+        self.prst("Bypassed", bypassedNumber, "out of", len(vertexIndices),
+                  "vertices ({:6.2%}) in".format(bypassedNumber/
+                                                 len(vertexIndices)), 
+                  roundNumber, "rounds.")
+        self.decrease_print_level()
+    
+    def __determine_vertex_weight_and_shortcuts(self, vertexIndex, **kwargs):
+        weight = self.__determine_vertex_weight(vertexIndex, **kwargs)
+        if weight < np.inf:
+            return weight, self.__get_bypass_shortcuts(vertexIndex)
+        return weight, None
+    
+    def __get_bypass_shortcuts(self, vertexIndex):
+        vertexData = self.vertices.array[vertexIndex]
+        return [(predecessor, predecessorEdge, successor, successorEdge)
+                for (successor, successorEdge), (predecessor, predecessorEdge)
+                in iterproduct(vertexData["tmp_successors"].items(), 
+                               vertexData["tmp_predecessors"].items())
+                if not successor == predecessor]
     
     def __determine_vertex_weight(self, vertexIndex, reachBound, expansionBound, 
                                  degreeBound, maxEdgeLength=None, 
@@ -1353,7 +2209,8 @@ class FlowPointGraph(FastGraph, HierarchichalPrinter, Lockable):
             return expansion * cost
     
     def __bypass_vertex(self, vertexIndex, reachBound, expansionBound, 
-                        degreeBound, vertexWeights, maxEdgeLength=None, counter=None):
+                        degreeBound, vertexWeights, maxEdgeLength=None, counter=None,
+                        shortcuts=None):
         # note: if the vertex does not belong to any shortest path that is 
         #       not included in G' anymore, we can completely remove it from
         #       the graph (i.e. replace edges instead of only adding ne ones)
@@ -1396,66 +2253,71 @@ class FlowPointGraph(FastGraph, HierarchichalPrinter, Lockable):
             inPenalty = inPenaltyArr[vertexIndex]
             outPenalty = outPenaltyArr[vertexIndex]
         
+        if shortcuts is None:
+            shortcuts = self.__get_bypass_shortcuts(vertexIndex)
+        
         changeIndex = edges.changeIndex
-        for successorItem, predecessorItem in iterproduct(successors.items(), 
-                                                          predecessors.items()):
-            successor, successorEdge = successorItem
-            predecessor, predecessorEdge = predecessorItem
+        for predecessor, predecessorEdge, successor, successorEdge in shortcuts:
             
             # introduce new edges
-            if not successor == predecessor:
-                #if DEBUG: print("predecessor, successor", vertexArr["ID"][predecessor], vertexArr["ID"][successor])
-                newLength = lengthArr[successorEdge] + lengthArr[predecessorEdge]
-                
-                if newLength > maxEdgeLength:
-                    if vertexIndex in vertexWeights:
-                        print("vertexWeights[vertexIndex]", vertexWeights[vertexIndex])
-                    else:
-                        print("vertex not in VertexWeights")
-                    print("Too long edge inserted", vertexArr[vertexIndex]["ID"], newLength,
-                          self.__determine_vertex_weight(vertexIndex,
-                        reachBound=reachBound, 
-                        expansionBound=expansionBound, 
-                        degreeBound=degreeBound,
-                        maxEdgeLength=maxEdgeLength))
-                
-                successorsOfPredecessor = successorArr[predecessor]
-                if inspectionArr[successorEdge]:
-                    if inspectionArr[predecessorEdge]:
-                        newInspection = inspectionArr[successorEdge
-                                                      ].union(inspectionArr[
-                                                          predecessorEdge])
-                    else:
-                        newInspection = inspectionArr[successorEdge]
-                elif inspectionArr[predecessorEdge]: 
-                    newInspection = inspectionArr[predecessorEdge]
+            #if DEBUG: print("predecessor, successor", vertexArr["ID"][predecessor], vertexArr["ID"][successor])
+            newLength = lengthArr[successorEdge] + lengthArr[predecessorEdge]
+            
+            if newLength > maxEdgeLength:
+                if vertexWeights is not None and vertexIndex in vertexWeights:
+                    print("vertexWeights[vertexIndex]", vertexWeights[vertexIndex])
                 else:
-                    newInspection = None
-                if successor not in successorsOfPredecessor:
-                    newIndex = edges.add_by_keywords(fromIndex=predecessor, 
-                                                  toIndex=successor,
-                                                  length=newLength,
-                                                  considered=True,
-                                                  originalEdge1=predecessorEdge,
-                                                  originalEdge2=successorEdge,
-                                                  inspection=newInspection)
+                    print("vertex not in VertexWeights")
+                print("Too long edge inserted", vertexArr[vertexIndex]["ID"], newLength,
+                      self.__determine_vertex_weight(vertexIndex,
+                    reachBound=reachBound, 
+                    expansionBound=expansionBound, 
+                    degreeBound=degreeBound,
+                    maxEdgeLength=maxEdgeLength))
+            
+            successorsOfPredecessor = successorArr[predecessor]
+            if inspectionArr[successorEdge]:
+                if inspectionArr[predecessorEdge]:
+                    newInspection = inspectionArr[successorEdge
+                                                  ].union(inspectionArr[
+                                                      predecessorEdge])
+                else:
+                    newInspection = inspectionArr[successorEdge]
+            elif inspectionArr[predecessorEdge]: 
+                newInspection = inspectionArr[predecessorEdge]
+            else:
+                newInspection = None
+            if successor not in successorsOfPredecessor:
+                newIndex = edges.add_by_keywords(fromIndex=predecessor, 
+                                              toIndex=successor,
+                                              length=newLength,
+                                              considered=True,
+                                              originalEdge1=predecessorEdge,
+                                              originalEdge2=successorEdge,
+                                              inspection=newInspection)
+                successorArr[predecessor][successor] = newIndex
+                predecessorArr[successor][predecessor] = newIndex
+                tmp_successorArr[predecessor][successor] = newIndex
+                tmp_predecessorArr[successor][predecessor] = newIndex
+            elif lengthArr[successorsOfPredecessor[successor]] > newLength:
+                newIndex = successorsOfPredecessor[successor]
+                keywordData = dict(fromIndex=predecessor, toIndex=successor,
+                                   length=newLength, considered=True,
+                                   originalEdge1=predecessorEdge,
+                                   originalEdge2=successorEdge,
+                                   inspection=newInspection)
+                if edgeArr["originalEdge1"][newIndex] < 0:
+                    # original edges are not overwritten, because their 
+                    # lengths are needed if the edges are updated later
+                    consideredArr[newIndex] = False
+                    newIndex = edges.add_by_keywords(**keywordData)
                     successorArr[predecessor][successor] = newIndex
                     predecessorArr[successor][predecessor] = newIndex
-                    tmp_successorArr[predecessor][successor] = newIndex
-                    tmp_predecessorArr[successor][predecessor] = newIndex
-                elif lengthArr[successorsOfPredecessor[successor]] > newLength:
-                    newIndex = successorsOfPredecessor[successor]
-                    edges.setitem_by_keywords(newIndex, fromIndex=predecessor, 
-                                           toIndex=successor,
-                                           length=newLength, considered=True,
-                                           originalEdge1=predecessorEdge,
-                                           originalEdge2=successorEdge,
-                                           inspection=newInspection)
-                    if successor not in tmp_successorArr[predecessor]:
-                        tmp_successorArr[predecessor][successor] = newIndex
-                        tmp_predecessorArr[successor][predecessor] = newIndex
-                        
-        
+                else:
+                    edges.setitem_by_keywords(newIndex, **keywordData)
+                tmp_successorArr[predecessor][successor] = newIndex
+                tmp_predecessorArr[successor][predecessor] = newIndex
+            
             if not changeIndex == edges.changeIndex:
                 edgeArr = edges.array
                 inspectionArr = edgeArr["inspection"]
@@ -1520,13 +2382,14 @@ class FlowPointGraph(FastGraph, HierarchichalPrinter, Lockable):
         successors.clear()
         predecessors.clear()
         
-        any(map(partial(self.__determine_vertex_weight,
-                        reachBound=reachBound, 
-                        expansionBound=expansionBound, 
-                        degreeBound=degreeBound,
-                        maxEdgeLength=maxEdgeLength, 
-                        vertexWeights=vertexWeights), 
-                previousNeighbors))
+        if vertexWeights is not None:
+            any(map(partial(self.__determine_vertex_weight,
+                            reachBound=reachBound, 
+                            expansionBound=expansionBound, 
+                            degreeBound=degreeBound,
+                            maxEdgeLength=maxEdgeLength, 
+                            vertexWeights=vertexWeights), 
+                    previousNeighbors))
                    
     def __convert_edge_reaches_to_vertex_reaches(self):
         
@@ -1599,11 +2462,7 @@ class FlowPointGraph(FastGraph, HierarchichalPrinter, Lockable):
             percentage = counter.next()
             if percentage:
                 self.prst(percentage, percent=True)
-            keys = np.array(tuple(neighbors.keys()), dtype=int)
-            values = np.array(tuple(neighbors.values()), dtype=int)
-            order = np.argsort(reachArr[keys])[::-1]
-            return FixedOrderedIntDict(keys[order], values[order],
-                                       neighbors, copy=False, check=False)
+            return self._get_ordered_neighbor_dict(neighbors, reachArr)
         
         for name in "predecessors", "successors":
             if os.name == 'posix':
@@ -1617,177 +2476,383 @@ class FlowPointGraph(FastGraph, HierarchichalPrinter, Lockable):
                 vertexArr[name] = pool.map(getOrderedDicts, vertexArr[name])
             """
     
-    def find_shortest_path(self, fromIndex, toIndex, getPath=False, 
-                           initSize=2000):
-        vertexArr = self.vertices.array
-        reachArr = vertexArr["reachBound"]
-        successorArr = vertexArr["successors"]
-        predecessorArr = vertexArr["predecessors"]
-        edgeArr = self.edges.array
+    def update_edges(self, edgeIDs, newLengths, rTol=1+1e-7):
+        """Changes the lengths of edges without repeating the preprocessing.
+        
+        The lengths of the shortcuts that contain changed edges are updated.
+        Paths via vertices that have been removed during the preprocessing
+        are searched again starting from the graph vertices adjacent to the
+        changed edges, and shortcuts are added or replaced where these paths
+        have become shorter. Finally, the reach bounds of all vertices 
+        whose reach may have changed are set to infinity. 
+        
+        If no edge has become longer, a vertex can only gain reach via a new
+        shortest path that contains a changed graph edge. The section of 
+        this path between the vertex and the closest changed edge has been 
+        a shortest path before. Therefore, the reach of a vertex can only 
+        have changed if its undirected distance to a changed edge does not 
+        exceed its reach bound. If edges have become longer, shortest paths
+        may be rerouted via arbitrary vertices. Then the reach bounds of
+        all vertices that are connected to a changed edge are reset.
+        
+        Only original edges (no shortcuts) can be updated. Shortcuts and 
+        original edges that are not part of the graph anymore are kept in 
+        the edge array, because other shortcuts may be composed of them. 
+        Their lengths are kept up to date, but they are not referenced in 
+        the neighbor dictionaries. Hence, they are not considered in any 
+        search.
+        
+        The graph must not have been loaded with read-only arrays.
+        """
+        
+        edges = self.edges
+        vertices = self.vertices
+        edgeArr = edges.array[:edges.size]
+        vertexArr = vertices.array[:vertices.size]
+        
+        if "ID" not in edgeArr.dtype.names:
+            raise ValueError("The edges must have an ID field to be updated.")
+        
+        edgeIDs = np.asarray(edgeIDs)
+        newLengths = np.broadcast_to(np.asarray(newLengths, dtype=float), 
+                                     edgeIDs.shape)
+        
+        isOriginal = edges.considered[:edges.size]
+        if "originalEdge1" in edgeArr.dtype.names:
+            isOriginal = np.logical_and(isOriginal, 
+                                        edgeArr["originalEdge1"] < 0)
+        edgeIndices = np.nonzero(np.logical_and(
+                                    np.isin(edgeArr["ID"], edgeIDs), 
+                                    isOriginal))[0]
+        indexDict = dict(zip(edgeArr["ID"][edgeIndices].tolist(), 
+                             edgeIndices.tolist()))
+        
+        try:
+            edgeIndices = np.array([indexDict[ID] for ID 
+                                    in edgeIDs.tolist()], dtype=int)
+        except KeyError as e:
+            raise ValueError("The edge " + str(e.args[0]) + " does not exist.")
+        
+        self.prst("Updating the lengths of", len(edgeIndices), "edges.")
+        self.increase_print_level()
+        
         lengthArr = edgeArr["length"]
+        oldLengthArr = lengthArr.copy()
+        self._adjacencyCSR = None
         
-        forwardData = FlexibleArrayDict(initSize, 
-                                        dtype={"names":["cost", "parent", 
-                                                        "edge"],
-                                               "formats":[float, int, int]})
-        forwardData[fromIndex] = (0, -1, -1)
-        forwardDataDict = forwardData.indexDict
-        
-        backwardData = FlexibleArrayDict(initSize, 
-                                         dtype={"names":["cost", "parent", 
-                                                         "edge"],
-                                                "formats":[float, int, int]})
-        backwardData[toIndex] = (0, -1, -1)
-        backwardDataDict = backwardData.indexDict
-        
-        forwardQueue = intquickheapdict(((fromIndex, 0),), initSize)
-        backwardQueue = intquickheapdict(((toIndex, 0),), initSize)
-        
-        forwardVertex, forwardCost = fromIndex, 0
-        backwardVertex, backwardCost = toIndex, 0
-        bestLength = np.inf
-        
-        while bestLength > forwardCost + backwardCost:
-            if forwardCost <= backwardCost:
-                thisQueue = forwardQueue
-                oppositeQueue = backwardQueue
-                thisVertex = forwardVertex
-                thisCost = forwardCost
-                oppositeCost = backwardCost
-                neighborArr = successorArr
-                thisDataDict = forwardDataDict
-                thisData = forwardData
-                oppositeDataDict = backwardDataDict
-                oppositeData = backwardData
-            else:
-                thisQueue = backwardQueue
-                oppositeQueue = forwardQueue
-                thisVertex = backwardVertex
-                thisCost = backwardCost
-                oppositeCost = forwardCost
-                neighborArr = predecessorArr
-                thisDataDict = backwardDataDict
-                thisData = backwardData
-                oppositeDataDict = forwardDataDict
-                oppositeData = forwardData
-                
-            
-            # delete item from queue
-            thisQueue.popitem()
-            
-            # prune, if necessary (This step is necessary, since
-            # early pruning is weakened in order to allow for the fancy
-            # termination criterion
-            if not reachArr[thisVertex] < thisCost:
-                    
-                # check whether the vertex has been labeled from the opposite 
-                # side
-                reverseCost = oppositeQueue.get(thisVertex, None)
-                if reverseCost is not None:                             # if yes
-                    totalLength = thisCost + reverseCost
-                    # update best path if necessary
-                    if totalLength < bestLength:
-                        bestLength = totalLength
-                        bestPathMiddleEdge = oppositeData[thisVertex]["edge"]
-                
-                # set the vertex cost           
-                thisData[thisVertex]["cost"] = thisCost
-                
-                # process successors
-                for neighbor, edge in neighborArr[thisVertex].items():
-                    
-                    # early pruning
-                    reach = reachArr[neighbor]
-                    length = lengthArr[edge]
-                    newCost = thisCost + length
-                    if reach < oppositeCost:
-                        if reach < thisCost:
-                            break
-                        elif reach < newCost:
-                            continue
-                    
-                    # if not pruned
-                    neighborCost = thisQueue.get(neighbor, None)
-                    
-                    if neighborCost is not None:   # if neighbor is in the queue
-                        if neighborCost > newCost:
-                            neighborData = thisData[neighbor]
-                            neighborData["parent"] = thisVertex
-                            neighborData["edge"] = edge
-                            update = True
-                        else:
-                            update = False
-                    else:
-                        #check whether neighbor already scanned
-                        if not neighbor in thisDataDict:
-                            thisData.setitem_by_tuple(neighbor, 
-                                                      (np.nan, thisVertex, edge))
-                            update = True
-                        else:
-                            update = False
-                        
-                    if update:
-                        thisQueue[neighbor] = thisCost + length
-                        
-                        # check whether neighbor has been scanned from the
-                        # opposite direction and update the best path 
-                        # if necessary
-                        oppositeIntIndex = oppositeDataDict.get(neighbor, None)
-                        if oppositeIntIndex:
-                            reverseCost = oppositeData.array["cost"
-                                                             ][oppositeIntIndex]
-                            if not np.isnan(reverseCost):
-                                totalLength = (thisCost + length 
-                                               + reverseCost)
-                                if totalLength < bestLength:
-                                    bestLength = totalLength
-                                    bestPathMiddleEdge = edge
-            
-            if bestLength > forwardCost + backwardCost:        
-                try:
-                    if forwardCost <= backwardCost:
-                        forwardVertex, forwardCost = thisQueue.peekitem()
-                    else:
-                        backwardVertex, backwardCost = thisQueue.peekitem()
-                except IndexError:
-                    warnings.warn("Vertices {} and {} are disconnected.".format(
-                        self.vertices[fromIndex]["ID"], 
-                        self.vertices[toIndex]["ID"]))
+        if "reachBound" not in vertexArr.dtype.names:
+            lengthArr[edgeIndices] = newLengths
+            self.decrease_print_level()
+            return
+        
+        originalEdge1Arr = edgeArr["originalEdge1"]
+        lengthArr[edgeIndices] = newLengths
+        
+        def update_shortcut_lengths(edgeArr):
+            # each iteration corrects one level of nested shortcuts
+            lengthArr = edgeArr["length"]
+            originalEdge1Arr = edgeArr["originalEdge1"]
+            originalEdge2Arr = edgeArr["originalEdge2"]
+            shortcuts = np.nonzero(originalEdge1Arr >= 0)[0]
+            while True:
+                shortcutLengths = (lengthArr[originalEdge1Arr[shortcuts]] 
+                                   + lengthArr[originalEdge2Arr[shortcuts]])
+                changed = ~(shortcutLengths == lengthArr[shortcuts])
+                if not changed.any():
                     break
+                lengthArr[shortcuts[changed]] = shortcutLengths[changed]
         
-        if getPath:
-            fromIndexArr = edgeArr.fromIndex
-            toIndexArr = edgeArr.toIndex
-            #originalEdgeArr = edgeArr[["originalEdge1", "originalEdge2"]]
-            originalEdgeArr = edgeArr[["originalEdge2", "originalEdge1"]]
-            isShortcutArr = edgeArr.originalEdge1 >= 0
-            
-            def expandEdge(edgeIndex):
-                result = []
+        update_shortcut_lengths(edgeArr)
+        
+        changedEdges = np.nonzero(~(lengthArr == oldLengthArr))[0]
+        increased = np.any(lengthArr[changedEdges] 
+                           > oldLengthArr[changedEdges])
+        self.prst("The lengths of", len(changedEdges), 
+                  "edges (including shortcuts) have changed.")
+        
+        if not len(changedEdges):
+            self.decrease_print_level()
+            return
+        
+        successorArr = vertexArr["successors"]
+        predecessorArr = vertexArr["predecessors"]
+        inGraph = np.array([bool(successors or predecessors) for 
+                            successors, predecessors in 
+                            zip(successorArr, predecessorArr)], dtype=bool)
+        
+        # adjacency of the original edges (including the ones removed from
+        # the graph during the preprocessing)
+        originalEdges = np.nonzero(np.logical_and(
+                                        originalEdge1Arr < 0, 
+                                        edges.considered[:edges.size]))[0]
+        originalAdjacency = []
+        for fromField, toField in (("fromIndex", "toIndex"), 
+                                   ("toIndex", "fromIndex")):
+            order = np.argsort(edgeArr[fromField][originalEdges], 
+                               kind="stable")
+            offsets = np.zeros(vertexArr.size+1, dtype=int)
+            np.cumsum(np.bincount(edgeArr[fromField][originalEdges], 
+                                  minlength=vertexArr.size), out=offsets[1:])
+            originalAdjacency.append((
+                offsets, edgeArr[toField][originalEdges[order]].tolist(), 
+                originalEdges[order].tolist()))
+        
+        def restricted_search(startIndex, lengthArr, forward):
+            # Dijkstra search that does not expand vertices of the graph 
+            # except the start vertex
+            offsets, neighbors, neighborEdges = originalAdjacency[not forward]
+            queue = intquickheapdict(((startIndex, 0.),))
+            distances = {}
+            parentEdges = {}
+            while len(queue):
+                vertexIndex, cost = queue.popitem()
+                distances[vertexIndex] = cost
+                if inGraph[vertexIndex] and not vertexIndex == startIndex:
+                    continue
+                for i in range(offsets[vertexIndex], offsets[vertexIndex+1]):
+                    neighbor = neighbors[i]
+                    if neighbor in distances:
+                        continue
+                    newCost = cost + lengthArr[neighborEdges[i]]
+                    if newCost < queue.get(neighbor, np.inf):
+                        queue[neighbor] = newCost
+                        parentEdges[neighbor] = neighborEdges[i]
+            return distances, parentEdges
+        
+        changedOriginalEdges = changedEdges[originalEdge1Arr[changedEdges] < 0]
+        sourceVertices = set()
+        for fromIndex in np.unique(edgeArr["fromIndex"][changedOriginalEdges]):
+            distances, _ = restricted_search(fromIndex, lengthArr, False)
+            sourceVertices.update(vertexIndex for vertexIndex in distances
+                                  if inGraph[vertexIndex])
+        
+        # a changed shortcut may have replaced a path that is shorter now
+        changedFromIndices = edgeArr["fromIndex"][changedEdges]
+        sourceVertices.update(changedFromIndices[inGraph[changedFromIndices]])
+        
+        self.prst("Searching new shortcuts starting from", 
+                  len(sourceVertices), "vertices.")
+        
+        # each path via removed vertices must be covered by a graph edge
+        # that is not longer than the path
+        newGraphEdges = {}
+        for fromIndex in sorted(sourceVertices):
+            distances, parentEdges = restricted_search(fromIndex, lengthArr, 
+                                                       True)
+            successors = successorArr[fromIndex]
+            for toIndex, distance in distances.items():
+                if not inGraph[toIndex] or toIndex == fromIndex:
+                    continue
+                if (toIndex in successors and not distance * rTol 
+                        < lengthArr[successors[toIndex]]):
+                    continue
+                
+                path = deque()
+                vertexIndex = toIndex
+                while not vertexIndex == fromIndex:
+                    path.appendleft(parentEdges[vertexIndex])
+                    vertexIndex = edgeArr["fromIndex"][path[0]]
+                newGraphEdges[fromIndex, toIndex] = path
+        
+        def add_shortcut(edge1, edge2):
+            edgeArr = edges.array
+            inspection1 = edgeArr["inspection"][edge1]
+            inspection2 = edgeArr["inspection"][edge2]
+            if inspection1 and inspection2:
+                newInspection = inspection1.union(inspection2)
+            else:
+                newInspection = inspection1 or inspection2 or None
+            keywordData = dict(fromIndex=edgeArr["fromIndex"][edge1],
+                               toIndex=edgeArr["toIndex"][edge2],
+                               length=(edgeArr["length"][edge1] 
+                                       + edgeArr["length"][edge2]),
+                               originalEdge1=edge1, originalEdge2=edge2,
+                               inspection=newInspection)
+            return edges.add_by_keywords(**keywordData)
+        
+        # the replaced graph edges are not overwritten, since they may be 
+        # part of other shortcuts
+        touchedVertices = set()
+        for (fromIndex, toIndex), path in newGraphEdges.items():
+            newEdge = path.popleft()
+            while path:
+                newEdge = add_shortcut(newEdge, path.popleft())
+            for neighborArr, vertexIndex, neighbor in (
+                    (successorArr, fromIndex, toIndex),
+                    (predecessorArr, toIndex, fromIndex)):
+                neighborArr[vertexIndex] = dict(neighborArr[vertexIndex].items())
+                neighborArr[vertexIndex][neighbor] = newEdge
+            touchedVertices.update((fromIndex, toIndex))
+        
+        self.prst("Added or replaced", len(newGraphEdges), "shortcuts.")
+        
+        edgeArr = edges.array[:edges.size]
+        lengthArr = edgeArr["length"]
+        oldLengthArr = np.concatenate((oldLengthArr, np.full(
+                            lengthArr.size-oldLengthArr.size, np.inf)))
+        
+        # determine the vertices whose reach bounds may have changed
+        neighborOffsets, neighborIndices, neighborEdges = \
+            self.get_adjacency_csr()
+        graphEdges = np.concatenate(neighborEdges)
+        changedGraphEdges = graphEdges[~(lengthArr[graphEdges] 
+                                         == oldLengthArr[graphEdges])]
+        startIndices = np.unique(np.concatenate((
+                            edgeArr["fromIndex"][changedGraphEdges],
+                            edgeArr["toIndex"][changedGraphEdges]))) 
+        
+        undirectedOffsets = neighborOffsets[0] + neighborOffsets[1]
+        undirectedIndices = np.empty_like(graphEdges)
+        undirectedEdges = np.empty_like(graphEdges)
+        for row in range(2):
+            positions = (np.arange(neighborIndices.shape[1]) 
+                         - np.repeat(neighborOffsets[row, :-1], 
+                                     np.diff(neighborOffsets[row]))
+                         + np.repeat(undirectedOffsets[:-1] 
+                                     + row*np.diff(neighborOffsets[0]),
+                                     np.diff(neighborOffsets[row])))
+            undirectedIndices[positions] = neighborIndices[row]
+            undirectedEdges[positions] = neighborEdges[row]
+        
+        undirectedLengths = np.fmin(lengthArr, oldLengthArr)
+        distances = find_set_distances(
+                                undirectedLengths, 
+                                np.vstack((undirectedOffsets, 
+                                           undirectedOffsets)), 
+                                np.vstack((undirectedIndices, 
+                                           undirectedIndices)),
+                                np.vstack((undirectedEdges, undirectedEdges)),
+                                startIndices)
+        
+        reachArr = vertexArr["reachBound"]
+        if increased:
+            affected = distances < np.inf
+        else:
+            affected = distances <= reachArr*rTol
+        affected = np.logical_and(affected, reachArr < np.inf)
+        affected = np.logical_and(affected, inGraph)
+        reachArr[affected] = np.inf
+        self.prst("The reach bounds of", np.sum(affected), 
+                  "vertices have been reset.")
+        
+        # the neighbor dictionaries must stay sorted by reach
+        for vertexIndex in np.nonzero(affected)[0]:
+            touchedVertices.update(successorArr[vertexIndex].keys())
+            touchedVertices.update(predecessorArr[vertexIndex].keys())
+        for vertexIndex in touchedVertices:
+            for neighborArr in successorArr, predecessorArr:
+                neighborArr[vertexIndex] = self._get_ordered_neighbor_dict(
+                                dict(neighborArr[vertexIndex].items()), 
+                                reachArr)
+        
+        self._adjacencyCSR = None
+        self.decrease_print_level()
+        
+    @staticmethod
+    def _get_ordered_neighbor_dict(neighbors, reachArr):
+        keys = np.array(tuple(neighbors.keys()), dtype=int)
+        values = np.array(tuple(neighbors.values()), dtype=int)
+        order = np.argsort(reachArr[keys])[::-1]
+        return FixedOrderedIntDict(keys[order], values[order],
+                                   neighbors, copy=False, check=False)
+    
+    def find_shortest_path(self, fromIndex, toIndex, getPath=False):
+        """Returns the length of the shortest path from the vertex with 
+        index fromIndex to the vertex with index toIndex. If getPath=True,
+        the edges of the path (with shortcuts expanded to original edges) 
+        are returned as well."""
+        edgeArr = self.edges.array
+        
+        distances, paths = find_shortest_distances_batch(
+            self.vertices.array["reachBound"], edgeArr["length"],
+            *self.get_adjacency_csr(), np.array([fromIndex]), 
+            np.array([toIndex]), getPaths=True)
+        bestLength = distances[0]
+        
+        if bestLength == np.inf:
+            warnings.warn("Vertices {} and {} are disconnected.".format(
+                self.vertices[fromIndex]["ID"], 
+                self.vertices[toIndex]["ID"]))
+        
+        if getPath:
+            originalEdge1Arr = edgeArr["originalEdge1"]
+            originalEdge2Arr = edgeArr["originalEdge2"]
+            
+            def expandEdge(edgeIndex):
+                result = []
                 stack = [edgeIndex]
                 while stack:
                     edge = stack.pop()
-                    if isShortcutArr[edge]:
-                        stack.extend(originalEdgeArr[edge])
+                    if originalEdge1Arr[edge] >= 0:
+                        stack.append(originalEdge2Arr[edge])
+                        stack.append(originalEdge1Arr[edge])
                     else:
                         result.append(edge)
                 return result
             
-            pathEdgeIndices = deque(expandEdge(bestPathMiddleEdge))
-            while not fromIndexArr[pathEdgeIndices[0]] == fromIndex:
-                pathEdgeIndices.extendleft(expandEdge(forwardData[fromIndexArr[
-                                           pathEdgeIndices[0]]]["edge"])[::-1])
-            while not toIndexArr[pathEdgeIndices[-1]] == toIndex:
-                pathEdgeIndices.extend(expandEdge(backwardData[toIndexArr[
-                                              pathEdgeIndices[-1]]]["edge"]))
+            pathEdgeIndices = list(iterchain.from_iterable(
+                expandEdge(edge) for edge in paths[0]))
             
-            return bestLength, edgeArr[list(pathEdgeIndices)]
+            return bestLength, edgeArr[pathEdgeIndices]
         
         return bestLength
     
     
     
-    def find_shortest_distance_array(self, fromIndices, toIndices):
+    def _get_executor(self):
+        """Returns the worker pool that is kept between the searches 
+        together with handles to the reach bounds, the adjacency arrays 
+        (see get_adjacency_csr), and the edge lengths registered at the pool.
+        The arrays are registered again whenever the adjacency arrays have
+        been rebuilt after a change of the graph."""
+        adjacency = self.get_adjacency_csr()
+        executor = self.__dict__.get("_executor")
+        if executor is None:
+            executor = self._executor = PersistentProcessPoolExecutor()
+            self._executorAdjacency = None
+        if self._executorAdjacency is not adjacency:
+            self._executorHandles = tuple(
+                executor.register_array(name, arr) for name, arr in zip(
+                    ("reachBound", "neighborOffsets", "neighborIndices", 
+                     "neighborEdges", "length"),
+                    (self.vertices.array["reachBound"], *adjacency, 
+                     self.edges.array["length"])))
+            self._executorAdjacency = adjacency
+        return executor, self._executorHandles
+    
+    def shutdown_executor(self):
+        """Shuts down the worker pool that is kept between the searches of
+        find_shortest_distance_array and find_alternative_paths. The pool
+        is started again when it is needed."""
+        executor = self.__dict__.pop("_executor", None)
+        if executor is not None:
+            executor.shutdown()
+        self.__dict__.pop("_executorAdjacency", None)
+        self.__dict__.pop("_executorHandles", None)
+    
+    def find_shortest_distance_array(self, fromIndices, toIndices, 
+                                     method="auto", cacheDirectory=None,
+                                     radixHeap=False):
+        """Computes the shortest distances between all vertices in 
+        fromIndices and all vertices in toIndices.
+        
+        method can be "one-to-many" (one search per origin labelling
+        all destinations), "many-to-one" (one backward search per 
+        destination), "pairwise" (one bidirectional search per pair), or 
+        "auto", which chooses the direction requiring fewer searches.
+        
+        If cacheDirectory is given, the distances are stored in a 
+        subdirectory named after a hash of the graph (see 
+        get_distance_cache_key). Distances of previously computed origins
+        and destinations are read from memory-mapped blocks in the cache, 
+        and only the missing rows and columns are computed and appended as
+        new blocks.
+        
+        If radixHeap is True, the one-to-many and many-to-one searches use 
+        an intradixheapdict instead of an intquickheapdict as priority 
+        queue (see _benchmark_radixheap.py for a comparison of the run 
+        times).
+        """
         
         ############################## Profiling ###############################
         profiling = False
@@ -1801,12 +2866,15 @@ class FlowPointGraph(FastGraph, HierarchichalPrinter, Lockable):
                       self.vertices[fromIndex]["ID"], "to", 
                       self.vertices[toIndex]["ID"])
                 line_profile = line_profiler.LineProfiler(find_shortest_distance)
-                line_profile.runcall(find_shortest_distance, self.vertices.array, 
-                                self.edges.array, fromIndex, toIndex)
+                line_profile.runcall(find_shortest_distance, 
+                                     self.vertices.array["reachBound"], 
+                                     self.edges.array["length"], 
+                                     *self.get_adjacency_csr(), 
+                                     fromIndex, toIndex)
                 #profile.print_stats()
                 line_profile.dump_stats("shPath"+str(index)+".lprof")
                 #line_profile.print_stats()
-                profile("find_shortest_distance(self.vertices.array, self.edges.array, fromIndex, toIndex)", globals(), locals())
+                profile("find_shortest_distance(self.vertices.array['reachBound'], self.edges.array['length'], *self.get_adjacency_csr(), fromIndex, toIndex)", globals(), locals())
                 print("%" * 80)
                 print()
                 print("%" * 80)
@@ -1817,6 +2885,27 @@ class FlowPointGraph(FastGraph, HierarchichalPrinter, Lockable):
         
         ########################################################################
         
+        if cacheDirectory is not None:
+            return self._find_cached_shortest_distance_array(
+                fromIndices, toIndices, method, cacheDirectory, radixHeap)
+        
+        if method == "auto":
+            if len(fromIndices) <= len(toIndices):
+                method = "one-to-many"
+            else:
+                method = "many-to-one"
+        
+        if method == "one-to-many":
+            return self._find_shortest_distance_array_one_to_many(
+                fromIndices, toIndices, True, radixHeap)
+        elif method == "many-to-one":
+            return self._find_shortest_distance_array_one_to_many(
+                toIndices, fromIndices, False, radixHeap).T
+        elif not method == "pairwise":
+            raise ValueError("Unknown method '" + str(method) + "'. "
+                             + "method must be one of 'auto', 'one-to-many', "
+                             + "'many-to-one', and 'pairwise'.")
+        
         self.prst("Computing shortest distance array")
         self.increase_print_level()
         sinkNumber = len(toIndices)
@@ -1832,24 +2921,34 @@ class FlowPointGraph(FastGraph, HierarchichalPrinter, Lockable):
         chunksize = max(min_chunk_size, len(sourceSinkCombinations)//
                         (cpu_count*chunk_number))
         
-        const_args = (self.vertices.array, self.edges.array)
+        # each task is a batch of pairs sharing the same search buffers
+        chunkStarts = range(0, combinationNumber, chunksize)
+        
+        # the graph arrays are shared with the workers of the persistent 
+        # pool only once
+        pool, (reachHandle, *adjacencyHandles, lengthHandle) = \
+            self._get_executor()
+        const_args = (reachHandle, lengthHandle, *adjacencyHandles)
         
         printCounter = Counter(combinationNumber, 0.01)
         
         #"""
-        with ProcessPoolExecutor_ext(cpu_count, const_args) as pool:
-                mapObj = pool.map(
-                        find_shortest_distance,
-                        sourceSinkCombinations[:,0],
-                        sourceSinkCombinations[:,1],
-                        chunksize=chunksize
-                        )
-                                                                 
-                for i, distance in enumerate(mapObj):
-                    percentage = printCounter.next()
-                    if percentage is not None:
-                        self.prst(percentage, percent=True)
-                    dists[i // sinkNumber, i % sinkNumber] = distance
+        mapObj = pool.map(
+                find_shortest_distances_batch,
+                [sourceSinkCombinations[start:start+chunksize, 0]
+                 for start in chunkStarts],
+                [sourceSinkCombinations[start:start+chunksize, 1]
+                 for start in chunkStarts],
+                const_args=const_args, chunksize=1
+                )
+        
+        flatDists = dists.ravel()
+        for start, distances in zip(chunkStarts, mapObj):
+            for _ in range(distances.size):
+                percentage = printCounter.next()
+                if percentage is not None:
+                    self.prst(percentage, percent=True)
+            flatDists[start:start+distances.size] = distances
         """
         any(starmap(find_shortest_pathX,
                         zip(Repeater(self), 
@@ -1860,6 +2959,187 @@ class FlowPointGraph(FastGraph, HierarchichalPrinter, Lockable):
         """
         self.decrease_print_level()
         return dists
+    
+    def get_distance_cache_key(self):
+        """Returns a hash of the edge lengths, reach bounds, and adjacency
+        structure, which determine the shortest distances in the graph.
+        """
+        sha = hashlib.sha1()
+        for array in (self.edges.array["length"][:self.edges.size], 
+                      self.vertices.array["reachBound"][:self.vertices.size], 
+                      *self.get_adjacency_csr()):
+            sha.update(np.ascontiguousarray(array).tobytes())
+        return sha.hexdigest()
+    
+    def _find_cached_shortest_distance_array(self, fromIndices, toIndices, 
+                                             method, cacheDirectory, 
+                                             radixHeap=False):
+        
+        directory = os.path.join(cacheDirectory, 
+                                 self.get_distance_cache_key())
+        fileName = os.path.join(directory, "blocks.npy")
+        
+        # The cache consists of blocks of the distance matrix. Each block is
+        # a directory with the row indices, column indices and distances as
+        # .npy files, which are never changed once written. The file 
+        # blocks.npy lists the blocks and is replaced atomically, so that 
+        # readers always see complete blocks. The blocks tile the matrix
+        # of all cached rows and columns.
+        if os.path.exists(fileName):
+            blockNames = np.load(fileName).tolist()
+        else:
+            blockNames = []
+        
+        def load(blockName, name):
+            return np.load(os.path.join(directory, blockName, name + ".npy"),
+                           mmap_mode="r")
+        
+        blocks = [(load(blockName, "rowIndices"), 
+                   load(blockName, "columnIndices"), 
+                   load(blockName, "distances")) for blockName in blockNames]
+        
+        if blocks:
+            rowIndices = np.unique(np.concatenate([block[0] for block 
+                                                   in blocks]))
+            columnIndices = np.unique(np.concatenate([block[1] for block 
+                                                      in blocks]))
+        else:
+            rowIndices = np.zeros(0, dtype=int)
+            columnIndices = np.zeros(0, dtype=int)
+        
+        newRows = np.setdiff1d(fromIndices, rowIndices)
+        newColumns = np.setdiff1d(toIndices, columnIndices)
+        
+        if newRows.size or newColumns.size:
+            self.prst("Computing the distances for", newRows.size, 
+                      "new origins and", newColumns.size, 
+                      "new destinations that are not in the cache.")
+            
+            # only the new blocks are computed and written
+            newBlocks = []
+            if rowIndices.size and newColumns.size:
+                newBlocks.append((rowIndices, newColumns))
+            allColumns = np.union1d(columnIndices, newColumns)
+            if newRows.size and allColumns.size:
+                newBlocks.append((newRows, allColumns))
+            
+            os.makedirs(directory, exist_ok=True)
+            for blockRows, blockColumns in newBlocks:
+                dists = self.find_shortest_distance_array(blockRows, 
+                                                          blockColumns,
+                                                          method, 
+                                                          radixHeap=radixHeap)
+                # each writer uses its own block directory
+                blockDirectory = tempfile.mkdtemp("", "block_", directory)
+                for name, array in (("rowIndices", blockRows), 
+                                    ("columnIndices", blockColumns), 
+                                    ("distances", dists)):
+                    np.save(os.path.join(blockDirectory, name + ".npy"), 
+                            array)
+                blockName = os.path.basename(blockDirectory)
+                blockNames.append(blockName)
+                blocks.append((load(blockName, "rowIndices"), 
+                               load(blockName, "columnIndices"), 
+                               load(blockName, "distances")))
+            
+            fileDescriptor, tmpFileName = tempfile.mkstemp(".npy", 
+                                                           "blocks_", 
+                                                           directory)
+            with os.fdopen(fileDescriptor, "wb") as file:
+                np.save(file, np.array(blockNames))
+            os.replace(tmpFileName, fileName)
+        else:
+            self.prst("Loading the distances from the cache.")
+        
+        fromIndices = np.asarray(fromIndices)
+        toIndices = np.asarray(toIndices)
+        result = np.empty((fromIndices.size, toIndices.size))
+        
+        def find_positions(blockIndices, indices):
+            order = np.argsort(blockIndices)
+            positions = np.searchsorted(blockIndices, indices, sorter=order)
+            positions[positions == blockIndices.size] = 0
+            positions = order[positions]
+            found = blockIndices[positions] == indices
+            return np.nonzero(found)[0], positions[found]
+        
+        # only the requested entries are read from the memory-mapped blocks
+        for blockRows, blockColumns, blockDists in blocks:
+            resultRows, rowPositions = find_positions(blockRows, fromIndices)
+            resultColumns, columnPositions = find_positions(blockColumns, 
+                                                            toIndices)
+            if resultRows.size and resultColumns.size:
+                result[np.ix_(resultRows, resultColumns)] = \
+                    blockDists[np.ix_(rowPositions, columnPositions)]
+        
+        return result
+    
+    def _find_shortest_distance_array_one_to_many(self, startIndices, 
+                                                   targetIndices, forward,
+                                                   radixHeap=False):
+        """Computes the shortest distances between each start vertex and 
+        all target vertices with one search per start vertex. If 
+        forward=False, the searches run backwards, i.e. the distances 
+        from the targets to the start vertices are computed. The result 
+        has the shape (len(startIndices), len(targetIndices)).
+        If radixHeap=True, the searches use an intradixheapdict.
+        """
+        
+        self.prst("Computing shortest distance array with", 
+                  len(startIndices), "one-to-many searches")
+        self.increase_print_level()
+        
+        startIndices = np.asarray(startIndices, dtype=int)
+        uniqueTargets, targetInverse = np.unique(targetIndices, 
+                                                 return_inverse=True)
+        
+        reachArr = self.vertices.array["reachBound"]
+        lengthArr = self.edges.array["length"]
+        adjacency = self.get_adjacency_csr()
+        
+        targetSlots = np.full(reachArr.size, -1, dtype=int)
+        targetSlots[uniqueTargets] = np.arange(uniqueTargets.size)
+        
+        # distances between all vertices and the closest target; these
+        # serve as lower bounds for reach based pruning and are computed 
+        # once for all searches
+        targetDistances = find_set_distances(lengthArr, *adjacency, 
+                                             uniqueTargets, not forward, 
+                                             radixHeap)
+        
+        dists = np.empty((len(startIndices), len(targetIndices)))
+        
+        chunk_number = 5
+        min_chunk_size = 1
+        cpu_count = max(min(CPU_COUNT, len(startIndices) // 10), 1)
+        chunksize = max(min_chunk_size, len(startIndices)//
+                        (cpu_count*chunk_number))
+        
+        pool, (reachHandle, *adjacencyHandles, lengthHandle) = \
+            self._get_executor()
+        
+        printCounter = Counter(len(startIndices), 0.01)
+        
+        with pool.registered("targetSlots", targetSlots) as slotsHandle, \
+                pool.registered("targetDistances", 
+                                targetDistances) as targetDistancesHandle:
+            const_args = (reachHandle, lengthHandle, *adjacencyHandles, 
+                          slotsHandle, targetDistancesHandle, 
+                          uniqueTargets.size, forward)
+            
+            mapObj = pool.map(partial(find_shortest_distances_one_to_many,
+                                      radixHeap=radixHeap),
+                              startIndices, const_args=const_args,
+                              chunksize=chunksize)
+            
+            for i, distances in enumerate(mapObj):
+                percentage = printCounter.next()
+                if percentage is not None:
+                    self.prst(percentage, percent=True)
+                dists[i] = distances[targetInverse]
+        
+        self.decrease_print_level()
+        return dists
         
     def find_alternative_paths(self, fromIndices, toIndices, 
                                #fromVertexClassIndices=None,
@@ -1869,7 +3149,9 @@ class FlowPointGraph(FastGraph, HierarchichalPrinter, Lockable):
                                localOptimalityConstant=.2,  # alpha
                                acceptionFactor=2/3,
                                rejectionFactor=4/3,
-                               testing=False
+                               testing=False,
+                               outputDirectory=None,
+                               chunkSize=100000
                                ):            # 0: fast
                                                             # 1: complete
         
@@ -1931,37 +3213,57 @@ class FlowPointGraph(FastGraph, HierarchichalPrinter, Lockable):
         
         #closestSourceQueue = ThreadQueue()
         
-        cpu_count = min(CPU_COUNT, max(sinkNumber//10, 1))
-        const_args = [self.vertices.array, self.edges.array["length"], 
-                      self.edges.array["inspection"].astype(bool),
-                      self.edges.size, stretchConstant,
-                      localOptimalityConstant, closestSourceQueue]
-        
-        #for profiling only
-        const_args_tree = const_args
-        
-        taskLength = len(startIndices)
-        self.prst("Labelling vertices.")
-        self.increase_print_level()
-        
-        printCounter = Counter(taskLength, 0.005)
-        
-        labelData = []
-        
-        #vertexDistances = np.empty((self.vertices.size, 
-        #                            sourceNumber+sinkNumber))
-        #vertexDistances.fill(np.nan)
-        closestSourceDists = np.full(self.vertices.size, np.inf)
-        #sharedArgs = []
-        edgesVisitedSources = defaultdict(set)
-        edgesVisitedSinks = defaultdict(set)
-        
-        # task must be split to have the correct lower distence bounds
-        with ProcessPoolExecutor_ext(cpu_count, const_args) as pool:
-            mapObj = pool.map(FlowPointGraph._grow_bounded_tree,
+        # All stages use the persistent pool of the graph. Constant objects
+        # are sent to the workers only once and are referred to by handles 
+        # afterwards.
+        pool, (reachArr, neighborOffsets, neighborIndices, neighborEdges, 
+               lengthArr) = self._get_executor()
+        
+        # the pool is kept for later searches, but the objects registered for
+        # this search are removed from the workers when the search is 
+        # finished or fails
+        with ExitStack() as registrations:
+            def register(name, obj):
+                return registrations.enter_context(pool.registered(name, obj))
+            
+            def register_array(name, arr):
+                return registrations.enter_context(
+                                            pool.registered_array(name, arr))
+            
+            const_args = [reachArr, neighborOffsets, neighborIndices, 
+                          neighborEdges, lengthArr,
+                          register_array("inspection", 
+                              self.edges.array["inspection"].astype(bool).view(
+                                  np.uint8)), 
+                          stretchConstant, localOptimalityConstant, 
+                          register("closestSourceDistCommunicator",
+                                   closestSourceQueue)]
+            
+            #for profiling only
+            const_args_tree = list(map(pool.resolve, const_args))
+            
+            taskLength = len(startIndices)
+            self.prst("Labelling vertices.")
+            self.increase_print_level()
+            
+            printCounter = Counter(taskLength, 0.005)
+            
+            labelData = []
+            
+            #vertexDistances = np.empty((self.vertices.size, 
+            #                            sourceNumber+sinkNumber))
+            #vertexDistances.fill(np.nan)
+            closestSourceDists = np.full(self.vertices.size, np.inf)
+            #sharedArgs = []
+            edgesVisitedSources = defaultdict(set)
+            edgesVisitedSinks = defaultdict(set)
+            
+            # task must be split to have the correct lower distence bounds
+            mapObj = pool.map(grow_bounded_tree,
                               fromIndices, Repeater(True), min_source_dists,
-                              max_source_dists, chunksize=1)
-            #mapObj = pool.map(FlowPointGraph._grow_bounded_tree,
+                              max_source_dists, const_args=const_args, 
+                              chunksize=1)
+            #mapObj = pool.map(grow_bounded_tree,
             #                  itercount(), fromIndices, Repeater(True), Repeater(True), 
             #                  chunksize=1)
             decreaseThread = threading.Thread(
@@ -1974,138 +3276,147 @@ class FlowPointGraph(FastGraph, HierarchichalPrinter, Lockable):
                 percentageDone = printCounter.next()
                 if percentageDone:
                     self.prst(percentageDone, percent=True)
-                tree, edgesVisited = item
+                vertices, labels, edgesVisited = item
                 for s in edgesVisited:
                     edgesVisitedSources[s].add(i)
-                labelData.append(tree)
+                labelData.append((vertices, labels))
             
             closestSourceQueue.put(None)
             decreaseThread.join()
-        
-        self.prst("Processed sources. Now processing the sinks.")
-        const_args[-1] = closestSourceDists
-        with ProcessPoolExecutor_ext(cpu_count, const_args) as pool:
-            mapObj = pool.map(FlowPointGraph._grow_bounded_tree,
+            
+            self.prst("Processed sources. Now processing the sinks.")
+            const_args[-1] = register_array("closestSourceDistCommunicator",
+                                            closestSourceDists)
+            mapObj = pool.map(grow_bounded_tree,
                               toIndices, 
                               Repeater(False), min_sink_dists, max_sink_dists, 
-                              chunksize=5)
+                              const_args=const_args, chunksize=5)
             #                 tasklength=sinkNumber, min_chunksize=2)
             for i, item in enumerate(mapObj):
                 percentageDone = printCounter.next()
                 if percentageDone:
                     self.prst(percentageDone, percent=True)
-                tree, edgesVisited = item
+                vertices, labels, edgesVisited = item
                 for s in edgesVisited:
                     if s in edgesVisitedSources:
                         edgesVisitedSinks[s].add(i)
-                labelData.append(tree)
+                labelData.append((vertices, labels))
                 
-        #infty = closestSourceDists==np.inf
-        #print("infty-Elements", np.sum(infty))
-        #print("mean bound", np.mean(closestSourceDists[~infty]))
-        #print("median bound", np.median(closestSourceDists[~infty]))
-        
-        #print("TotalSum", sum(edgesVisitedString))
-        self.prst("Vertex labelling done.")
-        endTime = time.time()
-        testResults["time"]["labelling"] = endTime-startTime
-        self.prst("Labelling took {} seconds.".format(round(endTime-startTime, 2)))
-        startTime = endTime
-        self.decrease_print_level()
-        
-        
-        
-        consideredEdges = np.array(tuple(edgesVisitedSinks.keys()))
-        """
-        plateauPeakEdges = consideredEdges
-        print("Skip finding plateau peaks.")
-        """
-        plateauPeakEdges = self._find_plateau_peaks(consideredEdges, 
-                                                    edgesVisitedSources,
-                                                    edgesVisitedSinks)
-        #"""
-        
-        endTime = time.time()
-        testResults["result"]["number plateau peaks"] = len(plateauPeakEdges)
-        testResults["result"]["number labelled edges"] = len(consideredEdges)
-        testResults["time"]["plateau peaks"] = endTime-startTime
-        self.prst("Identifying plateau peaks took {} seconds.".format(round(endTime-startTime, 2)))
-        startTime = endTime
-        
-        lengths = self.edges.array["length"][plateauPeakEdges]
-        #print("Mean length", np.mean(lengths))
-        #print("50th, 60th, 70th, 80th, 90th, 95th  percentile", np.percentile(lengths, [50, 60, 70, 80, 90, 95]))
-        
-        self.prst("Noting the distances from the significant edges",
-                  "to all sources and sinks")
-        self.increase_print_level()
-        
-        
-        #print("plateau peaks:", len(plateauPeakEdges))
-        #print("unique plateau peaks:", len(np.unique(self.edges.array["toIndex"][plateauPeakEdges])))
-        
-        findPairProduct = lambda i: len(edgesVisitedSources[i])*len(edgesVisitedSinks[i])
-        order = np.argsort(tuple(map(findPairProduct, 
-                                     plateauPeakEdges)))
-        
-        
-        plateauPeakEdges = plateauPeakEdges[order[::-1]]
-        #print("DEBIND in plateauPeakEdges", DEBIND in plateauPeakEdges)
-        
-        
-        taskLength = len(plateauPeakEdges)
-        const_args = [labelData]
-        
-        sourceDistances = np.empty((taskLength, sourceNumber))
-        sinkDistances = np.empty((taskLength, sinkNumber))
-        printCounter = Counter(taskLength, 0.005)
-        
-        # we must only consider the toIndex of the edges,
-        # because the outer vertex might have been pruned in the 
-        # backwards labelling process and there the outer vertex is the
-        # fromVertex
-        
-        with ProcessPoolExecutor_ext(None, const_args) as pool:
+            #infty = closestSourceDists==np.inf
+            #print("infty-Elements", np.sum(infty))
+            #print("mean bound", np.mean(closestSourceDists[~infty]))
+            #print("median bound", np.median(closestSourceDists[~infty]))
+            
+            #print("TotalSum", sum(edgesVisitedString))
+            
+            # pack the trees in one block that can be shared with the workers
+            labelData = LabelTreeStore.from_trees(labelData)
+            labelHandles = [register_array(name, arr) for name, arr in zip(
+                                ("treeOffsets", "treeVertices", "treeLabels"), 
+                                labelData.get_arrays())]
+            
+            self.prst("Vertex labelling done.")
+            endTime = time.time()
+            testResults["time"]["labelling"] = endTime-startTime
+            self.prst("Labelling took {} seconds.".format(round(endTime-startTime, 2)))
+            startTime = endTime
+            self.decrease_print_level()
+            
+            
+            
+            consideredEdges = np.array(tuple(edgesVisitedSinks.keys()))
+            """
+            plateauPeakEdges = consideredEdges
+            print("Skip finding plateau peaks.")
+            """
+            plateauPeakEdges = self._find_plateau_peaks(consideredEdges, 
+                                                        edgesVisitedSources,
+                                                        edgesVisitedSinks)
+            #"""
+            
+            endTime = time.time()
+            testResults["result"]["number plateau peaks"] = len(plateauPeakEdges)
+            testResults["result"]["number labelled edges"] = len(consideredEdges)
+            testResults["time"]["plateau peaks"] = endTime-startTime
+            self.prst("Identifying plateau peaks took {} seconds.".format(round(endTime-startTime, 2)))
+            startTime = endTime
+            
+            lengths = self.edges.array["length"][plateauPeakEdges]
+            #print("Mean length", np.mean(lengths))
+            #print("50th, 60th, 70th, 80th, 90th, 95th  percentile", np.percentile(lengths, [50, 60, 70, 80, 90, 95]))
+            
+            self.prst("Noting the distances from the significant edges",
+                      "to all sources and sinks")
+            self.increase_print_level()
+            
+            
+            #print("plateau peaks:", len(plateauPeakEdges))
+            #print("unique plateau peaks:", len(np.unique(self.edges.array["toIndex"][plateauPeakEdges])))
+            
+            findPairProduct = lambda i: len(edgesVisitedSources[i])*len(edgesVisitedSinks[i])
+            order = np.argsort(tuple(map(findPairProduct, 
+                                         plateauPeakEdges)))
+            
+            
+            plateauPeakEdges = plateauPeakEdges[order[::-1]]
+            #print("DEBIND in plateauPeakEdges", DEBIND in plateauPeakEdges)
+            
+            
+            taskLength = len(plateauPeakEdges)
+            
+            sourceDistances = np.empty((taskLength, sourceNumber))
+            sinkDistances = np.empty((taskLength, sinkNumber))
+            printCounter = Counter(taskLength, 0.005)
+            
+            # we must only consider the toIndex of the edges,
+            # because the outer vertex might have been pruned in the 
+            # backwards labelling process and there the outer vertex is the
+            # fromVertex
+            
             mapObj = pool.map(FlowPointGraph._get_edge_source_sink_distances,
                               [edgesVisitedSources[e] for e in plateauPeakEdges],
                               [edgesVisitedSinks[e] for e in plateauPeakEdges],
                               self.edges.array["toIndex"][plateauPeakEdges],
                               repeat(sourceNumber), repeat(sinkNumber),
-                              tasklength=taskLength)
+                              const_args=labelHandles, tasklength=taskLength,
+                              adaptive=True)
             for i, distanceTuple in enumerate(mapObj):
                 percentageDone = printCounter.next()
                 if percentageDone:
                     self.prst(percentageDone, percent=True)
                 sourceDistances[i] = distanceTuple[0]
                 sinkDistances[i] = distanceTuple[1]
-        
-        endTime = time.time()
-        testResults["time"]["source sink distance preparation"] = endTime-startTime
-        self.prst("Noting distances to sources and sinks took {} seconds.".format(round(endTime-startTime, 2)))
-        startTime = endTime
-        self.decrease_print_level() 
-        
-        self.prst("Determining unique candidates per plateau.")
-        self.increase_print_level()
-        
-        roundNo = 8
-        taskLength = sourceNumber*sinkNumber
-        printCounter = Counter(taskLength, 0.005)
-        #sourceDistances = round_rel(sourceDistances, roundNo)
-        #sinkDistances = round_rel(sinkDistances, roundNo)
-        
-        const_args = (dists, sourceDistances, sinkDistances, 
-                      stretchConstant, 
-                      self.edges.array["toIndex"][plateauPeakEdges])
-        
-        dtype = [("source", np.long), ("sink", np.long), ("distance", float)]
-        pairData = defaultdict(lambda: FlexibleArray(500, dtype=dtype))
-        
-        pairVertexCount = 0
-        with ProcessPoolExecutor_ext(None, const_args) as pool:
+            
+            endTime = time.time()
+            testResults["time"]["source sink distance preparation"] = endTime-startTime
+            self.prst("Noting distances to sources and sinks took {} seconds.".format(round(endTime-startTime, 2)))
+            startTime = endTime
+            self.decrease_print_level() 
+            
+            self.prst("Determining unique candidates per plateau.")
+            self.increase_print_level()
+            
+            roundNo = 8
+            taskLength = sourceNumber*sinkNumber
+            printCounter = Counter(taskLength, 0.005)
+            #sourceDistances = round_rel(sourceDistances, roundNo)
+            #sinkDistances = round_rel(sinkDistances, roundNo)
+            
+            distsHandle = register_array("shortestDistances", dists)
+            const_args = (distsHandle, 
+                          register_array("sourceDistances", sourceDistances), 
+                          register_array("sinkDistances", sinkDistances), 
+                          stretchConstant, 
+                          register_array("candidates", 
+                              self.edges.array["toIndex"][plateauPeakEdges]))
+            
+            dtype = [("source", np.long), ("sink", np.long), ("distance", float)]
+            pairData = defaultdict(lambda: FlexibleArray(500, dtype=dtype))
+            
+            pairVertexCount = 0
             mapObj = pool.map(FlowPointGraph._find_vertexCandidates,
                 iterproduct(range(sourceNumber), range(sinkNumber)),
-                tasklength=taskLength)
+                const_args=const_args, tasklength=taskLength)
             for pair, res in zip(iterproduct(range(sourceNumber), 
                                              range(sinkNumber)), mapObj):
                 pairViaVertices, lengths = res
@@ -2115,117 +3426,125 @@ class FlowPointGraph(FastGraph, HierarchichalPrinter, Lockable):
                 for v, l in zip(pairViaVertices, lengths):
                     pairData[v].add_tuple((*pair, l)) 
                 pairVertexCount += len(pairViaVertices)
-        
-        self.prst("{} via candidates are left. ({} vertices per pair)".format(
-                len(pairData), pairVertexCount/sourceNumber/sinkNumber))
-        
-        self.decrease_print_level()
-        
-        endTime = time.time()
-        testResults["time"]["plateau peaks"] = endTime-startTime
-        testResults["result"]["number unique candidates"] = len(pairData)
-        testResults["result"]["number unique candidates pair"] = pairVertexCount
-        self.prst("Determining unique candidates per plateau took {} seconds.".format(round(endTime-startTime, 2)))
-        startTime = endTime
-        
-        self.prst("Checking the admissibility of the candidate vertices.")
-        taskLength = len(pairData)
-        
-        
-        self.increase_print_level()
-        
-        
-        printCounter = Counter(taskLength, 0.005)
-        chunksize = 40
-        if taskLength > 100:
-            cpu_count = None
-        else:
-            cpu_count = 1
-        
-        # We cannot use only the vertices, because if a vertex appears once 
-        # with sources 1, 2, 3 and sinks A, B  and once with 2, B, C, then
-        # merging sinks and sources would leave us with 1, 2, 3 times A, B, C.
-        # This could become a very disadvantageous increase in combinations.
-        # Furthermore, we only want to consider sources and sinks that reach
-        # the vertex from different directions. 
-        # Therefore, we can merge the vertices only, if we find a smart way
-        # to keep the number of considered pairs small.
-        
-        #cpu_count = 1 #!!!!!!!!
-        countVia = 0 #debug only
-        #countPrunedDouble = 0 #debug only
-        #countPrunedFar = 0 #debug only
-        countNotLO = 0 #debug only
-        disorder = np.arange(taskLength, dtype=int)
-        np.random.shuffle(disorder)
-        viaVertices = np.zeros((sourceNumber, sinkNumber), dtype=object)
-        
-        if testing:
-            pathLengths = []
-        else:
-            pathLengths = np.zeros((sourceNumber, sinkNumber), dtype=object)
-        viaVertexCount = np.zeros((sourceNumber, sinkNumber), dtype=int)
-        inspectedRoutes = defaultdict(lambda: defaultdict(list))
-        inspectionArr = self.edges.array["inspection"]
-        stationCombinations = defaultdict(list)
-        
-        viaCandidates = np.array(list(pairData.keys()))
-        viaData = np.array([arr.get_array() for arr in pairData.values()])
-        
-        const_args = [self.vertices.array, self.edges.array, dists, 
-                      labelData, viaData, localOptimalityConstant,
-                      acceptionFactor, rejectionFactor]
-        """
-        #DEBUG
-        for d, a in zip(disorder, self.edges.array["toIndex"][plateauPeakEdges[disorder]]):
-            print("bla", d)
-            FlowPointGraph.find_admissible_via_vertices(*const_args, d, a)
-        """
-        
-        
-        
-        ############################## Profiling ###############################
-        profiling = False
-        
-        if profiling:
+            
+            self.prst("{} via candidates are left. ({} vertices per pair)".format(
+                    len(pairData), pairVertexCount/sourceNumber/sinkNumber))
+            
+            self.decrease_print_level()
+            
+            endTime = time.time()
+            testResults["time"]["plateau peaks"] = endTime-startTime
+            testResults["result"]["number unique candidates"] = len(pairData)
+            testResults["result"]["number unique candidates pair"] = pairVertexCount
+            self.prst("Determining unique candidates per plateau took {} seconds.".format(round(endTime-startTime, 2)))
+            startTime = endTime
+            
+            self.prst("Checking the admissibility of the candidate vertices.")
+            taskLength = len(pairData)
+            
+            
+            self.increase_print_level()
+            
+            
+            printCounter = Counter(taskLength, 0.005)
+            
+            # We cannot use only the vertices, because if a vertex appears once 
+            # with sources 1, 2, 3 and sinks A, B  and once with 2, B, C, then
+            # merging sinks and sources would leave us with 1, 2, 3 times A, B, C.
+            # This could become a very disadvantageous increase in combinations.
+            # Furthermore, we only want to consider sources and sinks that reach
+            # the vertex from different directions. 
+            # Therefore, we can merge the vertices only, if we find a smart way
+            # to keep the number of considered pairs small.
+            
+            #cpu_count = 1 #!!!!!!!!
+            countVia = 0 #debug only
+            #countPrunedDouble = 0 #debug only
+            #countPrunedFar = 0 #debug only
+            countNotLO = 0 #debug only
+            
+            # if an output directory is given, the routes are written to a 
+            # RouteStore instead of being collected in memory
+            routeStore = None
+            if testing:
+                pathLengths = []
+            elif outputDirectory is not None:
+                routeStore = RouteStore(outputDirectory, (sourceNumber, sinkNumber),
+                                        chunkSize)
+            else:
+                viaVertices = np.zeros((sourceNumber, sinkNumber), dtype=object)
+                pathLengths = np.zeros((sourceNumber, sinkNumber), dtype=object)
+            viaVertexCount = np.zeros((sourceNumber, sinkNumber), dtype=int)
+            inspectedRoutes = defaultdict(lambda: defaultdict(list))
+            inspectionArr = self.edges.array["inspection"]
+            stationCombinations = defaultdict(list)
+            
+            viaCandidates = np.array(list(pairData.keys()))
+            viaData = np.array([arr.get_array() for arr in pairData.values()])
+            # the effort is approximately proportional to the number of pairs
+            viaCosts = [len(pairs) for pairs in viaData]
+            
+            const_args = [reachArr, lengthArr, neighborOffsets, neighborIndices,
+                          neighborEdges, distsHandle, 
+                          register("viaData", viaData), 
+                          localOptimalityConstant, acceptionFactor, 
+                          rejectionFactor]
             """
-            for index in 0, 1, 2:
-                profile = line_profiler.LineProfiler(FlowPointGraph._grow_bounded_tree)
-                profile.runcall(FlowPointGraph._grow_bounded_tree, *const_args_tree,
-                                toIndices[index], False, min_sink_dists[index],
-                                max_sink_dists[index])
-                profile.print_stats()
-                print("%" * 80)
-                print()
-                print("%" * 80)
+            #DEBUG
+            for d, a in enumerate(self.edges.array["toIndex"][plateauPeakEdges]):
+                print("bla", d)
+                FlowPointGraph.find_admissible_via_vertices(
+                                    *map(pool.resolve, const_args), 
+                                    *labelData.get_arrays(), d, a)
             """
             
-            print(viaCandidates.size)
-            for index in taskLength // 3, taskLength // 2, taskLength * 4 // 5, taskLength * 95 // 100, taskLength * 99 // 100, taskLength-1:
-                print("profiling find_admissible_via_vertices with index", index)
-                print(len(viaData[-index]), viaData)
-                #profile = line_profiler.LineProfiler(find_admissible_via_vertices)
-                profile = line_profiler.LineProfiler(FlowPointGraph.find_admissible_via_vertices)
-                #profile.runcall(find_admissible_via_vertices, self.vertices.array, self.edges.array, dists, 
-                profile.runcall(FlowPointGraph.find_admissible_via_vertices, *const_args, 
-                                viaData[-index],
-                                viaCandidates[-index])
-                profile.print_stats()
-                #profile.dump_stats("index"+str(index)+".lprof")
-                print("%" * 80)
-                print()
-                print("%" * 80)
             
-            sys.exit()
-            return 
-        
-        ########################################################################
-        with ProcessPoolExecutor_ext(cpu_count, const_args) as pool:
+            
+            ############################## Profiling ###############################
+            profiling = False
+            
+            if profiling:
+                """
+                for index in 0, 1, 2:
+                    profile = line_profiler.LineProfiler(grow_bounded_tree)
+                    profile.runcall(grow_bounded_tree, *const_args_tree,
+                                    toIndices[index], False, min_sink_dists[index],
+                                    max_sink_dists[index])
+                    profile.print_stats()
+                    print("%" * 80)
+                    print()
+                    print("%" * 80)
+                """
+                
+                print(viaCandidates.size)
+                for index in taskLength // 3, taskLength // 2, taskLength * 4 // 5, taskLength * 95 // 100, taskLength * 99 // 100, taskLength-1:
+                    print("profiling find_admissible_via_vertices with index", index)
+                    print(len(viaData[-index]), viaData)
+                    #profile = line_profiler.LineProfiler(find_admissible_via_vertices)
+                    profile = line_profiler.LineProfiler(FlowPointGraph.find_admissible_via_vertices)
+                    #profile.runcall(find_admissible_via_vertices, self.vertices.array, self.edges.array, dists, 
+                    profile.runcall(FlowPointGraph.find_admissible_via_vertices, 
+                                    *map(pool.resolve, const_args), 
+                                    *labelData.get_arrays(),
+                                    viaData[-index],
+                                    viaCandidates[-index])
+                    profile.print_stats()
+                    #profile.dump_stats("index"+str(index)+".lprof")
+                    print("%" * 80)
+                    print()
+                    print("%" * 80)
+                
+                sys.exit()
+                return 
+            
+            ########################################################################
+            # expensive candidates first; the order of the results is irrelevant
             mapObj = pool.map(FlowPointGraph.find_admissible_via_vertices,
-                              viaCandidates[disorder],
-                              disorder,
-                              tasklength=taskLength,
-                              chunksize=chunksize)
+                              viaCandidates,
+                              range(taskLength),
+                              const_args=[*const_args, *labelHandles],
+                              tasklength=taskLength, adaptive=True, 
+                              costs=viaCosts, ordered=False)
             for num in mapObj:
                 viaIndex, sourceIndices, sinkIndices, pathLengthsTmp, \
                                     res, notLO = num
@@ -2252,6 +3571,17 @@ class FlowPointGraph(FastGraph, HierarchichalPrinter, Lockable):
                                          inspectionArr)
                                      for sink in np.unique(sinkIndices)}
                 
+                if routeStore is not None:
+                    routeStore.append(
+                        sourceIndices*sinkNumber + sinkIndices, viaIndex, 
+                        pathLengthsTmp, 
+                        [routeStore.get_station_set_id(
+                            sourceInspections[sourceIndex].union(
+                                sinkInspections[sinkIndex]))
+                         for sourceIndex, sinkIndex in zip(sourceIndices, 
+                                                           sinkIndices)])
+                    continue
+                
                 for sourceIndex, sinkIndex, pathLength in zip(sourceIndices, 
                                                               sinkIndices, 
                                                               pathLengthsTmp):
@@ -2285,6 +3615,15 @@ class FlowPointGraph(FastGraph, HierarchichalPrinter, Lockable):
                     stationCombinations[frozenset(stations)].append(
                                             (sourceIndex, sinkIndex, pathIndex)
                                                                     )
+            
+            workerTimes = np.array(list(pool.get_worker_times().values()))
+        
+        if workerTimes.size:
+            busyFraction = workerTimes[:,0].sum() / max(workerTimes.sum(), 1e-10)
+            testResults["result"]["admissibility worker busy fraction"] = \
+                busyFraction
+            self.prst("The workers were busy {:.1%} of the time.".format(
+                                                                busyFraction))
         
         self.decrease_print_level()
         startTime = endTime
@@ -2353,13 +3692,21 @@ class FlowPointGraph(FastGraph, HierarchichalPrinter, Lockable):
         
         #"""
         
-        pathCounts = np.zeros_like(pathLengths, dtype=int)
-        for i, row in enumerate(pathLengths):
-            for j, item in enumerate(row):
-                if item:
-                    pathCounts[i, j] = len(item)
-                    if len(set(np.round(item, 7))) < len(item):
-                        print("double path", i, j , item)
+        if routeStore is None:
+            pathCounts = np.zeros_like(pathLengths, dtype=int)
+            for i, row in enumerate(pathLengths):
+                for j, item in enumerate(row):
+                    if item:
+                        pathCounts[i, j] = len(item)
+                        if len(set(np.round(item, 7))) < len(item):
+                            print("double path", i, j , item)
+        else:
+            routeStore.close()
+            self.prst("Building the results from the route store.")
+            pathLengths, inspectedRoutes, stationCombinations = \
+                RouteStore.get_results(outputDirectory)
+            pathCounts = np.diff(pathLengths.data.indptr).reshape(
+                                                    (sourceNumber, sinkNumber))
         """
         print("-----")
         for i in pathCounts.sum(0):
@@ -2378,8 +3725,8 @@ class FlowPointGraph(FastGraph, HierarchichalPrinter, Lockable):
         # some pairs have no via vertex at all. This should not be the case - 
         # at least the shortest path should always be included. Therefore, we
         # have to consider this case separately, if necessary.
-        if not pathLengths.all():
-            dSources, dSinks = np.nonzero(~pathLengths.astype(bool))
+        if not pathCounts.all():
+            dSources, dSinks = np.nonzero(~pathCounts.astype(bool))
             warnings.warn("Not all pairs are connected. " + str(len(dSources)))
             for so, si in zip(dSources, dSinks):
                 print("Disconnected:", so, self.sourceIndexToSourceID[so],
@@ -2399,7 +3746,8 @@ class FlowPointGraph(FastGraph, HierarchichalPrinter, Lockable):
                 # shortest path
             """
         #pathLengths[0,0]=0
-        pathLengths = csr_matrix_nd(pathLengths)
+        if routeStore is None:
+            pathLengths = csr_matrix_nd(pathLengths)
         
         
         
@@ -2418,38 +3766,41 @@ class FlowPointGraph(FastGraph, HierarchichalPrinter, Lockable):
                 return np.nonzero(self.vertices.array["ID"]==ID)[0][0]
             return np.nonzero(self.vertices.array["ID"][subset]==ID)[0][0]
         #              Calgary     Edmonton,  ON        GA        AL            ID      Spokane    CA
-        #for sourceID in b'1', b'18':
-        for sourceID in b'J54130', b'J54129', b'J54126', b'J54144', b'J54136', b'J54145', b'J54181', b'J54139', b'J54182':
-            #              Christina      Shuswap     Kalamalka Lake   Revelstoke L   Trout L         Bowron L      Okanagan        Lillooet
-            #for sinkID in b'L1', b'L4':
-            for sinkID in b'L329216611', b'L329518145', b'L329459117', b'L329484653', b'L329120715', b'L329058703', b'L329459116B', b'L329303443', b'L329291807':
-                try:
-                    sourceIndex = getVertexByID(sourceID, fromIndices)
-                    sinkIndex = getVertexByID(sinkID, toIndices)
-                    print("from", sourceID, "to", sinkID, ":", 
-                          *[v for v in self.vertices.array["ID"][
-                                        viaVertices[sourceIndex, sinkIndex]]])
-                    l = pathLengths[(sourceIndex, sinkIndex)].toarray()
-                    print(" - - - - - -", dists[sourceIndex, sinkIndex], "-",
-                          *[v for v in l[l>0]])
+        # the via vertices are not kept in memory, if the routes are written
+        # to a RouteStore
+        if routeStore is None:
+            #for sourceID in b'1', b'18':
+            for sourceID in b'J54130', b'J54129', b'J54126', b'J54144', b'J54136', b'J54145', b'J54181', b'J54139', b'J54182':
+                #              Christina      Shuswap     Kalamalka Lake   Revelstoke L   Trout L         Bowron L      Okanagan        Lillooet
+                #for sinkID in b'L1', b'L4':
+                for sinkID in b'L329216611', b'L329518145', b'L329459117', b'L329484653', b'L329120715', b'L329058703', b'L329459116B', b'L329303443', b'L329291807':
+                    try:
+                        sourceIndex = getVertexByID(sourceID, fromIndices)
+                        sinkIndex = getVertexByID(sinkID, toIndices)
+                        print("from", sourceID, "to", sinkID, ":", 
+                              *[v for v in self.vertices.array["ID"][
+                                            viaVertices[sourceIndex, sinkIndex]]])
+                        l = pathLengths[(sourceIndex, sinkIndex)].toarray()
+                        print(" - - - - - -", dists[sourceIndex, sinkIndex], "-",
+                              *[v for v in l[l>0]])
                     
                     
-                    for viaIndex in viaVertices[sourceIndex, sinkIndex]:
-                        print(" - - - - - -", self.vertices.array["ID"][viaIndex], ":")
-                        sourceInspections = FlowPointGraph._find_inspection_spots(
-                                             viaIndex, #labelData[sourceIndex][viaIndex]["parent"], 
-                                             labelData[sourceIndex], 
-                                             inspectionArr)
-                        sinkInspections = FlowPointGraph._find_inspection_spots(
-                                                 viaIndex, labelData[sinkIndex+sourceNumber], 
+                        for viaIndex in viaVertices[sourceIndex, sinkIndex]:
+                            print(" - - - - - -", self.vertices.array["ID"][viaIndex], ":")
+                            sourceInspections = FlowPointGraph._find_inspection_spots(
+                                                 viaIndex, #labelData[sourceIndex][viaIndex]["parent"], 
+                                                 labelData[sourceIndex], 
                                                  inspectionArr)
-                        print(" - - - - - - . . . sourceInspections:", 
-                              *[self.stationIndexToStationID[i] for i in sourceInspections])
-                        print(" - - - - - - . . . sinkInspections:", 
-                              *[self.stationIndexToStationID[i] for i in sinkInspections])
+                            sinkInspections = FlowPointGraph._find_inspection_spots(
+                                                     viaIndex, labelData[sinkIndex+sourceNumber], 
+                                                     inspectionArr)
+                            print(" - - - - - - . . . sourceInspections:", 
+                                  *[self.stationIndexToStationID[i] for i in sourceInspections])
+                            print(" - - - - - - . . . sinkInspections:", 
+                                  *[self.stationIndexToStationID[i] for i in sinkInspections])
                     
-                except Exception as e:
-                    print(e)
+                    except Exception as e:
+                        print(e)
         
         self.decrease_print_level() 
         
@@ -2492,182 +3843,6 @@ class FlowPointGraph(FastGraph, HierarchichalPrinter, Lockable):
             else:
                 return closestSourceDists
     
-    @staticmethod
-    def _grow_bounded_tree(vertexArr, lengthArr, inspectionArr, edgesSize, #can be removed
-                           stretchConstant, localOptimalityConstant, 
-                           closestSourceDistCommunicator, #treeIndex, 
-                           startIndex, forward, shortestShortestDist,
-                           longestShortestDist, 
-                           ):
-        """
-        DEBUG = vertexArr[startIndex]["ID"] == b'L329303670'
-        """
-        
-        edgesVisited = set()
-        #tolerance = 1e-11
-        rTol = 1+1e-7
-        
-        chunk = []
-        chunksize = 1000
-        if forward: 
-            closestSourceQueue = closestSourceDistCommunicator
-        else:
-            closestSourceDists = closestSourceDistCommunicator
-        
-        initSize = 25000
-        reachArr = vertexArr["reachBound"] 
-        if forward: 
-            neighborArr = vertexArr["successors"]
-        else:
-            neighborArr = vertexArr["predecessors"]
-        
-        queue = intquickheapdict(((startIndex, 0),), initSize=initSize)
-        
-        dataDtype = {"names":["parent", "edge", "cost", "parent_inspection"],
-                     "formats":["int", "int", "double", "int"]} 
-        
-        data = FlexibleArrayDict(initSize, dtype=dataDtype) 
-        data[startIndex] = (-1, -1, 0, -1)
-        #data = FlexibleArrayDictO(initSize, dtype=dataDtype) 
-        #data.setitem_by_keywords(startIndex, (-1, -1, 0))
-        
-        # if the triangle inequality holded for shortest paths, then we could 
-        # compute the bound as follows. However, 
-        # (1) the triangle inequality does not hold even for shortest paths,
-        #     since we have to work with a directed graph because lakes are
-        #     expanded objects
-        # (2) There is a better bound that cannot be combined with this bound.
-        #bound = longestShortestDist * (stretchConstant+1) / 2
-        
-        bound = (longestShortestDist * stretchConstant 
-                 * max(1-localOptimalityConstant, 0.5))
-        
-        while queue: 
-            thisVertex, thisCost = queue.popitem()
-            """
-            DEBUG2 = DEBUG and (vertexArr[thisVertex]["ID"] == b'64161' 
-                                or vertexArr[thisVertex]["ID"] == b'154099')
-            if DEBUG2:
-                print("DEBUG2", vertexArr[thisVertex]["ID"], "--------")
-            """
-            
-            pruned = (reachArr[thisVertex]*rTol < 
-                      min(thisCost, localOptimalityConstant/2 
-                          * max(thisCost, shortestShortestDist)))
-            
-            # set the vertex information
-            # However, we need only one overlapping vertex from the vertex 
-            # perspective. From the edge perspective we do need one overlapping
-            # edge, too, but not both its end points.
-            # therefore, we can save memory here by deleting the unnecessary
-            # end point.
-            edge = data[thisVertex]["edge"]
-            if edge >= 0: edgesVisited.add(edge)
-            """ # uncomment this, if some vertices are not to be allowed to be 
-                # via vertices
-            parent, edge, _, _ = data[thisVertex]
-            if forward: 
-                if edge >= 0 and potentialViaVertexArr[thisVertex]:
-                    edgesVisited[edge] = True
-            else:
-                if edge >= 0 and potentialViaVertexArr[parent]:
-                    edgesVisited[edge] = True
-            #vertexDists[thisVertex, treeIndex] = thisCost
-            """
-            
-            """
-            if DEBUG2 and pruned:
-                print("Pruned.")
-            """
-            if not forward and pruned:
-                del data[thisVertex]
-                continue
-            else:
-                data[thisVertex]["cost"] = thisCost
-                
-                if forward: 
-                    chunk.append((thisVertex, thisCost))
-                    if len(chunk) > chunksize:
-                        closestSourceQueue.put(chunk)
-                        chunk = []
-                
-                # prune, if necessary
-                if pruned:
-                    continue
-            
-            if inspectionArr[edge] and edge >= 0:
-                inspection = thisVertex
-            else:
-                inspection = data[thisVertex]["parent_inspection"]
-            
-            # the edge to this vertex must be considered (unless pruned)    
-            # even if the vertex is farther away than the bound. However,
-            # it does not need to be expanded.
-            if thisCost > bound:
-                """
-                if DEBUG2:
-                    print("thisCost > bound")
-                """
-                continue
-            
-                
-            # process successors
-            for neighbor, edge in neighborArr[thisVertex].items():
-                #print("neighbor")
-                newCost = thisCost + lengthArr[edge]
-                
-                # early pruning only from one side so that
-                # paths are always closed. 
-                # Furthermore, there are no 
-                # lower distance bounds in forward direction
-                if not forward:
-                    pruned = (reachArr[neighbor]*rTol <
-                              min(newCost, localOptimalityConstant/2 
-                                  * max(newCost, shortestShortestDist),
-                                  closestSourceDists[neighbor]))
-                    
-                    if pruned:
-                        #if reach < thisCost: 
-                        #    break    # ! This must be deleted, because the neighbors have different distances to the sources.
-                        #elif reach < newCost:
-                        """
-                        if DEBUG2:
-                            print("reach < newCost and reach < closestSourceDists[neighbor]",
-                                  vertexArr[neighbor]["ID"])
-                        """
-                        continue
-                
-                # if not pruned
-                neighborCost = queue.get(neighbor, -1.)
-                
-                if neighborCost >= 0:   # if neighbor is in the queue
-                    update = neighborCost > newCost*rTol
-                else:
-                    #check whether neighbor already scanned
-                    update = neighbor not in data
-                
-                """
-                if DEBUG2:
-                    print("Update", vertexArr[neighbor]["ID"], update, 
-                          neighborCost, newCost + tolerance, neighborCost-(newCost + tolerance))
-                """
-                
-                # reach < thisCost is the weakened early pruning #?????
-                if update: # and reach >= thisCost: ????
-                    data[neighbor] = (thisVertex, edge, np.inf, inspection)
-                    queue[neighbor] = newCost
-            
-        if forward:
-            closestSourceQueue.put(chunk)
-        data.cut()
-        return data, edgesVisited 
-        """
-        j = 0
-        for i in range(10000000000):
-            j = i
-        print("done2")
-        return 0, 0
-    #"""
     @staticmethod
     def _find_edge_superneighbours(edgeVisitedSources, edgeVisitedSinks,
                                    edgeIndex, predecessorEdges, successorEdges):
@@ -2687,7 +3862,7 @@ class FlowPointGraph(FastGraph, HierarchichalPrinter, Lockable):
         
         sources, sinks = edgeVisitedSources[edgeIndex], edgeVisitedSinks[edgeIndex]
         
-        for neighborEdgeIndex in predecessorEdges.values():
+        for neighborEdgeIndex in predecessorEdges:
             # recall that each edge in edgeVisitedSinks is also in 
             # edgeVisitedSources by construction
             if neighborEdgeIndex not in edgeVisitedSources:
@@ -2703,7 +3878,7 @@ class FlowPointGraph(FastGraph, HierarchichalPrinter, Lockable):
         else:
             predecessor = None
         
-        for neighborEdgeIndex in successorEdges.values():
+        for neighborEdgeIndex in successorEdges:
             # recall that each edge in edgeVisitedSinks is also in 
             # edgeVisitedSources by construction
             if neighborEdgeIndex not in edgeVisitedSources:
@@ -2724,12 +3899,17 @@ class FlowPointGraph(FastGraph, HierarchichalPrinter, Lockable):
     def _find_plateau_peaks(self, candidateEdges, edgesVisitedSources,
                             edgesVisitedSinks):
         
-        successorArr = self.vertices.array["successors"] 
-        predecessorArr = self.vertices.array["predecessors"] 
+        neighborOffsets, _, neighborEdges = self.get_adjacency_csr()
         
         vertexFromIndices = self.edges.array["fromIndex"]
         vertexToIndices = self.edges.array["toIndex"]
         
+        def get_neighbor_edges(vertexIndices, direction):
+            offsets = neighborOffsets[direction]
+            edges = neighborEdges[direction]
+            return [edges[offsets[i]:offsets[i+1]].tolist() 
+                    for i in vertexIndices]
+        
         
         plateauPeaks = []
         unprocessedCandidates = {}
@@ -2740,16 +3920,21 @@ class FlowPointGraph(FastGraph, HierarchichalPrinter, Lockable):
         self.increase_print_level()
         
         taskLength = len(edgesVisitedSinks)
-        const_args = (edgesVisitedSources, edgesVisitedSinks)
+        pool, _ = self._get_executor()
         
         printCounter = Counter(len(candidateEdges), 0.01)
         
-
-        with ProcessPoolExecutor_ext(None, const_args) as pool:
+        with pool.registered("edgesVisitedSources", 
+                             edgesVisitedSources) as sourcesHandle, \
+                pool.registered("edgesVisitedSinks", 
+                                edgesVisitedSinks) as sinksHandle:
             mapObj = pool.map(FlowPointGraph._find_edge_superneighbours,
                               candidateEdges,
-                              predecessorArr[vertexFromIndices[candidateEdges]], 
-                              successorArr[vertexToIndices[candidateEdges]], 
+                              get_neighbor_edges(
+                                  vertexFromIndices[candidateEdges], 1), 
+                              get_neighbor_edges(
+                                  vertexToIndices[candidateEdges], 0), 
+                              const_args=(sourcesHandle, sinksHandle), 
                               tasklength=taskLength)
             for edgeIndex, neighborTuple in zip(candidateEdges, mapObj):
                 percentageDone = printCounter.next()
@@ -2806,22 +3991,29 @@ class FlowPointGraph(FastGraph, HierarchichalPrinter, Lockable):
     """
     
     @staticmethod
-    def _get_edge_source_sink_distances(fbLabelData, edgeVisitedSources, 
+    def _get_edge_source_sink_distances(treeOffsets, treeVertices, treeLabels,
+                                        edgeVisitedSources, 
                                         edgeVisitedSinks, 
                                         vertexIndex, sourceNo, sinkNo):
+        fbLabelData = LabelTreeStore(treeOffsets, treeVertices, treeLabels)
+        costs = treeLabels["cost"]
         resultSources = np.full(sourceNo, np.nan)
         resultSinks = np.full(sinkNo, np.nan)
-        for s in edgeVisitedSources:
-            resultSources[s] = fbLabelData[s][vertexIndex]["cost"]
-        for s in edgeVisitedSinks:
-            resultSinks[s] = fbLabelData[s+sourceNo][vertexIndex]["cost"]
+        sources = np.fromiter(edgeVisitedSources, dtype=int, 
+                              count=len(edgeVisitedSources))
+        sinks = np.fromiter(edgeVisitedSinks, dtype=int, 
+                            count=len(edgeVisitedSinks))
+        resultSources[sources] = costs[fbLabelData.find_many(sources, 
+                                                             vertexIndex)]
+        resultSinks[sinks] = costs[fbLabelData.find_many(sinks+sourceNo, 
+                                                         vertexIndex)]
         return resultSources, resultSinks
     
     @staticmethod
     def _get_vertex_source_sink_distances(fbLabelData, vertexIndex):
         
-        return [(labelData.array[labelData.indexDict[vertexIndex]]["cost"]
-                 if vertexIndex in labelData.indexDict else np.nan)
+        return [(labelData[vertexIndex]["cost"]
+                 if vertexIndex in labelData else np.nan)
                 for labelData in fbLabelData]
     
     
@@ -2848,31 +4040,25 @@ class FlowPointGraph(FastGraph, HierarchichalPrinter, Lockable):
     
     @staticmethod
     def find_admissible_via_vertices(
-            vertexArr, edgeArr, shortestDistances, labelData, viaData,
+            reachArr, lengthArr, neighborOffsets, neighborIndices, 
+            neighborEdges, shortestDistances, viaData,
             localOptimalityConstant, acceptionFactor, rejectionFactor,
-            vertexIndex, viaIndex):
+            treeOffsets, treeVertices, treeLabels, vertexIndex, viaIndex):
         """
-        vertexArr
-                    Structured Array with the vertex information. Indexed by 
+        reachArr
+                    Array with the reach bounds of the vertices. Indexed by 
                     vertexIndex
-        edgeArr
-                    Structured Array with the edge information. Indexed by 
-                    edgeIndex
+        lengthArr
+                    Array with the edge lengths. Indexed by edgeIndex
+        neighborOffsets, neighborIndices, neighborEdges
+                    Adjacency structure of the graph in compressed sparse
+                    row format (see FastGraph.get_adjacency_csr)
         shortestDistances
                     2D double Array; has at [i,j] the distance from source i to 
                     sink j
                     i,j:    are the index of the source/sink in their 
                             respective lists and NOT the vertexIndices of the 
                             respective vertices!
-        labelData
-                    list of FlexibleArrayDicts 
-                    with fields ["parent", "edge", "cost"];
-                    has at [i][j] the distance of vertex j to source/sink i
-                    i:      number of the via vertex, NOT its vertex index
-                    j:      index of the source/sink in the source/sink list. 
-                            NOT the vertex index!
-                            If j is a sink, then the index in the sink list is
-                            given by j-SourceNumber
         localOptimalityConstant
                     search parameter
         acceptionFactor, rejectionFactor
@@ -2882,6 +4068,17 @@ class FlowPointGraph(FastGraph, HierarchichalPrinter, Lockable):
                     localOptimalityConstant*rejectFactor might be rejected.
                     Perfect results are obtained with the values being (1, 1)
                     A 2-approximation can be obtained with the values (2/3, 4/3)
+        treeOffsets, treeVertices, treeLabels
+                    Arrays of the LabelTreeStore with the labels of the 
+                    shortest path trees with fields ["parent", "edge", "cost",
+                    "parent_inspection"];
+                    has at [i][j] the label of vertex j in the tree of 
+                    source/sink i
+                    i:      index of the source/sink in the source/sink list. 
+                            NOT the vertex index!
+                            If i is a sink, then the index in the sink list is
+                            given by i-SourceNumber
+                    j:      vertex index
         candidateIndex
                     number of the via vertex (NOT its vertex index) that is to
                     be checked for admissibility w.r.t. all source/sink pairs
@@ -2892,6 +4089,8 @@ class FlowPointGraph(FastGraph, HierarchichalPrinter, Lockable):
         rTol = 1e-6
         rTolFact = 1+rTol
         
+        labelData = LabelTreeStore(treeOffsets, treeVertices, treeLabels)
+        
         DEBUG = False #vertexIndex==518959
         
         #========= Performing T-Tests ==========================================
@@ -2991,15 +4190,26 @@ class FlowPointGraph(FastGraph, HierarchichalPrinter, Lockable):
                 if rSLD is not None:
                     reverseData = {}
                     rSLD[endPoint] = reverseData
+                pathVertices = []
                 while cost >= stopCost and thisVertex >= 0:
                     parent, _, cost, _ = thisLabelData[thisVertex]
-                    if thisVertex not in visitedArr:
-                        visitedArr[thisVertex] = False
-                    visitedArr[thisVertex][endPoint] = True
+                    pathVertices.append(thisVertex)
                     
                     if rSLD is not None and parent >= 0:
                         reverseData[parent] = (thisVertex, cost)
                     thisVertex = parent
+                
+                # add the new vertices and mark the path in one batch
+                pathVertices = np.array(pathVertices, dtype=int)
+                pathIndices = visitedArr.find_internal_indices(pathVertices, 
+                                                               False)
+                new = pathIndices < 0
+                if new.any():
+                    pathIndices[new] = visitedArr.set_many(
+                        pathVertices[new], 
+                        np.zeros((np.sum(new), visitedArr.array.shape[1]), 
+                                 dtype=bool))
+                visitedArr.array[pathIndices, endPoint] = True
         
         sourcePointers = defaultdict(lambda: vertexIndex)
         
@@ -3193,7 +4403,10 @@ class FlowPointGraph(FastGraph, HierarchichalPrinter, Lockable):
                         
                     # if considered section is shortest path
                     #if (localDistBound + aTol >= compCost or 
-                    if (find_shortest_distance(vertexArr, edgeArr, 
+                    if (find_shortest_distance(reachArr, lengthArr, 
+                                               neighborOffsets, 
+                                               neighborIndices,
+                                               neighborEdges,
                                                sourceParent, sinkParent)
                          * rTolFact >= compCost):
                         #if localDist + aTol >= compCost:
@@ -8,7 +8,9 @@ Created on 05.07.2016
 ''' 
 
 cimport numpy as np 
-from vemomoto_core.npcollections.intquickheapdict cimport intquickheapdict, KEYVALUE
+from vemomoto_core.npcollections.intquickheapdict cimport intquickheapdict, \
+    intindexheapdict, KEYVALUE
+from vemomoto_core.npcollections.intradixheapdict cimport intradixheapdict
 from vemomoto_core.npcollections.npextc cimport FlexibleArray, FlexibleArrayDict 
 ctypedef np.long_t INT_DTYPE_t
 ctypedef np.double_t FLOAT_DTYPE_t
@@ -17,9 +19,57 @@ ctypedef np.uint8_t BOOL_DTYPE_t
         
     
 # self must actually be a FlowPointGraph... but for now it is ok
-cpdef FLOAT_DTYPE_t find_shortest_distance(np.ndarray vertexArr, 
-                                           np.ndarray edgeArr,
+cpdef FLOAT_DTYPE_t find_shortest_distance(const double[:] reachArr, 
+                                           const double[:] lengthArr,
+                                           const long[:, :] neighborOffsets,
+                                           const long[:, :] neighborIndices,
+                                           const long[:, :] neighborEdges,
                                            INT_DTYPE_t fromIndex, 
-                                           INT_DTYPE_t  toIndex)
+                                           INT_DTYPE_t toIndex,
+                                           double rTol=*)
+cpdef find_shortest_distances_batch(const double[:] reachArr, 
+                                    const double[:] lengthArr,
+                                    const long[:, :] neighborOffsets,
+                                    const long[:, :] neighborIndices,
+                                    const long[:, :] neighborEdges,
+                                    const long[:] fromIndices, 
+                                    const long[:] toIndices,
+                                    double rTol=*,
+                                    bint getPaths=*)
+cpdef np.ndarray find_set_distances(const double[:] lengthArr,
+                                    const long[:, :] neighborOffsets,
+                                    const long[:, :] neighborIndices,
+                                    const long[:, :] neighborEdges,
+                                    const long[:] startIndices,
+                                    bint forward=*,
+                                    bint radixHeap=*)
+cpdef np.ndarray find_shortest_distances_one_to_many(
+                                            const double[:] reachArr, 
+                                            const double[:] lengthArr,
+                                            const long[:, :] neighborOffsets,
+                                            const long[:, :] neighborIndices,
+                                            const long[:, :] neighborEdges,
+                                            const long[:] targetSlots,
+                                            const double[:] targetDistances,
+                                            long targetNumber,
+                                            bint forward,
+                                            INT_DTYPE_t fromIndex,
+                                            double rTol=*,
+                                            bint radixHeap=*)
+cpdef grow_bounded_tree(const double[:] reachArr, 
+                        const long[:, :] neighborOffsets,
+                        const long[:, :] neighborIndices,
+                        const long[:, :] neighborEdges,
+                        const double[:] lengthArr,
+                        const BOOL_DTYPE_t[:] inspectionArr,
+                        double stretchConstant, 
+                        double localOptimalityConstant, 
+                        closestSourceDistCommunicator,
+                        long startIndex, 
+                        bint forward, 
+                        double shortestShortestDist,
+                        double longestShortestDist,
+                        double rTol=*,
+                        long chunksize=*)
 cpdef in_sets(long[:] A, long[:] B, set s1, set s2, BOOL_DTYPE_t[:] result, 
                 INT_DTYPE_t offset)
\ No newline at end of file
@@ -8,11 +8,16 @@ Created on 05.07.2016
 
 from itertools import count as itercount
 
+from libc.math cimport INFINITY, NAN
+from libcpp.vector cimport vector
+
 import numpy as np
 cimport numpy as np 
 np.import_array() 
 
-from vemomoto_core.npcollections.intquickheapdict cimport intquickheapdict, KEYVALUE
+from vemomoto_core.npcollections.intquickheapdict cimport intquickheapdict, \
+    intindexheapdict, KEYVALUE
+from vemomoto_core.npcollections.intradixheapdict cimport intradixheapdict
 from vemomoto_core.npcollections.npextc cimport FlexibleArray, FlexibleArrayDict 
 from vemomoto_core.npcollections.FixedOrderedIntDict cimport FixedOrderedIntDict
 FLOAT_DTYPE = np.double
@@ -21,33 +26,74 @@ BOOL_DTYPE = np.uint8
 
 
 
-# self must actually be a FlowPointGraph... but for now it is ok
-cpdef FLOAT_DTYPE_t find_shortest_distance(np.ndarray vertexArr, 
-                                           np.ndarray edgeArr,
-                                           INT_DTYPE_t fromIndex, 
-                                           INT_DTYPE_t toIndex,
-                                           double rTol = 1+1e-7):
+cdef class _BidirectionalScratch(object):
+    """Labels and queues for the bidirectional searches of one process. 
+    Labels are stamped with the number of the search they belong to, so 
+    that they do not have to be cleared between the searches."""
     cdef:
-        long initSize = 2000
-        double[:] reachArr = vertexArr["reachBound"]
-        np.ndarray[object, ndim=1] successorArr = vertexArr["successors"]
-        np.ndarray[object, ndim=1] predecessorArr = vertexArr["predecessors"]
-        np.ndarray[object, ndim=1] neighborArr
-        double[:] lengthArr = edgeArr["length"]
-        FlexibleArrayDict forwardData
-        FlexibleArrayDict backwardData
-        FlexibleArrayDict thisData
-        FlexibleArrayDict oppositeData
-        intquickheapdict forwardQueue
-        intquickheapdict backwardQueue
-        intquickheapdict thisQueue
-        intquickheapdict oppositeQueue
+        long[:, :] stamps
+        double[:, :] costs
+        long[:, :] parents
+        long[:, :] parentEdges
+        intindexheapdict forwardQueue
+        intindexheapdict backwardQueue
+        long vertexNumber
+        long epoch
+        long meetingVertex
+    
+    def __init__(self, long vertexNumber):
+        self.stamps = np.zeros((2, vertexNumber), dtype=INT_DTYPE)
+        self.costs = np.empty((2, vertexNumber), dtype=FLOAT_DTYPE)
+        self.parents = np.empty((2, vertexNumber), dtype=INT_DTYPE)
+        self.parentEdges = np.empty((2, vertexNumber), dtype=INT_DTYPE)
+        self.forwardQueue = intindexheapdict(vertexNumber)
+        self.backwardQueue = intindexheapdict(vertexNumber)
+        self.vertexNumber = vertexNumber
+        self.epoch = 0
+        self.meetingVertex = -1
+
+cdef _BidirectionalScratch _bidirectionalScratch = None
+
+cdef _BidirectionalScratch _get_bidirectional_scratch(long vertexNumber):
+    global _bidirectionalScratch
+    if (_bidirectionalScratch is None 
+            or _bidirectionalScratch.vertexNumber != vertexNumber):
+        _bidirectionalScratch = _BidirectionalScratch(vertexNumber)
+    return _bidirectionalScratch
+
+cdef double _bidirectional_search(_BidirectionalScratch scratch,
+                                  const double[:] reachArr, 
+                                  const double[:] lengthArr,
+                                  const long[:, :] neighborOffsets,
+                                  const long[:, :] neighborIndices,
+                                  const long[:, :] neighborEdges,
+                                  long fromIndex, 
+                                  long toIndex,
+                                  double rTol) except? -1:
+    """Reach pruned bidirectional search between fromIndex and toIndex. 
+    Returns the distance; the vertex at which the best forward and 
+    backward paths meet is stored in scratch.meetingVertex, and the 
+    search trees are available in the label arrays of the scratch until
+    the next search."""
+    cdef:
+        long[:, :] stamps = scratch.stamps
+        double[:, :] costs = scratch.costs
+        long[:, :] parents = scratch.parents
+        long[:, :] parentEdges = scratch.parentEdges
+        intindexheapdict forwardQueue = scratch.forwardQueue
+        intindexheapdict backwardQueue = scratch.backwardQueue
+        intindexheapdict thisQueue
+        intindexheapdict oppositeQueue
+        long epoch
+        long direction
+        long opposite
         long  forwardVertex
         long  backwardVertex
         long  thisVertex
         long  neighbor
         long  edge
         long  i
+        long  meetingVertex
         double forwardCost
         double backwardCost
         double thisCost
@@ -61,33 +107,29 @@ cpdef FLOAT_DTYPE_t find_shortest_distance(np.ndarray vertexArr,
         double neighborCost
         bint update
         KEYVALUE nextVal
-        FixedOrderedIntDict neighborDict
         double aTol = 1e-10
-    #    short DEBUG = False
-        
     
-    forwardData = FlexibleArrayDict(initSize, 
-                                    dtype={"names":["cost", "parent", 
-                                                    "edge"],
-                                           "formats":[FLOAT_DTYPE, 
-                                                      INT_DTYPE, 
-                                                      INT_DTYPE]})
-    forwardData.setitem(fromIndex, (0, -1, -1))
+    scratch.epoch += 1
+    epoch = scratch.epoch
     
-    backwardData = FlexibleArrayDict(initSize, 
-                                     dtype={"names":["cost", "parent", 
-                                                     "edge"],
-                                            "formats":[FLOAT_DTYPE, 
-                                                       INT_DTYPE, 
-                                                       INT_DTYPE]})
-    backwardData.setitem(toIndex, (0, -1, -1))
+    stamps[0, fromIndex] = epoch
+    costs[0, fromIndex] = 0
+    parents[0, fromIndex] = -1
+    parentEdges[0, fromIndex] = -1
+    stamps[1, toIndex] = epoch
+    costs[1, toIndex] = 0
+    parents[1, toIndex] = -1
+    parentEdges[1, toIndex] = -1
     
-    forwardQueue = intquickheapdict(((fromIndex, 0),), initSize)
-    backwardQueue = intquickheapdict(((toIndex, 0),), initSize)
+    forwardQueue.reset()
+    backwardQueue.reset()
+    forwardQueue.setitem(fromIndex, 0)
+    backwardQueue.setitem(toIndex, 0)
     
     forwardVertex, forwardCost = fromIndex, 0
     backwardVertex, backwardCost = toIndex, 0
-    bestLength = np.inf
+    bestLength = INFINITY
+    meetingVertex = -1
     
     while bestLength > (forwardCost + backwardCost) * rTol:
         if forwardCost <= backwardCost:
@@ -96,126 +138,948 @@ cpdef FLOAT_DTYPE_t find_shortest_distance(np.ndarray vertexArr,
             thisVertex = forwardVertex
             thisCost = forwardCost
             oppositeCost = backwardCost
-            neighborArr = successorArr
-            thisData = forwardData
-            oppositeData = backwardData
-            #if debug: print(">", vertexArr["ID"][thisVertex], np.round(thisCost, 2), np.round(bestLength - (forwardCost + backwardCost) * rTol, 2))
+            direction = 0
         else:
             thisQueue = backwardQueue 
             oppositeQueue = forwardQueue
             thisVertex = backwardVertex
             thisCost = backwardCost
             oppositeCost = forwardCost
-            neighborArr = predecessorArr
-            thisData = backwardData
-            oppositeData = forwardData
-            #if debug: print("<", vertexArr["ID"][thisVertex], np.round(thisCost, 2), np.round(bestLength - (forwardCost + backwardCost) * rTol, 2))
-            
-        #DEBUG = debug and (thisVertex == 534719 or thisVertex == 535098)
-         
+            direction = 1
+        opposite = 1 - direction
+        
         # delete item from queue
-        #thisQueue.popitem()
         thisQueue.popitem_c() 
         
         # prune, if necessary (This step is necessary, since
         # early pruning is weakened in order to allow for the fancy
         # termination criterion
-        #if reachArr[thisVertex] * rTol < thisCost:
-        #    if DEBUG: print("pruned")
         if not reachArr[thisVertex] * rTol < thisCost:
             
-            #if DEBUG: print("not pruned")
-            
             # check whether the vertex has been labeled from the opposite 
             # side
             reverseCost = oppositeQueue.get(thisVertex, -1.)
             if reverseCost >= 0:                             # if yes
                 totalLength = thisCost + reverseCost
                 # update best path if necessary
-                #if DEBUG: print("update total length", reverseCost, totalLength, bestLength)
                 if totalLength + aTol < bestLength:
                     bestLength = totalLength
+                    meetingVertex = thisVertex
             
             # set the vertex cost           
-            thisData.getitem(thisVertex)["cost"] = thisCost
+            costs[direction, thisVertex] = thisCost
             
             # process successors
-            neighborDict = neighborArr[thisVertex]
-            #for neighbor, edge in neighborArr[thisVertex].items():
-            for i in range(neighborDict.len()):
-                neighbor = neighborDict.key_array_c[i]
-                edge = neighborDict.value_array_c[i]
+            for i in range(neighborOffsets[direction, thisVertex],
+                           neighborOffsets[direction, thisVertex+1]):
+                neighbor = neighborIndices[direction, i]
+                edge = neighborEdges[direction, i]
                 # early pruning
                 reach = reachArr[neighbor] * rTol
                 length = lengthArr[edge]
                 newCost = thisCost + length
-                #if DEBUG: print("neighbour", vertexArr["ID"][neighbor], thisCost, newCost, oppositeCost, reach)
                 if reach < oppositeCost:
-                    #if DEBUG: print("reach < oppositeCost", oppositeCost, reach, oppositeCost - reach)
                     if reach < thisCost:
-                        #if DEBUG: print("reach < thisCost", thisCost, reach, thisCost - reach)
                         break
                     elif reach < newCost:
-                        #if DEBUG: print("reach < newCost", newCost, reach, newCost - reach)
                         continue
                 
                 # if not pruned
                 neighborCost = thisQueue.get(neighbor, -1.)
-                #if DEBUG: print("neighborCost", neighborCost)
                 
                 if neighborCost >= 0:   # if neighbor is in the queue
                     if neighborCost > newCost + aTol:
-                        neighborData = thisData.getitem(neighbor)
-                        neighborData["parent"] = thisVertex
-                        neighborData["edge"] = edge
+                        parents[direction, neighbor] = thisVertex
+                        parentEdges[direction, neighbor] = edge
                         update = True
                     else:
                         update = False
+                #check whether neighbor already scanned
+                elif not stamps[direction, neighbor] == epoch:
+                    stamps[direction, neighbor] = epoch
+                    costs[direction, neighbor] = NAN
+                    parents[direction, neighbor] = thisVertex
+                    parentEdges[direction, neighbor] = edge
+                    update = True
                 else:
-                    #check whether neighbor already scanned
-                    if not thisData.indexDict.count(neighbor):
-                        thisData.setitem(neighbor, 
-                                         (np.nan, thisVertex, edge))
-                        update = True
-                    else:
-                        update = False
+                    update = False
                 
                 if update:
-                    #if DEBUG: print("update neighbour")
-                    thisQueue.setitem(neighbor, thisCost + length)
+                    thisQueue.setitem(neighbor, newCost)
                     
                     # check whether neighbor has been scanned from the
                     # opposite direction and update the best path 
                     # if necessary
-                    if oppositeData.indexDict.count(neighbor):
-                        reverseCost = oppositeData.getitem(neighbor)["cost"]
-                        if not np.isnan(reverseCost):
-                            totalLength = (thisCost + length 
-                                           + reverseCost)
+                    if stamps[opposite, neighbor] == epoch:
+                        reverseCost = costs[opposite, neighbor]
+                        if not reverseCost != reverseCost:  # not nan
+                            totalLength = newCost + reverseCost
                             if totalLength < bestLength:
                                 bestLength = totalLength
+                                meetingVertex = neighbor
         
         if bestLength > (forwardCost + backwardCost) * rTol:        
             if thisQueue.len():
+                nextVal = thisQueue.peekitem_c()
                 if forwardCost <= backwardCost:
-                    nextVal = thisQueue.peekitem_c()
                     forwardVertex, forwardCost = nextVal.key, nextVal.value
-                    #forwardVertex, forwardCost = thisQueue.peekitem()
                 else:
-                    #backwardVertex, backwardCost = thisQueue.peekitem()
-                    nextVal = thisQueue.peekitem_c()
-                    backwardVertex, backwardCost = nextVal.key, nextVal.value
+                    backwardVertex, backwardCost = (nextVal.key, 
+                                                    nextVal.value)
             else:
-                # warnings.warn
-                print("Vertices {} and {} are disconnected.".format(
-                    vertexArr[fromIndex]["ID"], 
-                    vertexArr[toIndex]["ID"]))
-                #print("Tree disconnected.", forwardCost, backwardCost)
-                #if backwardCost < forwardCost:
-                #    print(backwardQueue)
+                print("Vertices with indices {} and {} are disconnected."
+                      .format(fromIndex, toIndex))
                 break
+    
+    scratch.meetingVertex = meetingVertex
     return bestLength
+
+# self must actually be a FlowPointGraph... but for now it is ok
+cpdef FLOAT_DTYPE_t find_shortest_distance(const double[:] reachArr, 
+                                           const double[:] lengthArr,
+                                           const long[:, :] neighborOffsets,
+                                           const long[:, :] neighborIndices,
+                                           const long[:, :] neighborEdges,
+                                           INT_DTYPE_t fromIndex, 
+                                           INT_DTYPE_t toIndex,
+                                           double rTol = 1+1e-7):
+    """The adjacency structure neighborOffsets, neighborIndices, 
+    neighborEdges is given in compressed sparse row format as returned by
+    FastGraph.get_adjacency_csr. Row 0 contains the successors, row 1 the 
+    predecessors.
+    
+    The labels and queues are allocated once per process and reused by 
+    subsequent calls with a graph of the same size.
+    """
+    return _bidirectional_search(
+        _get_bidirectional_scratch(neighborOffsets.shape[1]-1), reachArr, 
+        lengthArr, neighborOffsets, neighborIndices, neighborEdges, 
+        fromIndex, toIndex, rTol)
+
+
+cpdef find_shortest_distances_batch(const double[:] reachArr, 
+                                    const double[:] lengthArr,
+                                    const long[:, :] neighborOffsets,
+                                    const long[:, :] neighborIndices,
+                                    const long[:, :] neighborEdges,
+                                    const long[:] fromIndices, 
+                                    const long[:] toIndices,
+                                    double rTol = 1+1e-7,
+                                    bint getPaths = False):
+    """Computes the shortest distances for all pairs 
+    (fromIndices[k], toIndices[k]) with the same bidirectional search as 
+    find_shortest_distance. 
+    
+    The labels and queues are allocated once for all pairs. Labels are 
+    stamped with the number of the search they belong to, so that they 
+    do not have to be cleared between the searches. 
+    
+    Returns the distance array. If getPaths is True, a list with the 
+    edge indices of the shortest paths (from start to end, shortcuts not
+    expanded) is returned as well.
+    """
+    cdef:
+        long pairNumber = fromIndices.shape[0]
+        _BidirectionalScratch scratch = _get_bidirectional_scratch(
+                                                neighborOffsets.shape[1]-1)
+        long[:, :] parents = scratch.parents
+        long[:, :] parentEdges = scratch.parentEdges
+        double[:] distances
+        long pair
+        long thisVertex
+    
+    result = np.empty(pairNumber, dtype=FLOAT_DTYPE)
+    distances = result
+    paths = []
+    
+    for pair in range(pairNumber):
+        distances[pair] = _bidirectional_search(
+            scratch, reachArr, lengthArr, neighborOffsets, neighborIndices, 
+            neighborEdges, fromIndices[pair], toIndices[pair], rTol)
+        
+        if getPaths:
+            path = []
+            if scratch.meetingVertex >= 0:
+                thisVertex = scratch.meetingVertex
+                while parentEdges[0, thisVertex] >= 0:
+                    path.append(parentEdges[0, thisVertex])
+                    thisVertex = parents[0, thisVertex]
+                path.reverse()
+                thisVertex = scratch.meetingVertex
+                while parentEdges[1, thisVertex] >= 0:
+                    path.append(parentEdges[1, thisVertex])
+                    thisVertex = parents[1, thisVertex]
+            paths.append(np.array(path, dtype=INT_DTYPE))
+    
+    if getPaths:
+        return result, paths
+    return result
+
+ctypedef fused QUEUE_t:
+    intquickheapdict
+    intradixheapdict
+
+cpdef np.ndarray find_set_distances(const double[:] lengthArr,
+                                    const long[:, :] neighborOffsets,
+                                    const long[:, :] neighborIndices,
+                                    const long[:, :] neighborEdges,
+                                    const long[:] startIndices,
+                                    bint forward=True, 
+                                    bint radixHeap=False):
+    """Computes for each vertex the distance from the closest start vertex 
+    (forward=True) or to the closest start vertex (forward=False). 
+    No pruning is applied, since the result serves as lower bound for 
+    reach based pruning in one-to-many searches.
+    If radixHeap=True, an intradixheapdict is used as priority queue 
+    instead of an intquickheapdict.
+    """
+    cdef:
+        long initSize = 2000
+        long i
+        intquickheapdict quickQueue
+        intradixheapdict radixQueue
+        double[:] distances
+    
+    result = np.full(neighborOffsets.shape[1]-1, np.inf)
+    distances = result
+    
+    if radixHeap:
+        radixQueue = intradixheapdict(initSize=distances.shape[0])
+        for i in range(startIndices.shape[0]):
+            radixQueue.setitem(startIndices[i], 0)
+        _grow_set_distances(radixQueue, lengthArr, neighborOffsets, 
+                            neighborIndices, neighborEdges, forward, 
+                            distances)
+    else:
+        quickQueue = intquickheapdict(initSize=initSize)
+        for i in range(startIndices.shape[0]):
+            quickQueue.setitem(startIndices[i], 0)
+        _grow_set_distances(quickQueue, lengthArr, neighborOffsets, 
+                            neighborIndices, neighborEdges, forward, 
+                            distances)
+    
+    return result
+
+cdef void _grow_set_distances(QUEUE_t queue,
+                              const double[:] lengthArr,
+                              const long[:, :] neighborOffsets,
+                              const long[:, :] neighborIndices,
+                              const long[:, :] neighborEdges,
+                              bint forward,
+                              double[:] distances) except *:
+    cdef:
+        long direction = 0 if forward else 1
+        long vertexNumber = neighborOffsets.shape[1]-1
+        long  thisVertex
+        long  neighbor
+        long  edge
+        long  i
+        double thisCost
+        double newCost
+        double neighborCost
+        KEYVALUE nextVal
+        BOOL_DTYPE_t[:] settled
+        double aTol = 1e-10
+    
+    settled = np.zeros(vertexNumber, dtype=BOOL_DTYPE)
+    
+    while queue.len():
+        nextVal = queue.popitem_c()
+        thisVertex, thisCost = nextVal.key, nextVal.value
+        distances[thisVertex] = thisCost
+        settled[thisVertex] = True
+        
+        for i in range(neighborOffsets[direction, thisVertex],
+                       neighborOffsets[direction, thisVertex+1]):
+            neighbor = neighborIndices[direction, i]
+            if settled[neighbor]:
+                continue
+            edge = neighborEdges[direction, i]
+            newCost = thisCost + lengthArr[edge]
+            neighborCost = queue.get(neighbor, -1.)
+            if neighborCost < 0 or neighborCost > newCost + aTol:
+                queue.setitem(neighbor, newCost)
+    
+
+cpdef np.ndarray find_shortest_distances_one_to_many(
+                                            const double[:] reachArr, 
+                                            const double[:] lengthArr,
+                                            const long[:, :] neighborOffsets,
+                                            const long[:, :] neighborIndices,
+                                            const long[:, :] neighborEdges,
+                                            const long[:] targetSlots,
+                                            const double[:] targetDistances,
+                                            long targetNumber,
+                                            bint forward,
+                                            INT_DTYPE_t fromIndex,
+                                            double rTol = 1+1e-7,
+                                            bint radixHeap=False):
+    """Computes the shortest distances from the vertex with index fromIndex
+    to all target vertices (or from all target vertices to fromIndex, if 
+    forward=False) with a single reach pruned search.
+    
+    targetSlots[v] is the position of vertex v in the result array or -1, 
+    if v is no target. targetDistances[v] must be a lower bound for the 
+    distance between v and the closest target (see find_set_distances).
+    A vertex v is pruned if its reach is smaller than both its distance
+    from fromIndex and targetDistances[v].
+    If radixHeap=True, an intradixheapdict is used as priority queue 
+    instead of an intquickheapdict.
+    """
+    cdef:
+        long initSize = 2000
+        intquickheapdict quickQueue
+        intradixheapdict radixQueue
+        double[:] distances
+    
+    result = np.full(targetNumber, np.inf)
+    distances = result
+    
+    if radixHeap:
+        radixQueue = intradixheapdict(((fromIndex, 0),), reachArr.shape[0])
+        _grow_one_to_many(radixQueue, reachArr, lengthArr, neighborOffsets, 
+                          neighborIndices, neighborEdges, targetSlots, 
+                          targetDistances, targetNumber, forward, rTol, 
+                          distances)
+    else:
+        quickQueue = intquickheapdict(((fromIndex, 0),), initSize)
+        _grow_one_to_many(quickQueue, reachArr, lengthArr, neighborOffsets, 
+                          neighborIndices, neighborEdges, targetSlots, 
+                          targetDistances, targetNumber, forward, rTol, 
+                          distances)
+    
+    return result
+
+cdef void _grow_one_to_many(QUEUE_t queue,
+                            const double[:] reachArr, 
+                            const double[:] lengthArr,
+                            const long[:, :] neighborOffsets,
+                            const long[:, :] neighborIndices,
+                            const long[:, :] neighborEdges,
+                            const long[:] targetSlots,
+                            const double[:] targetDistances,
+                            long targetNumber,
+                            bint forward,
+                            double rTol,
+                            double[:] distances) except *:
+    cdef:
+        long direction = 0 if forward else 1
+        long  thisVertex
+        long  neighbor
+        long  edge
+        long  i
+        long  slot
+        long  foundTargets = 0
+        double thisCost
+        double reach
+        double newCost
+        double neighborCost
+        KEYVALUE nextVal
+        set settled = set()
+        double aTol = 1e-10
+    
+    while queue.len() and foundTargets < targetNumber:
+        nextVal = queue.popitem_c()
+        thisVertex, thisCost = nextVal.key, nextVal.value
+        settled.add(thisVertex)
+        
+        slot = targetSlots[thisVertex]
+        if slot >= 0:
+            distances[slot] = thisCost
+            foundTargets += 1
+        
+        for i in range(neighborOffsets[direction, thisVertex],
+                       neighborOffsets[direction, thisVertex+1]):
+            neighbor = neighborIndices[direction, i]
+            edge = neighborEdges[direction, i]
+            newCost = thisCost + lengthArr[edge]
+            
+            # early pruning
+            reach = reachArr[neighbor] * rTol
+            if reach < newCost and reach < targetDistances[neighbor]:
+                continue
+            
+            if neighbor in settled:
+                continue
+            
+            neighborCost = queue.get(neighbor, -1.)
+            if neighborCost < 0 or neighborCost > newCost + aTol:
+                queue.setitem(neighbor, newCost)
     
+
+cdef class _BoundedTreeScratch(object):
+    """Label arrays for the bounded tree searches of one process. Entries
+    are valid only if their stamp equals the epoch of the current search,
+    so that the arrays do not have to be cleared between the searches."""
+    cdef:
+        long[:] vertexStamps
+        long[:] outputStamps
+        long[:] edgeStamps
+        long[:] parents
+        long[:] parentEdges
+        double[:] costs
+        long[:] parentInspections
+        intindexheapdict queue
+        long vertexNumber
+        long edgeNumber
+        long epoch
+    
+    def __init__(self, long vertexNumber, long edgeNumber):
+        self.vertexStamps = np.zeros(vertexNumber, dtype=INT_DTYPE)
+        self.outputStamps = np.zeros(vertexNumber, dtype=INT_DTYPE)
+        self.edgeStamps = np.zeros(edgeNumber, dtype=INT_DTYPE)
+        self.parents = np.empty(vertexNumber, dtype=INT_DTYPE)
+        self.parentEdges = np.empty(vertexNumber, dtype=INT_DTYPE)
+        self.costs = np.empty(vertexNumber, dtype=FLOAT_DTYPE)
+        self.parentInspections = np.empty(vertexNumber, dtype=INT_DTYPE)
+        self.queue = intindexheapdict(vertexNumber)
+        self.vertexNumber = vertexNumber
+        self.edgeNumber = edgeNumber
+        self.epoch = 0
+
+cdef _BoundedTreeScratch _boundedTreeScratch = None
+
+BOUNDED_TREE_DTYPE = np.dtype({"names":["parent", "edge", "cost", 
+                                        "parent_inspection"],
+                               "formats":["int", "int", "double", "int"]})
+
+cpdef grow_bounded_tree(const double[:] reachArr, 
+                        const long[:, :] neighborOffsets,
+                        const long[:, :] neighborIndices,
+                        const long[:, :] neighborEdges,
+                        const double[:] lengthArr,
+                        const BOOL_DTYPE_t[:] inspectionArr,
+                        double stretchConstant, 
+                        double localOptimalityConstant, 
+                        closestSourceDistCommunicator,
+                        long startIndex, 
+                        bint forward, 
+                        double shortestShortestDist,
+                        double longestShortestDist,
+                        double rTol=1+1e-7,
+                        long chunksize=1000):
+    """Labels the vertices of the bounded shortest path tree rooted at 
+    startIndex for find_alternative_paths. 
+    
+    In forward direction, closestSourceDistCommunicator is a queue to 
+    which chunks of (vertexIndex, cost) tuples are sent. In backward 
+    direction, it is the array of the distances from the closest source 
+    to each vertex.
+    
+    Returns the labelled vertex indices, a structured array 
+    (BOUNDED_TREE_DTYPE) with the labels of these vertices and an array 
+    with the indices of the visited edges.
+    """
+    global _boundedTreeScratch
+    cdef:
+        long vertexNumber = neighborOffsets.shape[1]-1
+        long edgeNumber = lengthArr.shape[0]
+        long direction = 0 if forward else 1
+        const double[:] closestSourceDists
+        _BoundedTreeScratch scratch
+        intindexheapdict queue
+        long[:] vertexStamps
+        long[:] outputStamps
+        long[:] edgeStamps
+        long[:] parents
+        long[:] parentEdges
+        double[:] costs
+        long[:] parentInspections
+        long epoch
+        long thisVertex
+        long neighbor
+        long edge
+        long inspection
+        long i
+        long j
+        long labelNumber
+        double thisCost
+        double newCost
+        double neighborCost
+        double bound
+        bint pruned
+        bint update
+        KEYVALUE nextVal
+        vector[long] labelledVertices
+        vector[long] visitedEdges
+        long[:] resultVertices
+        long[:] resultEdges
+        long[:] resultParents
+        long[:] resultParentEdges
+        double[:] resultCosts
+        long[:] resultParentInspections
+    
+    if (_boundedTreeScratch is None 
+            or _boundedTreeScratch.vertexNumber != vertexNumber
+            or _boundedTreeScratch.edgeNumber != edgeNumber):
+        _boundedTreeScratch = _BoundedTreeScratch(vertexNumber, edgeNumber)
+    scratch = _boundedTreeScratch
+    scratch.epoch += 1
+    epoch = scratch.epoch
+    queue = scratch.queue
+    queue.reset()
+    vertexStamps = scratch.vertexStamps
+    outputStamps = scratch.outputStamps
+    edgeStamps = scratch.edgeStamps
+    parents = scratch.parents
+    parentEdges = scratch.parentEdges
+    costs = scratch.costs
+    parentInspections = scratch.parentInspections
+    
+    if forward:
+        closestSourceQueue = closestSourceDistCommunicator
+        chunk = []
+    else:
+        closestSourceDists = closestSourceDistCommunicator
+    
+    queue.setitem(startIndex, 0)
+    vertexStamps[startIndex] = epoch
+    parents[startIndex] = -1
+    parentEdges[startIndex] = -1
+    costs[startIndex] = 0
+    parentInspections[startIndex] = -1
+    labelledVertices.push_back(startIndex)
+    
+    # see FlowPointGraph.find_alternative_paths for the choice of the bound
+    bound = (longestShortestDist * stretchConstant 
+             * max(1-localOptimalityConstant, 0.5))
+    
+    while queue.len():
+        nextVal = queue.popitem_c()
+        thisVertex = nextVal.key
+        thisCost = nextVal.value
+        
+        pruned = (reachArr[thisVertex]*rTol < 
+                  min(thisCost, localOptimalityConstant/2 
+                      * max(thisCost, shortestShortestDist)))
+        
+        edge = parentEdges[thisVertex]
+        if edge >= 0 and edgeStamps[edge] != epoch: 
+            edgeStamps[edge] = epoch
+            visitedEdges.push_back(edge)
+        
+        if not forward and pruned:
+            # delete the label; the vertex may be labelled again later
+            vertexStamps[thisVertex] = 0
+            continue
+        else:
+            costs[thisVertex] = thisCost
+            
+            if forward: 
+                chunk.append((thisVertex, thisCost))
+                if len(chunk) > chunksize:
+                    closestSourceQueue.put(chunk)
+                    chunk = []
+            
+            # prune, if necessary
+            if pruned:
+                continue
+        
+        if edge >= 0 and inspectionArr[edge]:
+            inspection = thisVertex
+        else:
+            inspection = parentInspections[thisVertex]
+        
+        # the edge to this vertex must be considered (unless pruned)    
+        # even if the vertex is farther away than the bound. However,
+        # it does not need to be expanded.
+        if thisCost > bound:
+            continue
+        
+        # process successors
+        for i in range(neighborOffsets[direction, thisVertex],
+                       neighborOffsets[direction, thisVertex+1]):
+            neighbor = neighborIndices[direction, i]
+            edge = neighborEdges[direction, i]
+            newCost = thisCost + lengthArr[edge]
+            
+            # early pruning only from one side so that
+            # paths are always closed. 
+            # Furthermore, there are no 
+            # lower distance bounds in forward direction
+            if not forward:
+                if (reachArr[neighbor]*rTol <
+                        min(newCost, localOptimalityConstant/2 
+                            * max(newCost, shortestShortestDist),
+                            closestSourceDists[neighbor])):
+                    continue
+            
+            neighborCost = queue.get(neighbor, -1.)
+            
+            if neighborCost >= 0:   # if neighbor is in the queue
+                update = neighborCost > newCost*rTol
+            else:
+                #check whether neighbor already scanned
+                update = vertexStamps[neighbor] != epoch
+            
+            if update:
+                if vertexStamps[neighbor] != epoch:
+                    vertexStamps[neighbor] = epoch
+                    labelledVertices.push_back(neighbor)
+                parents[neighbor] = thisVertex
+                parentEdges[neighbor] = edge
+                costs[neighbor] = np.inf
+                parentInspections[neighbor] = inspection
+                queue.setitem(neighbor, newCost)
+        
+    if forward:
+        closestSourceQueue.put(chunk)
+    
+    # collect the labels of the vertices that have not been deleted
+    labelNumber = 0
+    for j in range(labelledVertices.size()):
+        thisVertex = labelledVertices[j]
+        if (vertexStamps[thisVertex] == epoch 
+                and outputStamps[thisVertex] != epoch):
+            outputStamps[thisVertex] = epoch
+            labelledVertices[labelNumber] = thisVertex
+            labelNumber += 1
+    
+    vertices = np.empty(labelNumber, dtype=INT_DTYPE)
+    labels = np.empty(labelNumber, dtype=BOUNDED_TREE_DTYPE)
+    resultVertices = vertices
+    resultParents = labels["parent"]
+    resultParentEdges = labels["edge"]
+    resultCosts = labels["cost"]
+    resultParentInspections = labels["parent_inspection"]
+    for j in range(labelNumber):
+        thisVertex = labelledVertices[j]
+        resultVertices[j] = thisVertex
+        resultParents[j] = parents[thisVertex]
+        resultParentEdges[j] = parentEdges[thisVertex]
+        resultCosts[j] = costs[thisVertex]
+        resultParentInspections[j] = parentInspections[thisVertex]
+    
+    edgesVisited = np.empty(visitedEdges.size(), dtype=INT_DTYPE)
+    resultEdges = edgesVisited
+    for j in range(visitedEdges.size()):
+        resultEdges[j] = visitedEdges[j]
+    
+    return vertices, labels, edgesVisited
+
+cdef class LabelTreeStore(object):
+    """Vertex labels of many shortest path trees stored in compressed 
+    sparse row format.
+    
+    treeOffsets[i]:treeOffsets[i+1] is the slice of vertices and labels 
+    that belongs to tree i. Within each slice, the vertices are sorted, so 
+    that the label of a vertex can be found by binary search. The labels
+    are a structured array with dtype BOUNDED_TREE_DTYPE.
+    
+    Since the store consists of three plain arrays only, it can be placed
+    in shared memory and be reconstructed in worker processes without 
+    copying (see get_arrays).
+    """
+    cdef:
+        readonly np.ndarray treeOffsets
+        readonly np.ndarray vertices
+        readonly np.ndarray labels
+        const long[:] _treeOffsets
+        const long[:] _vertices
+    
+    def __init__(self, treeOffsets, vertices, labels):
+        self.treeOffsets = treeOffsets
+        self.vertices = vertices
+        self.labels = labels
+        self._treeOffsets = treeOffsets
+        self._vertices = vertices
+    
+    @staticmethod
+    def from_trees(trees):
+        """Creates a store from an iterable of (vertices, labels) tuples as 
+        returned by grow_bounded_tree."""
+        vertexList, labelList = zip(*trees)
+        sizes = np.fromiter(map(len, vertexList), dtype=INT_DTYPE,
+                            count=len(vertexList))
+        treeOffsets = np.zeros(sizes.size+1, dtype=INT_DTYPE)
+        np.cumsum(sizes, out=treeOffsets[1:])
+        vertices = np.concatenate(vertexList)
+        treeIndices = np.repeat(np.arange(sizes.size), sizes)
+        order = np.lexsort((vertices, treeIndices))
+        return LabelTreeStore(treeOffsets, vertices[order], 
+                              np.concatenate(labelList)[order])
+    
+    def get_arrays(self):
+        """Returns the arrays (treeOffsets, vertices, labels) the store 
+        consists of."""
+        return self.treeOffsets, self.vertices, self.labels
+    
+    cdef long find(self, long treeIndex, long vertexIndex):
+        """Returns the position of the label of vertex vertexIndex in 
+        tree treeIndex or -1, if the vertex has not been labelled."""
+        cdef:
+            long low = self._treeOffsets[treeIndex]
+            long high = self._treeOffsets[treeIndex+1]
+            long middle
+        while low < high:
+            middle = (low + high) >> 1
+            if self._vertices[middle] < vertexIndex:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self._treeOffsets[treeIndex+1] and \
+                self._vertices[low] == vertexIndex:
+            return low
+        return -1
+    
+    def find_many(self, treeIndices, long vertexIndex, bint check=True):
+        """Returns the positions of the labels of vertex vertexIndex in the
+        given trees. If check is True, trees in which the vertex has not 
+        been labelled raise a KeyError; otherwise they get the position 
+        -1."""
+        cdef:
+            np.ndarray treeArr = np.asarray(treeIndices, dtype=INT_DTYPE)
+            np.ndarray result = np.empty(treeArr.size, dtype=INT_DTYPE)
+            const long[:] trees_c = treeArr.ravel()
+            long[:] result_c = result
+            long i
+        
+        if treeArr.size and not (0 <= treeArr.min() 
+                                 and treeArr.max() < len(self)):
+            raise IndexError("Tree indices out of range.")
+        
+        for i in range(trees_c.shape[0]):
+            result_c[i] = self.find(trees_c[i], vertexIndex)
+            if check and result_c[i] < 0:
+                raise KeyError(vertexIndex)
+        return result.reshape(np.shape(treeArr))
+    
+    def __len__(self):
+        return self._treeOffsets.shape[0] - 1
+    
+    def __getitem__(self, long treeIndex):
+        if treeIndex < 0:
+            treeIndex += len(self)
+        if not 0 <= treeIndex < len(self):
+            raise IndexError("Tree index " + str(treeIndex) 
+                             + " out of range.")
+        return LabelTree(self, treeIndex)
+    
+    def __reduce__(self):
+        return LabelTreeStore, self.get_arrays()
+    
+cdef class LabelTree(object):
+    """Read-only view on the labels of one tree of a LabelTreeStore. 
+    Indexing the tree with a vertex index returns the label of the vertex 
+    as a record with the fields of BOUNDED_TREE_DTYPE."""
+    cdef:
+        LabelTreeStore store
+        long treeIndex
+    
+    def __init__(self, LabelTreeStore store, long treeIndex):
+        self.store = store
+        self.treeIndex = treeIndex
+    
+    def __getitem__(self, long vertexIndex):
+        cdef long position = self.store.find(self.treeIndex, vertexIndex)
+        if position < 0:
+            raise KeyError(vertexIndex)
+        return self.store.labels[position]
+    
+    def __contains__(self, long vertexIndex):
+        return self.store.find(self.treeIndex, vertexIndex) >= 0
+    
+    def get(self, long vertexIndex, default=None):
+        cdef long position = self.store.find(self.treeIndex, vertexIndex)
+        if position < 0:
+            return default
+        return self.store.labels[position]
+    
+    def __len__(self):
+        return (self.store._treeOffsets[self.treeIndex+1]
+                - self.store._treeOffsets[self.treeIndex])
+
+cdef class OriginTree(object):
+    """Shortest path tree rooted at an origin that is grown on demand.
+    
+    The search from the origin stops as soon as the requested target has
+    been settled and is resumed by later queries, so that repeated queries
+    from the same origin do not repeat the search. The adjacency structure
+    is given as returned by FastGraph.get_adjacency_csr. Shortcut edges are
+    expanded with the edge fields originalEdge1 and originalEdge2 (-1 for
+    original edges).
+    
+    If targetDistances is given, targetDistances[v] must be a lower bound
+    for the distance between v and the closest target (see
+    find_set_distances), and the vertices are pruned as in
+    find_shortest_distances_one_to_many. Then the distances and paths are
+    exact for the targets only.
+    
+    The labels are stamped with the number of the current origin, so that
+    the tree can be reused for another origin (see set_origin) without
+    clearing or reallocating the arrays.
+    """
+    cdef:
+        const double[:] reachArr
+        const double[:] lengthArr
+        const long[:, :] neighborOffsets
+        const long[:, :] neighborIndices
+        const long[:, :] neighborEdges
+        const long[:] edgeFromIndices
+        const long[:] originalEdge1Arr
+        const long[:] originalEdge2Arr
+        const double[:] targetDistances
+        bint prune
+        double rTol
+        long[:] settledStamps
+        long[:] parentEdges
+        double[:] costs
+        intindexheapdict queue
+        vector[long] stack
+        vector[long] path
+        long epoch
+        readonly long vertexNumber
+        readonly long origin
+        readonly long settledNumber
+    
+    def __init__(self, const double[:] reachArr,
+                 const double[:] lengthArr,
+                 const long[:, :] neighborOffsets,
+                 const long[:, :] neighborIndices,
+                 const long[:, :] neighborEdges,
+                 const long[:] edgeFromIndices,
+                 const long[:] originalEdge1Arr,
+                 const long[:] originalEdge2Arr,
+                 targetDistances=None,
+                 double rTol=1+1e-7):
+        self.reachArr = reachArr
+        self.lengthArr = lengthArr
+        self.neighborOffsets = neighborOffsets
+        self.neighborIndices = neighborIndices
+        self.neighborEdges = neighborEdges
+        self.edgeFromIndices = edgeFromIndices
+        self.originalEdge1Arr = originalEdge1Arr
+        self.originalEdge2Arr = originalEdge2Arr
+        self.prune = targetDistances is not None
+        if self.prune:
+            self.targetDistances = targetDistances
+        self.rTol = rTol
+        self.vertexNumber = neighborOffsets.shape[1]-1
+        self.settledStamps = np.zeros(self.vertexNumber, dtype=INT_DTYPE)
+        self.parentEdges = np.empty(self.vertexNumber, dtype=INT_DTYPE)
+        self.costs = np.empty(self.vertexNumber, dtype=FLOAT_DTYPE)
+        self.queue = intindexheapdict(self.vertexNumber)
+        self.epoch = 0
+        self.origin = -1
+        self.settledNumber = 0
+    
+    cdef void _check_index(self, long vertexIndex) except *:
+        if not 0 <= vertexIndex < self.vertexNumber:
+            raise IndexError("Vertex index " + str(vertexIndex)
+                             + " out of range.")
+    
+    cpdef void set_origin(self, long origin) except *:
+        """Discards the current tree and starts a new tree at origin."""
+        self._check_index(origin)
+        self.epoch += 1
+        self.origin = origin
+        self.settledNumber = 0
+        self.queue.reset()
+        self.queue.setitem(origin, 0)
+        self.parentEdges[origin] = -1
+    
+    cdef bint _grow(self, long target) except *:
+        """Continues the search until target has been settled. Returns
+        False, if target cannot be reached."""
+        cdef:
+            long epoch = self.epoch
+            long[:] settledStamps = self.settledStamps
+            long[:] parentEdges = self.parentEdges
+            intindexheapdict queue = self.queue
+            long thisVertex
+            long neighbor
+            long edge
+            long i
+            double thisCost
+            double newCost
+            double neighborCost
+            double reach
+            KEYVALUE nextVal
+            double aTol = 1e-10
+        
+        if settledStamps[target] == epoch:
+            return True
+        
+        while queue.len():
+            nextVal = queue.popitem_c()
+            thisVertex, thisCost = nextVal.key, nextVal.value
+            settledStamps[thisVertex] = epoch
+            self.costs[thisVertex] = thisCost
+            self.settledNumber += 1
+            
+            # the vertex is expanded before the search is interrupted, so
+            # that the search can be resumed later
+            for i in range(self.neighborOffsets[0, thisVertex],
+                           self.neighborOffsets[0, thisVertex+1]):
+                neighbor = self.neighborIndices[0, i]
+                if settledStamps[neighbor] == epoch:
+                    continue
+                edge = self.neighborEdges[0, i]
+                newCost = thisCost + self.lengthArr[edge]
+                
+                # early pruning
+                if self.prune:
+                    reach = self.reachArr[neighbor] * self.rTol
+                    if reach < newCost and reach < self.targetDistances[
+                                                                    neighbor]:
+                        continue
+                
+                neighborCost = queue.get(neighbor, -1.)
+                if neighborCost < 0 or neighborCost > newCost + aTol:
+                    queue.setitem(neighbor, newCost)
+                    parentEdges[neighbor] = edge
+            
+            if thisVertex == target:
+                return True
+        
+        return False
+    
+    cpdef double get_distance(self, long target) except? -1:
+        """Returns the distance from the origin to target."""
+        self._check_index(target)
+        if self._grow(target):
+            return self.costs[target]
+        return INFINITY
+    
+    cpdef np.ndarray get_path(self, long target):
+        """Returns the indices of the edges on the shortest path from the
+        origin to target, in which all shortcuts are expanded to the
+        original edges. The path is empty, if target cannot be reached."""
+        cdef:
+            long thisVertex
+            long edge
+            long j
+            long[:] resultView
+        
+        self._check_index(target)
+        if not self._grow(target):
+            return np.empty(0, dtype=INT_DTYPE)
+        
+        # the tree edges are put on the stack from the target to the
+        # origin, so that the first edge of the path is on top
+        self.stack.clear()
+        self.path.clear()
+        thisVertex = target
+        while thisVertex != self.origin:
+            edge = self.parentEdges[thisVertex]
+            self.stack.push_back(edge)
+            thisVertex = self.edgeFromIndices[edge]
+        
+        while not self.stack.empty():
+            edge = self.stack.back()
+            self.stack.pop_back()
+            if self.originalEdge1Arr[edge] >= 0:
+                self.stack.push_back(self.originalEdge2Arr[edge])
+                self.stack.push_back(self.originalEdge1Arr[edge])
+            else:
+                self.path.push_back(edge)
+        
+        result = np.empty(self.path.size(), dtype=INT_DTYPE)
+        resultView = result
+        for j in range(self.path.size()):
+            resultView[j] = self.path[j]
+        return result
+
 from collections import deque
 def find_shortest_path(np.ndarray vertexArr, 
                                            np.ndarray edgeArr,
@@ -3,13 +3,24 @@ Created on 03.01.2017
 
 @author: Samuel
 '''
-from concurrent.futures import ProcessPoolExecutor as conc_ProcessPoolExecutor
-from concurrent.futures.process import _ExceptionWithTraceback, _get_chunks, _ResultItem
+from concurrent.futures import ProcessPoolExecutor as conc_ProcessPoolExecutor, \
+    as_completed
+from concurrent.futures.process import _ExceptionWithTraceback, _ResultItem
 from functools import partial
+from collections import namedtuple
+from contextlib import contextmanager
 import multiprocessing
 import itertools
 import os
+import ctypes
+import mmap
+import pickle
+import shutil
+import tempfile
+import time
+import weakref
 import numpy as np
+import numpy.lib.recfunctions as rfn
 from multiprocessing import sharedctypes
 CPU_COUNT = os.cpu_count() 
 
@@ -20,6 +31,70 @@ def get_cpu_chunk_counts(task_length, chunk_number=5, min_chunk_size=1):
     chunk_size = max(min_chunk_size, task_length // (cpu_count*chunk_number))
     return cpu_count, chunk_size
 
+def _new_shared_array(shape, dtype):
+    """Returns a ctypes array in shared memory and a numpy view on it."""
+    dtype = np.dtype(dtype)
+    # initializing the shared array with data would copy them element by 
+    # element
+    ctypes_arr = sharedctypes.RawArray('b', int(np.prod(shape))*dtype.itemsize)
+    view = np.ctypeslib.as_array(ctypes_arr).view(dtype).reshape(shape)
+    return ctypes_arr, view
+
+def _get_shared_buffer(arr):
+    """Returns the shared ctypes array or memory map arr is a view of, or
+    None, if arr does not lie in shared memory."""
+    base = arr
+    while base is not None:
+        if isinstance(base, (ctypes.Array, mmap.mmap)):
+            return base
+        if isinstance(base, np.memmap) and base.mode == "c":
+            # changes to copy-on-write maps are private to each process
+            return None
+        if isinstance(base, memoryview):
+            base = base.obj
+        else:
+            base = getattr(base, "base", None)
+    return None
+
+def _attach_shared_array(entry):
+    arr, offset, dtype, shape, strides = entry
+    if offset is None:
+        # memory map inherited by the forked worker
+        return arr
+    return np.ndarray(shape, dtype, buffer=arr, offset=offset, 
+                      strides=strides)
+
+def to_shared_array(arr, fields=None):
+    """Copies arr into shared memory. 
+    
+    Structured arrays are reduced to the given fields, which must not have 
+    object dtype, and repacked. By default, all fields without object dtype
+    are kept. The result can be passed to ProcessPoolExecutor in 
+    shared_np_arrs without being copied again. Record arrays stay record 
+    arrays."""
+    if arr.dtype.names is not None:
+        if fields is None:
+            fields = [field for field in arr.dtype.names 
+                      if not arr.dtype[field].hasobject]
+        else:
+            fields = list(fields)
+            for field in fields:
+                if arr.dtype[field].hasobject:
+                    raise ValueError("Field " + str(field) + " has object "
+                                     + "dtype and cannot be shared.")
+        arr = arr[fields]
+        dtype = rfn.repack_fields(arr.dtype)
+    elif arr.dtype.hasobject:
+        raise ValueError("Arrays with object dtype cannot be shared.")
+    else:
+        dtype = arr.dtype
+    
+    _, view = _new_shared_array(arr.shape, dtype)
+    view[...] = arr
+    if isinstance(arr, np.recarray):
+        return view.view(np.recarray)
+    return view
+
 def _process_worker(call_queue, result_queue, const_args=[], shared_arrays=[]):
     """Evaluates calls from call_queue and places the results in result_queue.
 
@@ -34,8 +109,7 @@ def _process_worker(call_queue, result_queue, const_args=[], shared_arrays=[]):
             worker that it should exit when call_queue is empty.
     """
     
-    shared_arrays_np = [np.ctypeslib.as_array(arr).view(dtype).reshape(shape) 
-                        for arr, dtype, shape in shared_arrays]
+    shared_arrays_np = [_attach_shared_array(entry) for entry in shared_arrays]
     
     
     while True:
@@ -66,37 +140,99 @@ def _process_chunk(fn, chunk, const_args, shared_arrays):
     """
     return [fn(*const_args, *shared_arrays, *args) for args in chunk]
 
+def _process_chunk_timed(fn, chunk, const_args, shared_arrays):
+    """Processes a chunk like _process_chunk and returns the process ID and 
+    the start and end time of the computation along with the results."""
+    start = time.time()
+    results = _process_chunk(fn, chunk, const_args, shared_arrays)
+    return os.getpid(), start, time.time(), results
+
+def _get_guided_chunk_sizes(task_length, worker_count, chunk_number=5, 
+                            min_chunk_size=1, max_chunk_size=None):
+    """Yields chunk sizes that start with the fraction 
+    1/(worker_count*chunk_number) of the tasks and shrink proportionally 
+    to the number of remaining tasks, so that the workers finish at 
+    approximately the same time. If task_length has been underestimated, 
+    the remaining tasks are split into chunks of size min_chunk_size."""
+    remaining = task_length
+    while remaining > 0:
+        size = max(min_chunk_size, 
+                   -(-remaining // (worker_count*chunk_number)))
+        if max_chunk_size:
+            size = min(size, max_chunk_size)
+        yield size
+        remaining -= size
+    yield from itertools.repeat(min_chunk_size)
+
+def _get_cost_guided_chunk_sizes(costs, worker_count, chunk_number=5, 
+                                 min_chunk_size=1, max_chunk_size=None):
+    """Like _get_guided_chunk_sizes, but the chunks comprise fractions of 
+    the remaining total cost rather than of the remaining number of tasks.
+    costs are the costs of the tasks in the order of processing."""
+    cumulative_costs = np.cumsum(costs)
+    total = cumulative_costs[-1] if cumulative_costs.size else 0
+    done = 0
+    position = 0
+    while position < cumulative_costs.size:
+        target = done + (total-done) / (worker_count*chunk_number)
+        size = max(min_chunk_size, 
+                   np.searchsorted(cumulative_costs, target, "right")-position)
+        if max_chunk_size:
+            size = min(size, max_chunk_size)
+        yield size
+        position += size
+        done = cumulative_costs[min(position, cumulative_costs.size)-1]
+
+def _get_chunks(tasks, chunk_sizes):
+    it = iter(tasks)
+    for size in chunk_sizes:
+        chunk = tuple(itertools.islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
 
 
 class ProcessPoolExecutor(conc_ProcessPoolExecutor):
     '''
     classdocs 
     '''
-
+    
     def __init__(self, max_workers=None, const_args=[], shared_np_arrs=[]):
         '''
         Constructor
         '''
         super().__init__(max_workers)
         self._const_args = const_args
+        self._worker_pids = []
+        self._busy_times = {}
+        self._map_start_time = self._last_end_time = time.time()
         shared_arrays_ctype = []
         shared_arrays_np = []
         
-        # TODO do not create copy of shared array, if it already has a suitable 
-        # data structure
+        fork = multiprocessing.get_start_method() == "fork"
         for arr in shared_np_arrs:
-            dtype = arr.dtype
-            arrShared = np.empty(arr.size*dtype.itemsize, np.int8)
-            arrShared = np.ctypeslib.as_ctypes(arrShared)
-            ctypes_arr = sharedctypes.RawArray(arrShared._type_, arrShared)
-            shared_arrays_ctype.append((ctypes_arr, arr.dtype, arr.shape))
-            view = np.ctypeslib.as_array(ctypes_arr).view(arr.dtype).reshape(
-                                                                    arr.shape)
-            view[:] = arr
-            shared_arrays_np.append(view)
+            buffer = _get_shared_buffer(arr)
+            if isinstance(buffer, ctypes.Array):
+                # the workers attach to the same memory block
+                offset = (arr.__array_interface__["data"][0] 
+                          - ctypes.addressof(buffer))
+                shared_arrays_ctype.append((buffer, offset, arr.dtype, 
+                                            arr.shape, arr.strides))
+                shared_arrays_np.append(arr)
+            elif buffer is not None and fork:
+                # shared memory maps are inherited by the workers
+                shared_arrays_ctype.append((arr, None, None, None, None))
+                shared_arrays_np.append(arr)
+            else:
+                ctypes_arr, view = _new_shared_array(arr.shape, arr.dtype)
+                view[...] = arr
+                shared_arrays_ctype.append((ctypes_arr, 0, arr.dtype, 
+                                            arr.shape, None))
+                shared_arrays_np.append(view)
         self._shared_arrays_np = shared_arrays_np
         self._shared_arrays = shared_arrays_ctype
-        
+    
     def _adjust_process_count(self):
         for _ in range(len(self._processes), self._max_workers):
             p = multiprocessing.Process(
@@ -107,11 +243,12 @@ class ProcessPoolExecutor(conc_ProcessPoolExecutor):
                           self._shared_arrays))
             p.start()
             self._processes[p.pid] = p    
-            
+    
     def map(self, fn, *iterables, timeout=None, chunksize=None, 
-            tasklength=None, chunknumber=5, min_chunksize=1):
+            tasklength=None, chunknumber=5, min_chunksize=1, adaptive=False,
+            costs=None, ordered=True):
         """Returns an iterator equivalent to map(fn, iter).
-
+        
         Args:
             fn: A callable that will take as many arguments as there are
                 passed iterables.
@@ -120,43 +257,366 @@ class ProcessPoolExecutor(conc_ProcessPoolExecutor):
             chunksize: If greater than one, the iterables will be chopped into
                 chunks of size chunksize and submitted to the process pool.
                 If set to one, the items in the list will be sent one at a time.
+                If adaptive is True, chunksize is the maximal chunk size.
             tasklength: length of the iterable. If provided, the cpu count
                 and the chunksize will be adjusted approprietly, if they are not
                 explicietely given.
+            chunknumber: number of chunks per worker if the chunk size is
+                determined from tasklength. If adaptive is True, the first
+                chunk comprises 1/(chunknumber*workers) of the tasks.
+            min_chunksize: minimal size of the chunks.
+            adaptive: If True, the chunks shrink proportionally to the 
+                number of remaining tasks, so that the tasks at the end of
+                the queue are distributed evenly among the workers.
+            costs: Estimates of the computational cost of the tasks. If given,
+                the tasks are processed in the order of decreasing cost. If 
+                adaptive is True, the chunks are then formed based on the 
+                remaining cost rather than the number of remaining tasks.
+            ordered: If False, the results are returned in the order in which
+                they are computed rather than in the order of the tasks.
         Returns:
             An iterator equivalent to: map(func, *iterables) but the calls may
             be evaluated out-of-order.
-
+        
         Raises:
             TimeoutError: If the entire result iterator could not be generated
                 before the given timeout.
             Exception: If fn(*args) raises for any values.
         """
+        tasks = zip(*iterables)
+        order = None
+        if costs is not None:
+            tasks = list(tasks)
+            # stable sort, so that tasks with equal costs keep their order
+            order = np.argsort(-np.asarray(costs, dtype=float), kind="stable")
+            if not order.size == len(tasks):
+                raise ValueError("The number of costs (" + str(order.size) 
+                                 + ") does not match the number of tasks ("
+                                 + str(len(tasks)) + ").")
+            tasks = [tasks[i] for i in order]
+        
         tmp_max_workers = self._max_workers
         if tasklength and tasklength > 0:
             cpu_count, chunksize_tmp = get_cpu_chunk_counts(tasklength, 
                                                             chunknumber,
                                                             min_chunksize)
-            if not chunksize:
+            if not chunksize and not adaptive:
                 chunksize = chunksize_tmp
-                
+            
             self._max_workers = cpu_count
         
-        if not chunksize:
-            chunksize = 1
+        if adaptive:
+            if chunksize is not None and chunksize < 1:
+                raise ValueError("chunksize must be >= 1.")
+            task_number = tasklength
+            if not task_number:
+                tasks = list(tasks)
+                task_number = len(tasks)
+            worker_count = len(self._processes) or self._max_workers
+            if order is None:
+                chunk_sizes = _get_guided_chunk_sizes(task_number, 
+                                                      worker_count, 
+                                                      chunknumber, 
+                                                      min_chunksize,
+                                                      chunksize)
+            else:
+                chunk_sizes = _get_cost_guided_chunk_sizes(
+                    np.asarray(costs, dtype=float)[order], worker_count, 
+                    chunknumber, min_chunksize, chunksize)
+        else:
+            if not chunksize:
+                chunksize = 1
+            
+            if chunksize < 1:
+                raise ValueError("chunksize must be >= 1.")
+            chunk_sizes = itertools.repeat(chunksize)
         
-        if chunksize < 1:
-            raise ValueError("chunksize must be >= 1.")
+        if timeout is not None:
+            end_time = timeout + time.monotonic()
         
-        results = super(conc_ProcessPoolExecutor, self).map(partial(_process_chunk, fn),
-                              _get_chunks(*iterables, chunksize=chunksize),
-                              timeout=timeout)
+        self._map_start_time = time.time()
+        self._busy_times = {}
+        self._last_end_time = self._map_start_time
+        
+        fs = []
+        offset = 0
+        for chunk in _get_chunks(tasks, chunk_sizes):
+            future = self.submit(partial(_process_chunk_timed, fn), chunk)
+            future.offset = offset
+            fs.append(future)
+            offset += len(chunk)
         
         self._max_workers = tmp_max_workers 
+        if self._processes:
+            self._worker_pids = list(self._processes)
+        
+        def note_times(future):
+            pid, start, end, results = future.result()
+            self._busy_times[pid] = self._busy_times.get(pid, 0) + end-start
+            self._last_end_time = max(self._last_end_time, end)
+            return results
         
-        return itertools.chain.from_iterable(results)
+        # Yield must be hidden in closure so that the futures are submitted
+        # before the first iterator value is required.
+        def result_iterator():
+            try:
+                if not ordered:
+                    for future in as_completed(fs, timeout):
+                        yield from note_times(future)
+                    return
+                
+                # reverse to keep finishing order
+                fs.reverse()
+                buffer = {}
+                position = 0
+                while fs:
+                    # Careful not to keep a reference to the popped future
+                    if timeout is None:
+                        fs[-1].result()
+                    else:
+                        fs[-1].result(end_time - time.monotonic())
+                    future = fs.pop()
+                    if order is None:
+                        yield from note_times(future)
+                        continue
+                    # restore the order of the tasks
+                    for i, result in zip(order[future.offset:], 
+                                         note_times(future)):
+                        buffer[i] = result
+                    while position in buffer:
+                        yield buffer.pop(position)
+                        position += 1
+            finally:
+                for future in fs:
+                    future.cancel()
+        
+        return result_iterator()
     
+    def get_worker_times(self):
+        """Returns a dictionary with the time in seconds each worker spent
+        computing tasks and the time it was idle during the last call of 
+        :py:meth:`map`. The dictionary maps the process IDs of the workers
+        to tuples (busy, idle). The idle time is measured from the call of 
+        map until the last task was finished and also comprises the time 
+        the results were transferred."""
+        total = self._last_end_time - self._map_start_time
+        return {pid:(self._busy_times.get(pid, 0), 
+                     max(total-self._busy_times.get(pid, 0), 0))
+                for pid in self._worker_pids}
     
     def get_shared_arrays(self):
         return self._shared_arrays_np
+
+
+ObjectHandle = namedtuple("ObjectHandle", ["name", "version"])
+ObjectHandle.__doc__ = """Reference to a version of an object registered 
+at a PersistentProcessPoolExecutor."""
+
+# registry of the worker process (set by _persistent_process_worker)
+_worker_registry = None
+
+class _WorkerRegistry(object):
+    """Objects registered at a PersistentProcessPoolExecutor as seen by one 
+    of its workers. New objects and versions are received via the 
+    worker's control queue."""
+    
+    def __init__(self, control_queue):
+        self.control_queue = control_queue
+        self.objects = {}
+    
+    def receive(self, block=True):
+        name, version, kind, payload = self.control_queue.get(block)
+        if kind == "pickle":
+            obj = pickle.loads(payload)
+        elif kind == "array":
+            try:
+                # plain view, so that results derived from the array are 
+                # not memmap instances
+                obj = np.load(payload, mmap_mode="r").view(np.ndarray)
+            except FileNotFoundError:
+                # the version has been replaced and its file removed
+                # before the worker received it
+                self.objects.pop(name, None)
+                return
+        else:
+            self.objects.pop(name, None)
+            return
+        self.objects[name] = (version, obj)
+    
+    def get(self, handle):
+        while True:
+            version, obj = self.objects.get(handle.name, (0, None))
+            if version == handle.version:
+                return obj
+            if version > handle.version:
+                raise RuntimeError("Version " + str(handle.version) 
+                                   + " of object " + str(handle.name) 
+                                   + " has been replaced by version " 
+                                   + str(version) + ".")
+            self.receive()
+    
+    def resolve(self, arg):
+        if isinstance(arg, ObjectHandle):
+            return self.get(arg)
+        return arg
+
+def _persistent_process_worker(call_queue, result_queue, control_queue,
+                               shared_arrays=[]):
+    """Evaluates calls from call_queue like _process_worker and resolves
+    the object handles in the arguments with the objects received via 
+    control_queue."""
+    global _worker_registry
+    _worker_registry = _WorkerRegistry(control_queue)
+    _process_worker(call_queue, result_queue, [], shared_arrays)
+
+def _call_with_registry_args(fn, const_args, *args):
+    resolve = _worker_registry.resolve
+    return fn(*map(resolve, const_args), *map(resolve, args))
+
+class PersistentProcessPoolExecutor(ProcessPoolExecutor):
+    '''
+    Process pool that is meant to be kept alive over several stages of a 
+    computation. 
+    
+    Constant objects are registered under a name with :py:meth:`register`
+    or :py:meth:`register_array` and sent to each worker only once. 
+    Registering an object again under the same name creates a new version
+    that replaces the old one in the workers. The returned 
+    :py:class:`ObjectHandle` can be passed to :py:meth:`map` instead of 
+    the object, either in ``const_args`` or in the iterables, and is 
+    replaced by the object in the worker.
+    
+    Tasks must not refer to a version of an object that has been replaced
+    before the tasks have been processed.
+    '''
+    
+    def __init__(self, max_workers=None, shared_np_arrs=[]):
+        super().__init__(max_workers, [], shared_np_arrs)
+        self._control_queues = {}
+        # name -> (version, object, kind, payload)
+        self._registry = {}
+        self._tmpdir = None
+        self._fileCounter = itertools.count()
+        # versions are unique over all names and registrations, so that a 
+        # handle never matches an unregistered object of the same name
+        self._versionCounter = itertools.count(1)
+    
+    def _adjust_process_count(self):
+        for _ in range(len(self._processes), self._max_workers):
+            control_queue = multiprocessing.Queue()
+            for name, (version, _, kind, payload) in self._registry.items():
+                control_queue.put((name, version, kind, payload))
+            p = multiprocessing.Process(
+                    target=_persistent_process_worker,
+                    args=(self._call_queue,
+                          self._result_queue,
+                          control_queue,
+                          self._shared_arrays))
+            p.start()
+            self._processes[p.pid] = p
+            self._control_queues[p.pid] = control_queue
+    
+    def _send(self, name, obj, kind, payload):
+        version = next(self._versionCounter)
+        self._remove_file(name)
+        self._registry[name] = (version, obj, kind, payload)
+        for control_queue in self._control_queues.values():
+            control_queue.put((name, version, kind, payload))
+        return ObjectHandle(name, version)
+    
+    def _remove_file(self, name):
+        """Removes the file of an array registered under name. Workers
+        that have mapped the file keep their map."""
+        _, _, kind, payload = self._registry.get(name, (0, None, None, None))
+        if kind == "array":
+            try:
+                os.remove(payload)
+            except FileNotFoundError:
+                pass
+    
+    def register(self, name, obj):
+        """Sends obj to the workers and returns a handle to it. The object
+        is pickled once and unpickled once per worker."""
+        return self._send(name, obj, "pickle", 
+                          pickle.dumps(obj, pickle.HIGHEST_PROTOCOL))
+    
+    def register_array(self, name, arr):
+        """Shares a numpy array without object fields with the workers and 
+        returns a handle to it. The array is written to a temporary file
+        that the workers map into memory read-only, so that it is not 
+        copied per worker."""
+        if self._tmpdir is None:
+            self._tmpdir = tempfile.mkdtemp(prefix="executor_")
+            # remove the files also if the pool is not shut down properly
+            self._tmpdirFinalizer = weakref.finalize(self, shutil.rmtree, 
+                                                     self._tmpdir, True)
+        fileName = os.path.join(self._tmpdir, 
+                                "{}.npy".format(next(self._fileCounter)))
+        np.save(fileName, arr)
+        return self._send(name, arr, "array", fileName)
+    
+    def unregister(self, name):
+        """Removes the object registered under name from the workers."""
+        self._remove_file(name)
+        version = self._registry.pop(name)[0]
+        for control_queue in self._control_queues.values():
+            control_queue.put((name, version, None, None))
+    
+    def _unregister_version(self, handle):
+        # a newer version registered under the same name is kept
+        if self._registry.get(handle.name, (None,))[0] == handle.version:
+            self.unregister(handle.name)
+    
+    @contextmanager
+    def registered(self, name, obj):
+        """Registers obj like :py:meth:`register` for the duration of a 
+        ``with`` block and yields the handle. The object is unregistered 
+        when the block is left, also if an exception occurs. Results of 
+        :py:meth:`map` must be consumed within the block."""
+        handle = self.register(name, obj)
+        try:
+            yield handle
+        finally:
+            self._unregister_version(handle)
+    
+    @contextmanager
+    def registered_array(self, name, arr):
+        """Like :py:meth:`registered`, but shares arr like 
+        :py:meth:`register_array`."""
+        handle = self.register_array(name, arr)
+        try:
+            yield handle
+        finally:
+            self._unregister_version(handle)
+    
+    def resolve(self, arg):
+        """Returns the registered object if arg is a handle and arg 
+        otherwise."""
+        if isinstance(arg, ObjectHandle):
+            version, obj, _, _ = self._registry[arg.name]
+            if not version == arg.version:
+                raise ValueError("Version " + str(arg.version) 
+                                 + " of object " + str(arg.name) 
+                                 + " is not registered anymore.")
+            return obj
+        return arg
+    
+    def map(self, fn, *iterables, const_args=(), **mapArgs):
+        """Like :py:meth:`ProcessPoolExecutor.map`, but fn is called as 
+        ``fn(*const_args, *shared_arrays, *args)``, where all 
+        :py:class:`ObjectHandle` instances in const_args and args are 
+        replaced by the registered objects."""
+        return super().map(partial(_call_with_registry_args, fn, 
+                                   tuple(const_args)), 
+                           *iterables, **mapArgs)
     
+    def shutdown(self, wait=True):
+        super().shutdown(wait)
+        for control_queue in self._control_queues.values():
+            control_queue.cancel_join_thread()
+            control_queue.close()
+        self._control_queues = {}
+        self._registry = {}
+        if self._tmpdir is not None:
+            self._tmpdirFinalizer()
+            self._tmpdir = None
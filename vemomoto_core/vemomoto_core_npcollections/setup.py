@@ -28,6 +28,7 @@ def my_build_ext(pars):
 extnames = [
     'npextc',
     'intquickheapdict',
+    'intradixheapdict',
     'FixedOrderedIntDict'
     ]
 
@@ -54,6 +55,7 @@ setup(
     cmdclass={'build_ext' : my_build_ext},
     setup_requires=['numpy'],
     install_requires=['numpy', 'scipy', 'vemomoto_core_tools'], 
+    extras_require={'arrow': ['pyarrow']},
     packages=['vemomoto_core', PACKAGEADD[:-1]],
     ext_modules=extensions,
     package_data={
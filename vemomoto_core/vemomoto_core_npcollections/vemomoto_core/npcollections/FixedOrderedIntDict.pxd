@@ -15,12 +15,16 @@ cdef class FixedOrderedIntDict(object):
         long[:] value_array_c
         readonly np.ndarray key_array
         readonly np.ndarray value_array
+        np.ndarray sorted_keys
+        np.ndarray sorted_positions
     cpdef object items(self)
     cpdef long[:] keys(self)
     cpdef long[:] values(self)
     cdef long len(self)
     cdef bint contains(self, item)
     cdef long getitem(self, key)
+    cdef void __sort_keys(self)
+    cdef np.ndarray find_positions(self, keys, bint check)
     cdef void __set_attributes(self, dict itemdict, 
                                np.ndarray key_array, 
                                np.ndarray value_array)
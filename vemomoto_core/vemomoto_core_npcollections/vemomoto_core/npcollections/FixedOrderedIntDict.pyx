@@ -90,6 +90,60 @@ cdef class FixedOrderedIntDict(object):
     def __iter__(self):
         return self.items()
     
+    cdef void __sort_keys(self):
+        self.sorted_positions = np.argsort(self.key_array, kind="stable")
+        self.sorted_keys = self.key_array[self.sorted_positions]
+    
+    cdef np.ndarray find_positions(self, keys, bint check):
+        cdef:
+            np.ndarray keyArr, positions, found
+            long size = len(self.key_array)
+        
+        if self.sorted_keys is None:
+            self.__sort_keys()
+        
+        keyArr = np.asarray(keys, dtype=INT_DTYPE)
+        if size:
+            positions = np.minimum(np.searchsorted(self.sorted_keys, keyArr),
+                                   size-1)
+            found = self.sorted_keys[positions] == keyArr
+            positions = self.sorted_positions[positions]
+        else:
+            positions = np.zeros_like(keyArr)
+            found = np.zeros_like(keyArr, dtype=bool)
+        
+        if check and not found.all():
+            raise KeyError(keyArr[~found].flat[0])
+        
+        positions[~found] = -1
+        return positions
+    
+    def get_many(self, keys, default=None):
+        """Returns the values of the given keys as array. If default is 
+        None, missing keys raise a KeyError; otherwise they get the value
+        default."""
+        positions = self.find_positions(keys, default is None)
+        found = positions >= 0
+        result = np.full(np.shape(positions), 
+                         0 if default is None else default, dtype=INT_DTYPE)
+        result[found] = self.value_array[positions[found]]
+        return result
+    
+    def contains_many(self, keys):
+        """Returns a boolean array that is True for the given keys that are
+        in the dictionary."""
+        return self.find_positions(keys, False) >= 0
+    
+    def set_many(self, keys, values):
+        """Changes the values of the given keys. Since the keys and their 
+        order are fixed, all keys must be in the dictionary already."""
+        positions = self.find_positions(keys, True)
+        values = np.broadcast_to(np.asarray(values, dtype=INT_DTYPE), 
+                                 np.shape(positions))
+        self.value_array[positions] = values
+        self.dict.update(zip(self.key_array[positions].tolist(), 
+                             values.tolist()))
+    
     cdef void __set_attributes(self, dict itemdict, 
                                np.ndarray key_array, 
                                np.ndarray value_array):
@@ -98,6 +152,8 @@ cdef class FixedOrderedIntDict(object):
         self.key_array_c = key_array
         self.value_array = value_array
         self.value_array_c = value_array
+        self.sorted_keys = None
+        self.sorted_positions = None
         
     cdef tuple __get_attributes(self):
         return (self.dict, self.key_array, self.value_array)
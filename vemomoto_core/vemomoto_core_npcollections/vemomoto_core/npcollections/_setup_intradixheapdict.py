@@ -0,0 +1,19 @@
+'''
+Created on 18.10.2026
+
+@author: Samuel
+'''
+from distutils.core import setup, Extension
+from Cython.Build import cythonize
+import numpy as np
+
+NAME = 'intradixheapdict'
+extensions = [Extension(NAME, [NAME+'.pyx'],
+                        extra_compile_args=['-std=c++11', '-O3'],
+                        include_dirs=[np.get_include()],
+                        )
+              ]
+
+setup(name=NAME,
+      ext_modules = cythonize(extensions, language="c++"),
+      )
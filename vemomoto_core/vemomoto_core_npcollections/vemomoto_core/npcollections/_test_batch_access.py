@@ -0,0 +1,110 @@
+'''
+Created on 18.10.2026
+
+@author: Samuel
+
+Tests of the batch methods get_many, contains_many, and set_many of 
+FlexibleArrayDict (Cython and Python version) and FixedOrderedIntDict.
+'''
+import numpy as np
+
+try:
+    from .npextc import FlexibleArrayDict
+    from .npext import FlexibleArrayDict as FlexibleArrayDictPy
+    from .FixedOrderedIntDict import FixedOrderedIntDict
+except ImportError:
+    from npextc import FlexibleArrayDict
+    from npext import FlexibleArrayDict as FlexibleArrayDictPy
+    from FixedOrderedIntDict import FixedOrderedIntDict
+
+DTYPE = [("a", int), ("b", float)]
+
+def assert_raises_key_error(fun, *args):
+    try:
+        fun(*args)
+    except KeyError:
+        pass
+    else:
+        raise AssertionError("No KeyError raised for " + str(args))
+
+def check_flexible_array_dict(cls):
+    rows = np.array([(1, 0.5), (2, 1.5), (3, 2.5)], dtype=DTYPE)
+    flexDict = cls(rows, fancyIndices=[10, 20, 30])
+    
+    # lookups including duplicate keys
+    result = flexDict.get_many([30, 10, 30])
+    assert result["a"].tolist() == [3, 1, 3]
+    assert result["b"].tolist() == [2.5, 0.5, 2.5]
+    assert flexDict.get_many(np.array([[20], [10]]))["a"].tolist() == [[2], 
+                                                                       [1]]
+    assert flexDict.contains_many([10, 15, 30, 15]).tolist() == [True, False,
+                                                                True, False]
+    
+    # missing keys
+    assert_raises_key_error(flexDict.get_many, [10, 15])
+    
+    # empty inputs
+    assert flexDict.get_many([]).shape == (0,)
+    assert flexDict.contains_many([]).shape == (0,)
+    assert flexDict.set_many([], np.zeros(0, dtype=DTYPE)).shape == (0,)
+    assert len(flexDict) == 3
+    
+    # existing and new keys, each new key occurring twice
+    newRows = np.array([(4, 3.5), (5, 4.5), (6, 5.5), (7, 6.5), (8, 7.5)], 
+                       dtype=DTYPE)
+    indices = flexDict.set_many([20, 40, 50, 40, 50], newRows)
+    assert indices[1] == indices[3] and indices[2] == indices[4]
+    assert len(set(indices.tolist())) == 3
+    assert len(flexDict) == 5
+    assert flexDict.get_many([20, 40, 50])["a"].tolist() == [4, 7, 8]
+    assert flexDict.get_many([10, 30])["a"].tolist() == [1, 3]
+    assert flexDict.contains_many([40, 50, 60]).tolist() == [True, True, 
+                                                            False]
+    print(cls.__module__ + "." + cls.__name__, "passed.")
+
+def test_flexible_array_dict():
+    check_flexible_array_dict(FlexibleArrayDict)
+
+def test_flexible_array_dict_python():
+    check_flexible_array_dict(FlexibleArrayDictPy)
+
+def test_fixed_ordered_int_dict():
+    fixedDict = FixedOrderedIntDict([7, 3, 9], [70, 30, 90])
+    
+    # lookups including duplicate keys
+    assert fixedDict.get_many([9, 7, 9]).tolist() == [90, 70, 90]
+    assert fixedDict.contains_many([3, 4, 3]).tolist() == [True, False, True]
+    
+    # missing keys and default values
+    assert_raises_key_error(fixedDict.get_many, [3, 4])
+    assert fixedDict.get_many([3, 4, 100, -1], -5).tolist() == [30, -5, -5, 
+                                                                -5]
+    assert fixedDict.get_many([4], 0).tolist() == [0]
+    
+    # empty inputs
+    assert fixedDict.get_many([]).shape == (0,)
+    assert fixedDict.get_many([], 0).shape == (0,)
+    assert fixedDict.contains_many([]).shape == (0,)
+    fixedDict.set_many([], [])
+    
+    # the keys are fixed; the last value of a duplicate key is kept
+    fixedDict.set_many([3, 9, 3], [31, 91, 32])
+    assert fixedDict.get_many([7, 3, 9]).tolist() == [70, 32, 91]
+    assert fixedDict[3] == 32 and fixedDict[9] == 91
+    fixedDict.set_many([7, 9], 0)
+    assert fixedDict.get_many([7, 9]).tolist() == [0, 0]
+    assert_raises_key_error(fixedDict.set_many, [3, 4], [1, 2])
+    assert fixedDict[3] == 32
+    
+    # empty dictionary
+    emptyDict = FixedOrderedIntDict([], [])
+    assert not emptyDict.contains_many([1, 2]).any()
+    assert emptyDict.get_many([1, 2], 3).tolist() == [3, 3]
+    assert_raises_key_error(emptyDict.get_many, [1])
+    print("FixedOrderedIntDict passed.")
+
+if __name__ == '__main__':
+    
+    test_flexible_array_dict()
+    test_flexible_array_dict_python()
+    test_fixed_ordered_int_dict()
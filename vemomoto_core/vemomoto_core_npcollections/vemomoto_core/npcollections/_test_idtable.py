@@ -0,0 +1,89 @@
+'''
+Created on 18.10.2026
+
+@author: Samuel
+
+Tests of the ID interning in IDTable.
+'''
+import numpy as np
+
+try:
+    from .idtable import IDTable
+except ImportError:
+    from idtable import IDTable
+
+def test_intern():
+    ids = np.array([b"c", b"a", b"b", b"a", b""])
+    table = IDTable()
+    codes = table.intern(ids, missing=b"")
+    
+    # new IDs receive consecutive codes in sorted order
+    assert codes.tolist() == [2, 0, 1, 0, -1]
+    assert table.get_ids(codes[:4]).tolist() == ids[:4].tolist()
+    assert len(table) == 3
+    assert table[b"b"] == 1 and table.get(b"d") is None
+    assert b"c" in table and b"" not in table
+    try:
+        table[b"d"]
+    except KeyError:
+        pass
+    else:
+        raise AssertionError("Found missing ID")
+    
+    # created from sorted unique IDs, the codes are the indices
+    table = IDTable(np.array([b"a", b"b", b"c"]))
+    assert table.get_codes(np.array([b"c", b"a"])).tolist() == [2, 0]
+    print("Interning passed.")
+
+def test_code_stability():
+    rng = np.random.RandomState(0)
+    table = IDTable()
+    assigned = {}
+    for _ in range(20):
+        ids = rng.randint(1000, size=50).astype(bytes)
+        codes = table.intern(ids)
+        for ID, code in zip(ids.tolist(), codes.tolist()):
+            assert assigned.setdefault(ID, code) == code
+        assert np.array_equal(table.get_ids(codes), ids)
+    
+    assert len(table) == len(assigned)
+    assert sorted(assigned.values()) == list(range(len(assigned)))
+    print("Code stability passed.")
+
+def test_mixed_width_ids():
+    table = IDTable(np.array([b"abc", b"b", b"x"]))
+    
+    # longer IDs must not be truncated to the width of the table
+    assert table.get_codes(np.array([b"abcdef", b"bb"])).tolist() == [-1, -1]
+    assert table.intern(np.array([b"abcdef", b"b"])).tolist() == [3, 1]
+    assert table.get_codes(np.array([b"abc", b"abcdef"])).tolist() == [0, 3]
+    assert table.get_ids(3) == b"abcdef"
+    
+    # shorter IDs in a table with wider IDs
+    table = IDTable(np.array([b"abcdef", b"b"]))
+    assert table.intern(np.array([b"abc", b"abcdef"])).tolist() == [2, 0]
+    assert table.get_ids([2, 1]).tolist() == [b"abc", b"b"]
+    print("Mixed width IDs passed.")
+
+def test_negative_codes():
+    table = IDTable(np.array([b"a", b"b"]))
+    for codes in -1, [0, -1]:
+        try:
+            table.get_ids(codes)
+        except IndexError:
+            pass
+        else:
+            raise AssertionError("Accepted negative codes " + str(codes))
+    
+    assert table.get_ids(-1, b"") == b""
+    assert table.get_ids([1, -1, 0], b"none").tolist() == [b"b", b"none",
+                                                           b"a"]
+    assert IDTable().get_ids([-1], b"").tolist() == [b""]
+    print("Negative codes passed.")
+
+if __name__ == '__main__':
+    
+    test_intern()
+    test_code_stability()
+    test_mixed_width_ids()
+    test_negative_codes()
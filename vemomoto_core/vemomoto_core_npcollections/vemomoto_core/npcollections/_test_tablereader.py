@@ -0,0 +1,56 @@
+'''
+Created on 18.10.2026
+
+@author: Samuel
+
+Compares the chunked CSV reader with np.genfromtxt.
+'''
+import os
+import tempfile
+
+import numpy as np
+
+try:
+    from .tablereader import read_table
+except ImportError:
+    from tablereader import read_table
+
+DTYPE = {"names":["ID", "potentialViaVertex", "type"],
+         'formats':["|S9", 'bool', 'int']}
+
+def write_file(directory, lines):
+    fileName = os.path.join(directory, "table.csv")
+    with open(fileName, "w") as file:
+        file.write("\n".join(["ID, potentialViaVertex, type"] + lines))
+    return fileName
+
+def test_chunks():
+    lines = ["v{}, {}, {}".format(i, i % 3 == 0, i % 4) for i in range(25)]
+    lines[7] = "v7, , x"
+    with tempfile.TemporaryDirectory() as directory:
+        fileName = write_file(directory, lines)
+        expected = np.genfromtxt(fileName, delimiter=",", skip_header=True,
+                                 dtype=DTYPE, autostrip=True)
+        for chunkSize in 1, 4, 100:
+            result = read_table(fileName, DTYPE, chunkSize=chunkSize)
+            assert result.shape == expected.shape
+            assert np.array_equal(result, expected)
+    print("Chunks passed.")
+
+def test_single_row():
+    # unlike np.genfromtxt, the reader returns a one-dimensional array
+    # also if the file contains a single row
+    with tempfile.TemporaryDirectory() as directory:
+        fileName = write_file(directory, ["v0, True, 2"])
+        result = read_table(fileName, DTYPE)
+        assert result.shape == (1,)
+        assert result["ID"][0] == b"v0" and result["type"][0] == 2
+        
+        fileName = write_file(directory, [])
+        assert read_table(fileName, DTYPE).shape == (0,)
+    print("Single row passed.")
+
+if __name__ == '__main__':
+    
+    test_chunks()
+    test_single_row()
@@ -0,0 +1,118 @@
+'''
+Created on 18.10.2026
+
+@author: Samuel
+
+Interning of external identifiers.
+
+External IDs (e.g. fixed-width byte strings read from csv files) are mapped
+to dense integer codes, so that the IDs can be stored, sorted and joined as
+integers. The table keeps the external IDs for output.
+'''
+import numpy as np
+
+CODE_DTYPE = np.int32
+
+class IDTable(object):
+    """Maps external IDs to dense integer codes 0, 1, 2, ...
+    
+    Codes are never changed once assigned. IDs that are added in one call of
+    :py:meth:`intern` receive consecutive codes in sorted order. Hence, if
+    the table is created from sorted unique IDs, the code of an ID is its
+    index in the given array.
+    
+    The table can be used like a dictionary mapping the IDs to their codes.
+    
+    Parameters
+    ----------
+    ids : array-like
+        IDs that are interned on creation.
+    missing : object
+        ID value that marks missing entries in ``ids``. Missing entries are
+        not interned.
+    
+    """
+    
+    def __init__(self, ids=None, missing=None):
+        self.ids = np.zeros(0, dtype=object if ids is None else
+                            np.asarray(ids).dtype)
+        self._order = np.zeros(0, dtype=CODE_DTYPE)
+        self._sortedIDs = self.ids
+        if ids is not None:
+            self.intern(ids, missing)
+    
+    def intern(self, ids, missing=None):
+        """Returns the codes of the given IDs. IDs that are not in the table
+        yet are added. Entries equal to ``missing`` receive the code -1."""
+        ids = np.asarray(ids)
+        codes = self.get_codes(ids)
+        new = codes < 0
+        if missing is not None:
+            new &= ids != missing
+        if new.any():
+            newIDs, inverse = np.unique(ids[new], return_inverse=True)
+            codes[new] = len(self.ids) + inverse
+            if self.ids.size:
+                self.ids = np.concatenate((self.ids, newIDs))
+            else:
+                self.ids = newIDs
+            self._order = np.argsort(self.ids, kind="stable").astype(
+                                                                CODE_DTYPE)
+            self._sortedIDs = self.ids[self._order]
+        return codes
+    
+    def get_codes(self, ids, default=-1):
+        """Returns the codes of the given IDs. IDs that are not in the table
+        receive the code ``default``."""
+        ids = np.asarray(ids)
+        flatIDs = ids.ravel()
+        codes = np.full(flatIDs.size, default, dtype=CODE_DTYPE)
+        if self.ids.size:
+            positions = np.searchsorted(self._sortedIDs, flatIDs)
+            positions[positions == self.ids.size] = 0
+            found = self._sortedIDs[positions] == flatIDs
+            codes[found] = self._order[positions[found]]
+        return codes.reshape(ids.shape)
+    
+    def get_ids(self, codes, missing=None):
+        """Returns the IDs belonging to the given codes. Negative codes
+        (see :py:meth:`intern`) receive the ID ``missing``. If ``missing``
+        is ``None``, negative codes raise an IndexError."""
+        codes = np.asarray(codes)
+        negative = codes < 0
+        if not negative.any():
+            return self.ids[codes]
+        if missing is None:
+            raise IndexError("The codes must be non-negative, but code "
+                             + str(codes[negative].min()) + " was given.")
+        result = np.empty(codes.shape, dtype=np.promote_types(
+                                self.ids.dtype, np.asarray(missing).dtype))
+        result[negative] = missing
+        result[~negative] = self.ids[codes[~negative]]
+        if not result.ndim:
+            return result[()]
+        return result
+    
+    def __getitem__(self, ID):
+        code = self.get_codes(ID)
+        if code < 0:
+            raise KeyError(ID)
+        return int(code)
+    
+    def get(self, ID, default=None):
+        code = self.get_codes(ID)
+        if code < 0:
+            return default
+        return int(code)
+    
+    def __contains__(self, ID):
+        return self.get_codes(ID) >= 0
+    
+    def __len__(self):
+        return self.ids.size
+    
+    def __iter__(self):
+        return iter(self.ids)
+    
+    def __repr__(self):
+        return "IDTable with " + str(self.ids.size) + " IDs"
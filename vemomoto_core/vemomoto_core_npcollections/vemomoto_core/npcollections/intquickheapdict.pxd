@@ -38,4 +38,29 @@ cdef class intquickheapdict(object):
     cdef void delitem(intquickheapdict self, INT_DTYPE_t key)
     cdef INT_DTYPE_t len(intquickheapdict self)
     cpdef FLOAT_DTYPE_t getitem(intquickheapdict self, INT_DTYPE_t key)
-    
\ No newline at end of file
+    
+cdef class intindexheapdict(object):
+    cdef: 
+        long[:] keys
+        long[:] positions
+        long[:] stamps
+        double[:] heap
+        np.ndarray keys_nparr  # np array view to the data
+        np.ndarray positions_nparr
+        np.ndarray stamps_nparr
+        np.ndarray heap_nparr
+        readonly INT_DTYPE_t keyNumber
+        INT_DTYPE_t size
+        INT_DTYPE_t epoch
+    
+    cpdef void reset(intindexheapdict self)
+    cdef void setitem(intindexheapdict self, INT_DTYPE_t key, 
+                      FLOAT_DTYPE_t priority)
+    cdef KEYVALUE popitem_c(intindexheapdict self) except *
+    cdef KEYVALUE peekitem_c(intindexheapdict self) except *
+    cpdef FLOAT_DTYPE_t get(intindexheapdict self, INT_DTYPE_t key, 
+                           FLOAT_DTYPE_t default)
+    cdef void delitem(intindexheapdict self, INT_DTYPE_t key)
+    cdef INT_DTYPE_t len(intindexheapdict self)
+    cpdef FLOAT_DTYPE_t getitem(intindexheapdict self, INT_DTYPE_t key) \
+        except? -1
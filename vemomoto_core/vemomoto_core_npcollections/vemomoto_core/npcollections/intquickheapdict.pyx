@@ -262,3 +262,195 @@ cdef class intquickheapdict(object):
     def __iter__(self):
         return zip(self.keys_nparr[self.internalKeys[:self.size]], 
                    self.heap[:self.size])
+
+
+cdef class intindexheapdict(object):
+    """Variant of intquickheapdict for keys from a known range 
+    0, ..., keyNumber-1 (e.g. vertex indices). The heap positions of the 
+    keys are stored in an array indexed by the keys instead of a dict. 
+    The array entries are stamped with an epoch, so that the heap can be 
+    emptied in constant time with reset and be reused for many searches
+    without reallocation. 
+    
+    The cdef methods (setitem, delitem) do not check whether the keys are 
+    in range; from Python, items are set via ``heap[key] = priority``.
+    """
+    
+    def __init__(self, INT_DTYPE_t keyNumber, data=None):
+        
+        self.keys_nparr = np.empty(keyNumber, dtype=INT_DTYPE)
+        self.keys = self.keys_nparr
+        self.positions_nparr = np.empty(keyNumber, dtype=INT_DTYPE)
+        self.positions = self.positions_nparr
+        self.stamps_nparr = np.zeros(keyNumber, dtype=INT_DTYPE)
+        self.stamps = self.stamps_nparr
+        self.heap_nparr = np.empty(keyNumber, dtype=FLOAT_DTYPE)
+        self.heap = self.heap_nparr
+        self.keyNumber = keyNumber
+        self.size = 0
+        self.epoch = 1
+        
+        if not data is None:
+            for key, priority in data:
+                self[key] = priority
+    
+    cpdef void reset(intindexheapdict self):
+        self.size = 0
+        self.epoch += 1
+    
+    def __setitem__(intindexheapdict self, INT_DTYPE_t key, 
+                    FLOAT_DTYPE_t priority):
+        if not 0 <= key < self.keyNumber:
+            raise KeyError("Key " + str(key) + " is out of the range of "
+                           + "this heap.")
+        self.setitem(key, priority)
+    
+    cdef void setitem(intindexheapdict self, INT_DTYPE_t key, 
+                      FLOAT_DTYPE_t priority):
+        cdef: 
+            INT_DTYPE_t index
+            bint increasePriority
+        
+        if self.stamps[key] == self.epoch and self.positions[key] >= 0:
+            index = self.positions[key]
+            increasePriority = self.heap[index] < priority
+        else:
+            increasePriority = False
+            self.stamps[key] = self.epoch
+            index = self.size
+            self.size += 1
+            self.positions[key] = index
+            self.keys[index] = key
+        
+        self.heap[index] = priority
+        
+        if increasePriority:
+            heapifyDown(<double*> self.heap_nparr.data, 
+                        <long*> self.keys_nparr.data, 
+                        <long*> self.positions_nparr.data, index, self.size)
+        else:
+            heapifyUp(<double*> self.heap_nparr.data, 
+                      <long*> self.keys_nparr.data, 
+                      <long*> self.positions_nparr.data, index)
+    
+    cdef KEYVALUE popitem_c(intindexheapdict self) except *:
+        
+        if not self.size:
+            raise IndexError("The heap is empty.")
+        
+        cdef:
+            INT_DTYPE_t resultKey = self.keys[0]
+            INT_DTYPE_t key
+            INT_DTYPE_t size
+            FLOAT_DTYPE_t resultPriority = self.heap[0]
+        
+        # remove the top item
+        self.positions[resultKey] = -1
+        self.size = size = self.size - 1
+        
+        # rebuild heap
+        if size:
+            self.heap[0] = self.heap[size]
+            self.keys[0] = key = self.keys[size]
+            self.positions[key] = 0
+            heapifyDown(<double*> self.heap_nparr.data, 
+                        <long*> self.keys_nparr.data, 
+                        <long*> self.positions_nparr.data, 0, size)
+        
+        return KEYVALUE(resultKey, resultPriority)
+    
+    def popitem(self):
+        result = self.popitem_c()
+        return result.key, result.value
+    
+    cdef KEYVALUE peekitem_c(intindexheapdict self) except *:
+        if not self.size:
+            raise IndexError("The heap is empty.")
+        return KEYVALUE(self.keys[0], self.heap[0])
+    
+    def peekitem(self):
+        result = self.peekitem_c()
+        return result.key, result.value
+    
+    cpdef FLOAT_DTYPE_t get(intindexheapdict self, INT_DTYPE_t key, 
+                           FLOAT_DTYPE_t default):
+        if (0 <= key < self.keyNumber and self.stamps[key] == self.epoch 
+                and self.positions[key] >= 0):
+            return self.heap[self.positions[key]]
+        return default
+    
+    def __delitem__(self, key):
+        if not key in self:
+            raise KeyError(key)
+        self.delitem(key)
+    
+    cdef void delitem(intindexheapdict self, INT_DTYPE_t key):
+        cdef:
+            INT_DTYPE_t internalDelIndex = self.positions[key]
+            INT_DTYPE_t internalIndex
+            INT_DTYPE_t size
+            bint increasePriority
+        
+        self.positions[key] = -1
+        self.size = size = self.size - 1
+        
+        if internalDelIndex == size:
+            return
+        
+        # rebuild heap
+        increasePriority = self.heap[internalDelIndex] < self.heap[size]
+        self.heap[internalDelIndex] = self.heap[size]
+        self.keys[internalDelIndex] = internalIndex = self.keys[size]
+        self.positions[internalIndex] = internalDelIndex
+        
+        if increasePriority:
+            heapifyDown(<double*> self.heap_nparr.data, 
+                        <long*> self.keys_nparr.data, 
+                        <long*> self.positions_nparr.data, 
+                        internalDelIndex, size)
+        else:
+            heapifyUp(<double*> self.heap_nparr.data, 
+                      <long*> self.keys_nparr.data, 
+                      <long*> self.positions_nparr.data, 
+                      internalDelIndex)
+    
+    def items(self):
+        return self.__iter__()
+    
+    def __len__(self):
+        return self.len()
+    
+    cdef INT_DTYPE_t len(intindexheapdict self):
+        return self.size
+    
+    def __repr__(self):
+        n = 20
+        if self.size > n:
+            m = n
+            addStr = ", ... ]"
+        else:
+            m = self.size
+            addStr = "]" 
+        return ("indexheapdict with length " + str(self.size) + ": " 
+                + str(list(zip(self.keys_nparr[:m], 
+                               self.heap_nparr[:m])))[:-1] + addStr)
+    
+    def __str__(self):
+        return self.__repr__()
+    
+    def __contains__(intindexheapdict self, INT_DTYPE_t item):
+        return (0 <= item < self.keyNumber and self.stamps[item] == self.epoch 
+                and self.positions[item] >= 0)
+    
+    cpdef FLOAT_DTYPE_t getitem(intindexheapdict self, INT_DTYPE_t key) \
+            except? -1:
+        if not (0 <= key < self.keyNumber and self.stamps[key] == self.epoch 
+                and self.positions[key] >= 0):
+            raise KeyError(key)
+        return self.heap[self.positions[key]]
+    
+    def __getitem__(self, key):
+        return self.getitem(key)
+    
+    def __iter__(self):
+        return zip(self.keys_nparr[:self.size], self.heap_nparr[:self.size])
@@ -0,0 +1,42 @@
+# distutils: language=c++
+#cython: boundscheck=False, wraparound=False, nonecheck=False
+'''
+Created on 18.10.2026
+
+@author: Samuel
+'''
+cimport numpy as np
+ctypedef np.long_t INT_DTYPE_t
+ctypedef np.double_t FLOAT_DTYPE_t
+from vemomoto_core.npcollections.intquickheapdict cimport KEYVALUE
+from libcpp.vector cimport vector
+
+cdef class intradixheapdict(object):
+    cdef:
+        long[:] buckets
+        long[:] bucketPositions
+        double[:] priorities
+        np.ndarray buckets_nparr  # np array view to the data
+        np.ndarray bucketPositions_nparr
+        np.ndarray priorities_nparr
+        vector[vector[long]] bucketContents
+        unsigned long long lastBits
+        FLOAT_DTYPE_t last
+        INT_DTYPE_t size
+        INT_DTYPE_t space
+    
+    cpdef void setitem(intradixheapdict self, INT_DTYPE_t key,
+                       FLOAT_DTYPE_t priority) except *
+    cdef void _extend(intradixheapdict self, INT_DTYPE_t key)
+    cdef void _insert(intradixheapdict self, INT_DTYPE_t key,
+                      unsigned long long bits)
+    cdef void _remove(intradixheapdict self, INT_DTYPE_t key)
+    cdef INT_DTYPE_t _find_min_bucket(intradixheapdict self)
+    cdef KEYVALUE popitem_c(intradixheapdict self) except *
+    cdef KEYVALUE peekitem_c(intradixheapdict self) except *
+    cpdef FLOAT_DTYPE_t get(intradixheapdict self, INT_DTYPE_t key,
+                           FLOAT_DTYPE_t default)
+    cdef void delitem(intradixheapdict self, INT_DTYPE_t key) except *
+    cdef INT_DTYPE_t len(intradixheapdict self)
+    cpdef FLOAT_DTYPE_t getitem(intradixheapdict self, INT_DTYPE_t key) \
+        except? -1
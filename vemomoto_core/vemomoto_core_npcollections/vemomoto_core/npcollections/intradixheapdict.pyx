@@ -0,0 +1,279 @@
+# distutils: language=c++
+#cython: boundscheck=False, wraparound=False, nonecheck=False
+'''
+Created on 18.10.2026
+
+@author: Samuel
+
+Monotone radix heap with the same interface as intquickheapdict.
+
+The heap is meant for label-setting searches (Dijkstra), in which no
+priority smaller than the priority of the last popped item is inserted.
+The keys must be non-negative integers; they index the position arrays
+directly, so that no dictionary is needed. The priorities must be
+non-negative doubles. Their IEEE 754 bit patterns are ordered as the
+priorities themselves and are used as radix keys, so that no quantisation
+of the priorities is needed.
+'''
+import numpy as np
+cimport numpy as np
+np.import_array()
+INT_DTYPE = np.long
+FLOAT_DTYPE = np.double
+from libc.math cimport INFINITY
+from libc.string cimport memcpy
+from libcpp.vector cimport vector
+
+# number of buckets: one for the last popped priority and one for each
+# bit of the radix keys
+DEF BUCKET_NUMBER = 65
+
+cdef inline unsigned long long to_bits(double priority):
+    cdef unsigned long long bits
+    memcpy(&bits, &priority, sizeof(double))
+    return bits
+
+cdef inline long bit_length(unsigned long long x):
+    cdef long result = 0
+    if x >> 32:
+        x >>= 32
+        result += 32
+    if x >> 16:
+        x >>= 16
+        result += 16
+    if x >> 8:
+        x >>= 8
+        result += 8
+    if x >> 4:
+        x >>= 4
+        result += 4
+    if x >> 2:
+        x >>= 2
+        result += 2
+    if x >> 1:
+        x >>= 1
+        result += 1
+    return result + <long> x
+
+
+cdef class intradixheapdict(object):
+
+    def __init__(self, data=None, initSize=1000):
+        self.buckets_nparr = np.full(initSize, -1, dtype=INT_DTYPE)
+        self.buckets = self.buckets_nparr
+        self.bucketPositions_nparr = np.empty(initSize, dtype=INT_DTYPE)
+        self.bucketPositions = self.bucketPositions_nparr
+        self.priorities_nparr = np.empty(initSize, dtype=FLOAT_DTYPE)
+        self.priorities = self.priorities_nparr
+        self.bucketContents.resize(BUCKET_NUMBER)
+        self.space = initSize
+        self.size = 0
+        self.last = 0
+        self.lastBits = 0
+        
+        if not data is None:
+            for key, priority in data:
+                self.setitem(key, priority)
+    
+    def __setitem__(intradixheapdict self, INT_DTYPE_t key,
+                    FLOAT_DTYPE_t priority):
+        self.setitem(key, priority)
+    
+    cpdef void setitem(intradixheapdict self, INT_DTYPE_t key,
+                       FLOAT_DTYPE_t priority) except *:
+        if key < 0:
+            raise ValueError("The keys must be non-negative, but key "
+                             + str(key) + " was given.")
+        
+        # also excludes NaN values
+        if not priority >= self.last:
+            raise ValueError("The priority " + str(priority) + " of key "
+                             + str(key) + " is smaller than the priority "
+                             + str(self.last) + " of the last popped item.")
+        
+        # -0. would have a larger radix key than all positive values
+        if priority == 0:
+            priority = 0.
+        
+        if key >= self.space:
+            self._extend(key)
+        
+        if self.buckets[key] >= 0:
+            self._remove(key)
+        else:
+            self.size += 1
+        
+        self.priorities[key] = priority
+        self._insert(key, to_bits(priority))
+    
+    cdef void _extend(intradixheapdict self, INT_DTYPE_t key):
+        cdef INT_DTYPE_t oldSpace = self.space
+        self.space = max(2*oldSpace, key+1)
+        cdef INT_DTYPE_t newSpace = self.space
+        
+        try:
+            self.buckets_nparr.resize(newSpace, refcheck=False)
+        except ValueError:
+            self.buckets_nparr = np.concatenate((self.buckets_nparr,
+                                        np.empty(newSpace-oldSpace,
+                                                 dtype=INT_DTYPE)))
+        self.buckets_nparr[oldSpace:] = -1
+        
+        try:
+            self.bucketPositions_nparr.resize(newSpace, refcheck=False)
+        except ValueError:
+            self.bucketPositions_nparr = np.concatenate((
+                                        self.bucketPositions_nparr,
+                                        np.empty(newSpace-oldSpace,
+                                                 dtype=INT_DTYPE)))
+        
+        try:
+            self.priorities_nparr.resize(newSpace, refcheck=False)
+        except ValueError:
+            self.priorities_nparr = np.concatenate((self.priorities_nparr,
+                                        np.empty(newSpace-oldSpace,
+                                                 dtype=FLOAT_DTYPE)))
+        self.buckets = self.buckets_nparr
+        self.bucketPositions = self.bucketPositions_nparr
+        self.priorities = self.priorities_nparr
+    
+    cdef void _insert(intradixheapdict self, INT_DTYPE_t key,
+                      unsigned long long bits):
+        # the bucket is given by the highest bit in which the radix key
+        # differs from the one of the last popped item
+        cdef long bucket = bit_length(bits ^ self.lastBits)
+        self.buckets[key] = bucket
+        self.bucketPositions[key] = self.bucketContents[bucket].size()
+        self.bucketContents[bucket].push_back(key)
+    
+    cdef void _remove(intradixheapdict self, INT_DTYPE_t key):
+        cdef:
+            long bucket = self.buckets[key]
+            long position = self.bucketPositions[key]
+            long lastKey = self.bucketContents[bucket].back()
+        
+        # move the last key of the bucket to the free position
+        self.bucketContents[bucket][position] = lastKey
+        self.bucketPositions[lastKey] = position
+        self.bucketContents[bucket].pop_back()
+        self.buckets[key] = -1
+    
+    cdef INT_DTYPE_t _find_min_bucket(intradixheapdict self):
+        cdef INT_DTYPE_t bucket
+        for bucket in range(BUCKET_NUMBER):
+            if not self.bucketContents[bucket].empty():
+                return bucket
+        return -1
+    
+    cdef KEYVALUE popitem_c(intradixheapdict self) except *:
+    
+        if not self.size:
+            raise IndexError("The heap is empty.")
+        
+        cdef:
+            INT_DTYPE_t bucket
+            INT_DTYPE_t key
+            INT_DTYPE_t minKey
+            FLOAT_DTYPE_t minPriority
+            vector[long] bucketContent
+        
+        if self.bucketContents[0].empty():
+            # all items in the first non-empty bucket are redistributed
+            # to smaller buckets when their minimum becomes the new
+            # reference priority
+            bucket = self._find_min_bucket()
+            bucketContent.swap(self.bucketContents[bucket])
+            minPriority = INFINITY
+            for key in bucketContent:
+                if self.priorities[key] < minPriority:
+                    minPriority = self.priorities[key]
+            self.last = minPriority
+            self.lastBits = to_bits(minPriority)
+            for key in bucketContent:
+                self._insert(key, to_bits(self.priorities[key]))
+        
+        minKey = self.bucketContents[0].back()
+        self.bucketContents[0].pop_back()
+        self.buckets[minKey] = -1
+        self.size -= 1
+        
+        return KEYVALUE(minKey, self.priorities[minKey])
+    
+    def popitem(self):
+        result = self.popitem_c()
+        return result.key, result.value
+    
+    cdef KEYVALUE peekitem_c(intradixheapdict self) except *:
+        if not self.size:
+            raise IndexError("The heap is empty.")
+        
+        cdef:
+            INT_DTYPE_t bucket = self._find_min_bucket()
+            INT_DTYPE_t key
+            INT_DTYPE_t minKey = self.bucketContents[bucket].back()
+        
+        if bucket:
+            for key in self.bucketContents[bucket]:
+                if self.priorities[key] < self.priorities[minKey]:
+                    minKey = key
+        
+        return KEYVALUE(minKey, self.priorities[minKey])
+    
+    def peekitem(self):
+        result = self.peekitem_c()
+        return result.key, result.value
+    
+    cpdef FLOAT_DTYPE_t get(intradixheapdict self, INT_DTYPE_t key,
+                           FLOAT_DTYPE_t default):
+        if key < 0 or key >= self.space or self.buckets[key] < 0:
+            return default
+        return self.priorities[key]
+    
+    def __delitem__(self, key):
+        self.delitem(key)
+    
+    cdef void delitem(intradixheapdict self, INT_DTYPE_t key) except *:
+        if key < 0 or key >= self.space or self.buckets[key] < 0:
+            raise KeyError(key)
+        self._remove(key)
+        self.size -= 1
+    
+    def items(self):
+        return self.__iter__()
+    
+    def __len__(self):
+        return self.len()
+    
+    cdef INT_DTYPE_t len(intradixheapdict self):
+        return self.size
+    
+    def __repr__(self):
+        n = 20
+        keys = np.nonzero(self.buckets_nparr >= 0)[0]
+        if self.size > n:
+            addStr = ", ... ]"
+        else:
+            addStr = "]"
+        keys = keys[:n]
+        return ("radixheapdict with length " + str(self.size) + ": "
+                + str(list(zip(keys, self.priorities_nparr[keys])))[:-1]
+                + addStr)
+    
+    def __str__(self):
+        return self.__repr__()
+    
+    def __contains__(self, item):
+        return self.get(item, -1) >= 0
+    
+    cpdef FLOAT_DTYPE_t getitem(intradixheapdict self, INT_DTYPE_t key) \
+            except? -1:
+        if key < 0 or key >= self.space or self.buckets[key] < 0:
+            raise KeyError(key)
+        return self.priorities[key]
+    
+    def __getitem__(self, key):
+        return self.getitem(key)
+    
+    def __iter__(self):
+        keys = np.nonzero(self.buckets_nparr[:self.space] >= 0)[0]
+        return zip(keys, self.priorities_nparr[keys])
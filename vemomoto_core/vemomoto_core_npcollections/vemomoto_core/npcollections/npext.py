@@ -294,13 +294,26 @@ def add_fields(array, names, dtypes, fillVal = None):
         return newArr
 
 def merge_arrays(arrays):
-    newArr = np.empty(arrays[0].shape, dtype=sum((arr.dtype.descr for 
-                                                  arr in arrays), []))
+    # the fields are taken by name, since the descr of views on a subset of
+    # fields contains padding entries
+    newArr = np.empty(arrays[0].shape, dtype=[(name, arr.dtype.fields[name][0])
+                                              for arr in arrays 
+                                              for name in arr.dtype.names])
     for arr in arrays:
         for name in arr.dtype.names:
             newArr[name] = arr[name]
     return newArr
 
+def concatenate_ranges(starts, stops):
+    """Returns the concatenation of the ranges range(starts[i], stops[i])
+    as one integer array."""
+    lengths = stops - starts
+    total = lengths.sum()
+    if not total:
+        return np.zeros(0, dtype=int)
+    offsets = np.cumsum(lengths) - lengths
+    return np.repeat(starts - offsets, lengths) + np.arange(total)
+
 def list_to_csr_matrix(array, dtype="double"):
     lengths = [len(i) for i in array]
     indptr = np.zeros(len(lengths)+1)
@@ -324,12 +337,27 @@ class csr_matrix_nd(object):
     def __init__(self, listMatrix, dtype="double"):
         listMatrix[~listMatrix.astype(bool)] = EmptyList()
         self.data = list_to_csr_matrix(listMatrix.flatten(), dtype=dtype)
-        self.shapeFactor = np.array(listMatrix.shape)
+        self._set_shape(listMatrix.shape)
+    
+    @classmethod
+    def from_csr_matrix(cls, matrix, shape):
+        """Creates the matrix from a 2D csr_matrix whose rows correspond 
+        to the flattened entries of an array with the given shape."""
+        if not np.prod(shape) == matrix.shape[0]:
+            raise ValueError("The matrix must have " + str(np.prod(shape)) 
+                             + " rows.")
+        self = cls.__new__(cls)
+        self.data = matrix
+        self._set_shape(shape)
+        return self
+    
+    def _set_shape(self, shape):
+        self.shapeFactor = np.array(shape)
         self.shapeFactor[:-1] = self.shapeFactor[1:]
         self.shapeFactor[-1] = 1
         np.multiply.accumulate(self.shapeFactor[::-1], 
                                out=self.shapeFactor[::-1])
-        self.ndim = listMatrix.ndim+1
+        self.ndim = len(shape)+1
     
         
     def __getitem__(self, index):
@@ -828,6 +856,45 @@ class FlexibleArrayDict(FlexibleArray):
         indexDict = self.indexDict
         return all(index in indexDict for index in indices)
      
+    def _find_internal_indices(self, keys, check):
+        keys = np.asarray(keys)
+        indexDict = self.indexDict
+        if check:
+            lookup = indexDict.__getitem__
+        else:
+            lookup = lambda key: indexDict.get(key, -1)
+        return np.fromiter(map(lookup, keys.ravel().tolist()), dtype=int,
+                           count=keys.size).reshape(keys.shape)
+    
+    def get_many(self, keys):
+        """Returns the rows of the given keys as array. Missing keys raise 
+        a KeyError."""
+        return self.array[self._find_internal_indices(keys, True)]
+    
+    def contains_many(self, keys):
+        """Returns a boolean array that is True for the given keys that are
+        in the dictionary."""
+        return self._find_internal_indices(keys, False) >= 0
+    
+    def set_many(self, keys, rows):
+        """Sets the rows of the given keys and adds the keys that do not 
+        exist yet. Returns the internal indices of the rows."""
+        indices = self._find_internal_indices(keys, False)
+        found = indices >= 0
+        rows = np.asarray(rows, dtype=self.array.dtype)
+        self.array[indices[found]] = rows[found]
+        if not found.all():
+            keys = np.asarray(keys)
+            for i in np.nonzero(~found)[0]:
+                key = keys[i].item()
+                if key in self.indexDict:
+                    # key occurred twice
+                    indices[i] = self.indexDict[key]
+                    self.array[indices[i]] = rows[i]
+                else:
+                    indices[i] = self.quick_add_tuple(key, rows[i])
+        return indices
+    
     def extend(self, newRows):
         raise NotImplementedError("This method is still to be implemented.")
         #FlexibleArray.extend(self, newRows)
@@ -71,6 +71,7 @@ cdef class FlexibleArrayDict(FlexibleArray):
     cdef long setitem(self, long index, object value)
     cdef long setitem_by_dict(self, long index, dict keywordData)
     cpdef object get(self, long index, object default)
+    cpdef np.ndarray find_internal_indices(self, keys, bint check=*)
     cdef void __set_attributes_FAD(self, unordered_map[long, long] indexDict)
     cdef tuple __get_attributes(self)
     
@@ -9,6 +9,7 @@ Created on 05.07.2016
 import copy
 from libcpp.unordered_map cimport unordered_map
 from libc.math cimport NAN
+from cython.operator cimport dereference as deref
 
 import numpy as np
 cimport numpy as np
@@ -228,6 +229,14 @@ cdef class FlexibleArray(object):
             return
         self.delitem(index)
     
+    def delete_many(self, indices):
+        """Deletes the rows with the given indices."""
+        cdef:
+            const long[:] indices_c = np.asarray(indices, dtype=np.long)
+            long i
+        for i in range(indices_c.shape[0]):
+            self.delitem(indices_c[i])
+    
     cdef void delitem(self, long index): 
         
         index = self.__wrap_index(index)
@@ -625,6 +634,54 @@ cdef class FlexibleArrayDict(FlexibleArray):
     def __contains__(self, index):
         return self.indexDict.count(index) > 0 
             
+    cpdef np.ndarray find_internal_indices(self, keys, bint check=True):
+        """Returns the row indices in the array of the given keys. Missing 
+        keys raise a KeyError if check is True and get the index -1 
+        otherwise."""
+        cdef:
+            np.ndarray keyArr = np.asarray(keys, dtype=np.long)
+            np.ndarray result = np.empty(keyArr.size, dtype=np.long)
+            const long[:] keys_c = keyArr.ravel()
+            long[:] result_c = result
+            long i
+            unordered_map[long, long].iterator it
+        
+        for i in range(keys_c.shape[0]):
+            it = self.indexDict.find(keys_c[i])
+            if it == self.indexDict.end():
+                if check:
+                    raise KeyError(keys_c[i])
+                result_c[i] = -1
+            else:
+                result_c[i] = deref(it).second
+        return result.reshape(np.shape(keyArr))
+    
+    def get_many(self, keys):
+        """Returns the rows of the given keys as array. Missing keys raise 
+        a KeyError."""
+        return self.array[self.find_internal_indices(keys, True)]
+    
+    def contains_many(self, keys):
+        """Returns a boolean array that is True for the given keys that are
+        in the dictionary."""
+        return self.find_internal_indices(keys, False) >= 0
+    
+    def set_many(self, keys, rows):
+        """Sets the rows of the given keys and adds the keys that do not 
+        exist yet. Returns the internal indices of the rows."""
+        cdef:
+            np.ndarray indices = self.find_internal_indices(keys, False)
+            np.ndarray found = indices >= 0
+            long i
+        
+        rows = np.asarray(rows, dtype=self.array.dtype)
+        self.array[indices[found]] = rows[found]
+        if not found.all():
+            keys = np.asarray(keys, dtype=np.long)
+            for i in np.nonzero(~found)[0]:
+                indices[i] = self.setitem(keys[i], rows[i])
+        return indices
+    
     def exists(self, *indices):
         indexDict = self.indexDict
         return all(indexDict.count(index) for index in indices)
@@ -0,0 +1,249 @@
+'''
+Created on 18.10.2026
+
+@author: Samuel
+
+Readers that load tables directly into structured numpy arrays.
+
+The CSV reader is a chunked replacement for
+``np.genfromtxt(fileName, delimiter=",", skip_header=True, dtype=dtype,
+autostrip=True)``. It produces the same values and raises the same errors,
+but converts whole columns at once and does not keep the text of the
+complete file in memory. Arrow and Parquet files can be read if pyarrow is
+installed. Further readers can be added with :py:func:`register_reader`.
+'''
+import os
+from itertools import islice
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    import pyarrow.feather as feather
+except ImportError:
+    pa = None
+
+# values used by np.genfromtxt for missing or invalid entries
+_FILL_VALUES = {"b":False, "i":-1, "u":-1, "f":np.nan, "S":b"", "U":""}
+
+_READERS = {}
+
+def register_reader(extensions, reader):
+    """Registers a reader for files with the given extensions.
+    
+    The reader is called as ``reader(fileName, dtype, **readerArgs)`` and
+    must return a one-dimensional structured array with the given dtype.
+    """
+    if type(extensions) == str:
+        extensions = [extensions]
+    for extension in extensions:
+        _READERS[extension.lower()] = reader
+
+def read_table(fileName, dtype, reader=None, **readerArgs):
+    """Reads a table into a one-dimensional structured array.
+    
+    The reader is chosen based on the file extension; files with unknown
+    extensions are read as CSV files. The columns of the file are assigned
+    to the fields of dtype in their order; fields with a shape consume
+    several consecutive columns.
+    """
+    if reader is None:
+        extension = os.path.splitext(fileName)[1].lower()
+        reader = _READERS.get(extension, read_csv)
+    elif type(reader) == str:
+        reader = _READERS[reader.lower()]
+    return reader(fileName, np.dtype(dtype), **readerArgs)
+
+def _get_columns(dtype):
+    columns = []
+    for name in dtype.names:
+        fieldDtype = dtype.fields[name][0]
+        if fieldDtype.shape:
+            for index in np.ndindex(fieldDtype.shape):
+                columns.append((name, index, fieldDtype.base))
+        else:
+            columns.append((name, (), fieldDtype))
+    return columns
+
+def _convert_column(values, dtype):
+    """Converts a list of byte strings like np.genfromtxt does."""
+    kind = dtype.kind
+    if kind == "S":
+        return np.array(values, dtype=dtype)
+    if kind == "U":
+        return np.array([value.decode("latin1") for value in values],
+                        dtype=dtype)
+    if kind == "b":
+        return np.array([value.upper() == b"TRUE" for value in values],
+                        dtype=bool)
+    
+    try:
+        return np.array(values, dtype=dtype)
+    except ValueError:
+        pass
+    
+    converter = float if kind == "f" else int
+    
+    fillValue = _FILL_VALUES[kind]
+    result = []
+    for value in values:
+        try:
+            result.append(converter(value))
+        except ValueError:
+            result.append(fillValue)
+    return np.array(result, dtype=dtype)
+
+def _fill_array(result, columns, getColumn):
+    for j, (name, index, columnDtype) in enumerate(columns):
+        result[name][(slice(None),) + index] = getColumn(j, columnDtype)
+
+def read_csv(fileName, dtype, delimiter=",", skipHeader=1, comments="#",
+             chunkSize=50000):
+    """Reads a CSV file into a structured array in chunks of chunkSize
+    lines.
+    
+    Missing and invalid entries are filled with the same values as in
+    np.genfromtxt, and rows with an unexpected number of columns raise the
+    same ValueError.
+    """
+    dtype = np.dtype(dtype)
+    columns = _get_columns(dtype)
+    if type(delimiter) == str:
+        delimiter = delimiter.encode()
+    if type(comments) == str:
+        comments = comments.encode()
+    
+    chunks = []
+    invalidLines = []
+    columnNumber = None
+    
+    # np.genfromtxt counts the lines starting from the first non-empty line
+    lineNumber = skipHeader + 1
+    
+    with open(fileName, "rb") as file:
+        for _ in range(skipHeader):
+            file.readline()
+        
+        while True:
+            lines = list(islice(file, chunkSize))
+            if not lines:
+                break
+            
+            if comments:
+                lines = [line.split(comments, 1)[0] for line in lines]
+            lines = [line.strip(b" \r\n") for line in lines]
+            
+            if columnNumber is None:
+                for i, line in enumerate(lines):
+                    if line:
+                        break
+                else:
+                    continue
+                lines = lines[i:]
+                columnNumber = lines[0].count(delimiter) + 1
+            
+            nonEmpty = np.array([bool(line) for line in lines], dtype=bool)
+            counts = np.array([line.count(delimiter) for line in lines],
+                              dtype=int) + 1
+            invalid = nonEmpty & (counts != columnNumber)
+            if invalid.any():
+                invalidIndices = np.nonzero(invalid)[0]
+                invalidLines.extend(zip(invalidIndices + lineNumber,
+                                        counts[invalidIndices]))
+            lineNumber += len(lines)
+            
+            # once an error has occurred, the remaining lines are only
+            # checked for the number of columns
+            if invalidLines or columnNumber < len(columns):
+                continue
+            
+            lines = [line for line in lines if line]
+            if not lines:
+                continue
+            
+            fields = [field.strip() for field in
+                      delimiter.join(lines).split(delimiter)]
+            result = np.empty(len(lines), dtype=dtype)
+            _fill_array(result, columns,
+                        lambda j, columnDtype: _convert_column(
+                            fields[j::columnNumber], columnDtype))
+            chunks.append(result)
+    
+    if invalidLines:
+        raise ValueError("Some errors were detected !" + "".join(
+            "\n    Line #{} (got {} columns instead of {})".format(
+                lineNumber, count, columnNumber)
+            for lineNumber, count in invalidLines))
+    
+    if columnNumber is not None and columnNumber < len(columns):
+        raise ValueError("could not assign tuple of length "
+                         + str(columnNumber) + " to structure with "
+                         + str(len(columns)) + " fields.")
+    
+    if not chunks:
+        return np.zeros(0, dtype=dtype)
+    if len(chunks) == 1:
+        return chunks[0]
+    return np.concatenate(chunks)
+
+def _iter_arrow_batches(fileName):
+    if fileName.lower().endswith((".parquet", ".pq")):
+        parquetFile = pq.ParquetFile(fileName)
+        for i in range(parquetFile.num_row_groups):
+            yield from parquetFile.read_row_group(i).to_batches()
+    else:
+        yield from feather.read_table(fileName).to_batches()
+
+def _convert_arrow_column(column, dtype):
+    kind = dtype.kind
+    columnType = column.type
+    if not column.null_count and (
+            (kind == "f" and (pa.types.is_floating(columnType)
+                              or pa.types.is_integer(columnType)))
+            or (kind in "iu" and pa.types.is_integer(columnType))
+            or (kind == "b" and pa.types.is_boolean(columnType))):
+        return column.to_numpy(zero_copy_only=False).astype(dtype)
+    
+    # the remaining columns are converted as if they were read from a
+    # CSV file
+    values = []
+    for value in column.to_pylist():
+        if value is None:
+            value = b""
+        elif type(value) == str:
+            value = value.encode()
+        elif type(value) != bytes:
+            value = str(value).encode()
+        values.append(value)
+    return _convert_column(values, dtype)
+
+def read_arrow(fileName, dtype):
+    """Reads a Parquet file or an Arrow (Feather) file into a structured
+    array. The file is processed batch by batch. Null entries are treated
+    like empty entries in CSV files. Requires pyarrow.
+    """
+    if pa is None:
+        raise ImportError("Reading Arrow and Parquet files requires the "
+                          + "package pyarrow.")
+    
+    dtype = np.dtype(dtype)
+    columns = _get_columns(dtype)
+    chunks = []
+    for batch in _iter_arrow_batches(fileName):
+        if batch.num_columns < len(columns):
+            raise ValueError("could not assign tuple of length "
+                             + str(batch.num_columns) + " to structure with "
+                             + str(len(columns)) + " fields.")
+        result = np.empty(batch.num_rows, dtype=dtype)
+        _fill_array(result, columns,
+                    lambda j, columnDtype: _convert_arrow_column(
+                        batch.column(j), columnDtype))
+        chunks.append(result)
+    
+    if not chunks:
+        return np.zeros(0, dtype=dtype)
+    return np.concatenate(chunks)
+
+register_reader((".csv", ".txt"), read_csv)
+register_reader((".parquet", ".pq", ".feather", ".arrow"), read_arrow)